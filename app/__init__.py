@@ -1,31 +1,122 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_jwt_extended import JWTManager
 from app.config import Config
+from app.utils.cache import ResponseCache
+from app.utils.compression import Compression
+from app.utils.instrumentation import RequestMetrics
+from app.utils.idempotency import Idempotency
+from app.utils.db_routing import REPLICA_BIND, RoutingSession, init_db_routing
+from app.utils.pagination import InvalidCursor
+from app.utils.pool_stats import enable_sqlite_foreign_keys, engine_options, instrument_engine
+from app.utils.rate_limit import RateLimiter
+from app.utils.serialization import NegotiatingJSONProvider
 import logging
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+jwt = JWTManager()
+response_cache = ResponseCache()
+rate_limiter = RateLimiter()
+idempotency = Idempotency()
+request_metrics = RequestMetrics()
+compression = Compression()
 
 
-def create_app():
+def _engine_options(app, bind_key):
+    """The options the engine for ``bind_key`` was created with (a bare URL bind has none)."""
+    if bind_key is None:
+        return app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    options = app.config['SQLALCHEMY_BINDS'][bind_key]
+    return options if isinstance(options, dict) else {}
+
+
+def create_app(serving=False):
+    """
+    Build the app. ``serving=True`` (the Gunicorn and ASGI entry points)
+    leaves out Flask-Migrate, which only the ``flask db`` CLI needs.
+    """
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(
+        app.config, app.config['SQLALCHEMY_DATABASE_URI']))
+    replica_url = app.config['DATABASE_REPLICA_URL']
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {
+            **app.config.get('SQLALCHEMY_BINDS', {}),
+            REPLICA_BIND: {"url": replica_url, **engine_options(app.config, replica_url)},
+        }
 
-    # Initialize extensions
+    # Initialize extensions; request metrics first so their after_request runs last
+    request_metrics.init_app(app)
+    app.json = NegotiatingJSONProvider(app)
+    compression.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    with app.app_context():
+        app.extensions['pool_stats'] = {
+            bind_key or 'default': instrument_engine(engine, _engine_options(app, bind_key))
+            for bind_key, engine in db.engines.items()
+        }
+        for engine in db.engines.values():
+            enable_sqlite_foreign_keys(engine)
+            request_metrics.watch_engine(engine)
+    if not serving:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    jwt.init_app(app)
+    response_cache.init_app(app)
+    rate_limiter.init_app(app)
+    idempotency.init_app(app)
+    init_db_routing(app)
 
     # Import models
-    from app.models import User, ToDoItem, StoreModel, ItemModel
+    from app.models import (
+        User, ToDoItem, StoreModel, ItemModel, StoreStatsModel, StoreDeletionModel, ChangeModel
+    )
+    from app.services.principal_service import init_principal_cache
+    init_principal_cache(app)
+    from app.services.change_log import ChangeFeed
+    ChangeFeed(app)
+    if app.config['PRICE_WRITE_BUFFER']:
+        from app.services.price_buffer import PriceWriteBuffer
+        PriceWriteBuffer(app)
 
     # Register blueprints
-    from app.routes import auth, main, store, store_items
+    from app.routes import auth, changes, internal, main, store, store_items
+    from app.services.item_filters import InvalidQueryArgument
     app.register_blueprint(auth.auth_bp)
+    app.register_blueprint(changes.changes_bp)
+    app.register_blueprint(internal.internal_bp)
     app.register_blueprint(main.main_bp)
     app.register_blueprint(store.store_bp)
     app.register_blueprint(store_items.item_bp)
 
+    # Schemas and serialization plans are built on first use when
+    # LAZY_STARTUP is set; otherwise now, so a preloading master shares them
+    if not app.config['LAZY_STARTUP']:
+        from app.utils.lazy import resolve_all
+        resolve_all()
+
+    @app.errorhandler(InvalidCursor)
+    @app.errorhandler(InvalidQueryArgument)
+    def handle_invalid_query_argument(e):
+        return jsonify({"error": str(e)}), 400
+
+    @app.cli.command('refresh-store-stats')
+    def refresh_store_stats_command():
+        """Rebuild the store_stats summary table from items."""
+        from app.services.store_stats import refresh_store_stats
+        refresh_store_stats()
+        db.session.commit()
+        print("Store stats refreshed!")
+
+    @app.cli.command('prune-changes')
+    def prune_changes_command():
+        """Delete change log rows older than CHANGES_RETENTION_DAYS."""
+        from app.services.change_log import prune_changes
+        removed = prune_changes(app.config['CHANGES_RETENTION_DAYS'])
+        db.session.commit()
+        print(f"Pruned {removed} changes!")
+
     logging.basicConfig(level=logging.INFO)
     app.logger.info("Flask app starting up")
 
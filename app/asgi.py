@@ -0,0 +1,361 @@
+"""
+ASGI entry point: ``uvicorn app.asgi:app``.
+
+The hot read endpoints (GET /items, /items/<id>, /stores, /stores/<id>)
+run as async views on an async SQLAlchemy engine (asyncpg for Postgres,
+aiosqlite for SQLite), so a request waiting on the database holds no
+thread. They reuse the models, filters, keyset pagination, ETags and
+serialization plans of the Flask views and return the same bytes.
+Everything else, and the variants the async views do not cover
+(``?expand=items``, SERIALIZATION_MODE=schema), is handed to the Flask
+app on a thread pool. GET /changes/stream is served natively too, so each
+subscriber is a coroutine rather than a pool thread. Needs the packages
+in requirements-asgi.txt.
+"""
+import asyncio
+import logging
+import re
+import time
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import NotFound
+from werkzeug.http import parse_cookie, parse_etags, quote_etag
+
+from app import create_app
+from app.models import ItemModel, StoreModel
+from app.routes.changes import STREAM_RETRY_MS
+from app.routes.store import store_plan
+from app.routes.store_items import item_plan
+from app.services.batch_lookup import id_filter, in_request_order, parse_ids
+from app.services.change_log import KEYS as CHANGE_KEYS, change_events, changes_statement, parse_position
+from app.services.item_filters import InvalidQueryArgument, parse_item_query
+from app.utils.db_routing import (
+    PRIMARY_UNTIL_COOKIE, PRIMARY_UNTIL_HEADER, REPLICA_BIND, primary_window_open
+)
+from app.utils.etag import collection_etag, entity_etag, represented_etag, rows_fingerprint
+from app.utils.pagination import InvalidCursor, finish_page, keyset_query, page_size
+from app.utils.pool_stats import enable_sqlite_foreign_keys, engine_options
+from app.utils.serialization import JSON, encode_body, negotiate
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {'postgresql': 'asyncpg', 'sqlite': 'aiosqlite'}
+
+
+def async_database_url(url):
+    """Swap the driver of a sync database URL for its asyncio counterpart."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the async views need."""
+
+    def __init__(self, scope):
+        self.path = scope['path']
+        self.args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        self.headers = {
+            name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']
+        }
+        self.representation = negotiate(self.headers.get('accept'))
+        self.db_time = 0.0
+        self.queries = 0
+
+    def if_none_match(self, etag):
+        return parse_etags(self.headers.get('if-none-match')).contains_weak(etag)
+
+
+class AsyncAPI:
+    """ASGI app: async views for hot reads, the Flask app for everything else."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.wsgi = WSGIMiddleware(flask_app, workers=self.config['ASGI_WSGI_THREADS'])
+        self.sessions = None
+        self.dialect = None
+        self.routes = [
+            (re.compile(r'/items'), 'item.get_all_items', self.get_items),
+            (re.compile(r'/items/(\d+)'), 'item.get_item', self.get_item),
+            (re.compile(r'/stores'), 'store.get_all_stores', self.get_stores),
+            (re.compile(r'/stores/(\d+)'), 'store.get_store', self.get_store),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            if scope['path'] == '/changes/stream':
+                return await self.stream_changes(scope, receive, send)
+            for pattern, endpoint, view in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    handled = await self.dispatch(view, endpoint, match.groups(), scope, send)
+                    if handled:
+                        return
+                    break
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def start(self):
+        """Create the async engines; must run inside the server's event loop."""
+        urls = {None: self.config['ASYNC_DATABASE_URL'] or self.config['SQLALCHEMY_DATABASE_URI']}
+        if self.config['DATABASE_REPLICA_URL']:
+            urls[REPLICA_BIND] = self.config['DATABASE_REPLICA_URL']
+        self.sessions = {}
+        for bind, url in urls.items():
+            url = async_database_url(url)
+            options = engine_options(self.config, url.render_as_string(hide_password=False))
+            # The instrumented QueuePool is sync-only; async engines use the adapted default
+            options.pop('poolclass', None)
+            engine = create_async_engine(url, **options)
+            enable_sqlite_foreign_keys(engine.sync_engine)
+            self.sessions[bind] = async_sessionmaker(engine, expire_on_commit=False)
+        self.dialect = url.get_backend_name()
+
+    async def stop(self):
+        for sessions in (self.sessions or {}).values():
+            await sessions.kw['bind'].dispose()
+        self.sessions = None
+
+    async def dispatch(self, view, endpoint, path_args, scope, send):
+        """Run an async view. Returns False when the view defers to Flask."""
+        if self.sessions is None:
+            self.start()
+        request = Request(scope)
+        start = time.perf_counter()
+        try:
+            result = await view(request, *path_args)
+        except (InvalidCursor, InvalidQueryArgument) as e:
+            result = self.json_response(400, {"error": str(e)}, representation=request.representation)
+        if result is None:
+            return False
+
+        status, headers, body = self.compress(request, *result)
+        wall = time.perf_counter() - start
+        headers.append((b'server-timing', (
+            f"app;dur={wall * 1000:.1f}, "
+            f"db;dur={request.db_time * 1000:.1f};desc=\"{request.queries} queries\""
+        ).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+        metrics = self.flask_app.extensions.get('request_metrics')
+        if metrics is not None:
+            metrics.duration.observe(wall, endpoint, 'GET', str(status))
+            metrics.db_time.observe(request.db_time, endpoint, 'GET')
+            metrics.queries.observe(request.queries, endpoint, 'GET')
+        return True
+
+    async def stream_changes(self, scope, receive, send):
+        """Async GET /changes/stream, fed by the same ChangeFeed as the Flask view."""
+        if self.sessions is None:
+            self.start()
+        request = Request(scope)
+        try:
+            position = parse_position(request.headers.get('last-event-id') or request.args.get('since'))
+        except InvalidCursor as e:
+            return await self.send_response(send, *self.json_response(400, {"error": str(e)}))
+
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        feed = self.flask_app.extensions['change_feed']
+        subscription = await asyncio.to_thread(feed.subscribe, lambda: loop.call_soon_threadsafe(wake.set))
+        if subscription is None:
+            return await self.send_response(send, *self.json_response(503, {"error": "Change feed unavailable"}))
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        heartbeat = self.config['CHANGES_STREAM_HEARTBEAT']
+        limit = self.config['PAGE_SIZE_MAX']
+
+        async def send_text(text):
+            await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            await send_text(f"retry: {STREAM_RETRY_MS}\n\n")
+            more = True
+            while more and not disconnected.done():
+                statement = changes_statement(self.dialect, limit, position)
+                rows, next_cursor = finish_page(await self.fetch(request, statement), CHANGE_KEYS, limit)
+                more = next_cursor is not None
+                for position, frame in change_events(rows):
+                    await send_text(frame)
+
+            while not subscription.dropped and not disconnected.done():
+                woken = asyncio.ensure_future(wake.wait())
+                await asyncio.wait({woken, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+                if not woken.done():
+                    woken.cancel()
+                    if not disconnected.done():
+                        await send_text(": keepalive\n\n")
+                    continue
+                wake.clear()
+                for event_position, frame in subscription.drain():
+                    if position is None or event_position > position:
+                        position = event_position
+                        await send_text(frame)
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            feed.unsubscribe(subscription)
+            disconnected.cancel()
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def send_response(send, status, headers, body):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def fetch(self, request, statement):
+        """Run a SELECT, on the replica unless the client is in its read-your-writes window."""
+        bind = None
+        if REPLICA_BIND in self.sessions and not primary_window_open(
+            parse_cookie(request.headers.get('cookie', '')).get(PRIMARY_UNTIL_COOKIE),
+            request.headers.get(PRIMARY_UNTIL_HEADER.lower()),
+        ):
+            bind = REPLICA_BIND
+        start = time.perf_counter()
+        async with self.sessions[bind]() as session:
+            rows = (await session.execute(statement)).all()
+        request.db_time += time.perf_counter() - start
+        request.queries += 1
+        return rows
+
+    def fast_path(self, plan):
+        return plan.supported and self.config['SERIALIZATION_MODE'] == 'fast'
+
+    def json_response(self, status, obj, etag=None, representation=JSON):
+        body = encode_body(self.flask_app, obj, representation)
+        if isinstance(body, str):
+            body = body.encode()
+        headers = [
+            (b'content-type', representation.content_type.encode()),
+            (b'content-length', str(len(body)).encode()),
+            (b'vary', b'Accept, Accept-Encoding'),
+        ]
+        if etag is not None:
+            headers.append((b'etag', quote_etag(etag).encode()))
+        return status, headers, body
+
+    def conditional(self, request, etag, obj):
+        """304 if the client already has ``etag``, else ``obj`` in the negotiated representation with the ETag."""
+        etag = represented_etag(etag, request.representation)
+        if request.if_none_match(etag):
+            return 304, [(b'etag', quote_etag(etag).encode()), (b'vary', b'Accept, Accept-Encoding')], b''
+        return self.json_response(200, obj, etag, request.representation)
+
+    def compress(self, request, status, headers, body):
+        """Apply the Flask app's Compression settings to an async view's response."""
+        compression = self.flask_app.extensions['compression']
+        content_type = dict(headers).get(b'content-type', b'').decode().split(';')[0]
+        coding = compression.choose(request.headers.get('accept-encoding'))
+        if coding is None or not compression.compressible(content_type, len(body)):
+            return status, headers, body
+        body = compression.compress(body, coding)
+        compressed = [(b'content-encoding', coding.encode())]
+        for name, value in headers:
+            if name == b'content-length':
+                value = str(len(body)).encode()
+            elif name == b'etag':
+                value = b'W/' + value
+            compressed.append((name, value))
+        return status, compressed, body
+
+    def not_found(self):
+        error = NotFound()
+        body = error.get_body().encode()
+        return 404, [
+            (b'content-type', b'text/html; charset=utf-8'),
+            (b'content-length', str(len(body)).encode()),
+        ], body
+
+    async def lookup(self, request, kind, model, plan, *etag_parts):
+        """Async batch lookup (``?ids=``), mirroring ``_lookup_items``/``_lookup_stores``."""
+        ids = parse_ids(request.args['ids'], self.config['BATCH_LOOKUP_MAX_IDS'])
+        statement = select(*plan.columns, model.version).where(id_filter(model.id, ids, self.dialect))
+        rows, missing = in_request_order(await self.fetch(request, statement), ids)
+        etag = collection_etag(kind, ids, rows_fingerprint(rows), *etag_parts)
+        return self.conditional(request, etag, {"data": plan.dump_many(rows), "missing": missing})
+
+    async def get_items(self, request):
+        """Async GET /items; same filters, sorts, cursors and ETags as the Flask view."""
+        if not self.fast_path(item_plan):
+            return None
+        if 'ids' in request.args:
+            return await self.lookup(request, 'items', ItemModel, item_plan)
+        filters, sort, descending = parse_item_query(request.args)
+        keys = [ItemModel.id] if sort is None else [sort, ItemModel.id]
+        limit = page_size(request.args, self.config)
+        statement = keyset_query(
+            select(*item_plan.columns, ItemModel.version).where(*filters),
+            keys, limit, request.args.get('cursor'), descending,
+        )
+        items, next_cursor = finish_page(await self.fetch(request, statement), keys, limit)
+        etag = collection_etag('items', rows_fingerprint(items), next_cursor)
+        return self.conditional(request, etag, {"data": item_plan.dump_many(items), "next": next_cursor})
+
+    async def get_item(self, request, item_id):
+        if not self.fast_path(item_plan):
+            return None
+        item_id = int(item_id)
+        rows = await self.fetch(
+            request, select(*item_plan.columns, ItemModel.version).where(ItemModel.id == item_id)
+        )
+        if not rows:
+            return self.not_found()
+        etag = entity_etag('item', item_id, rows[0].version)
+        return self.conditional(request, etag, item_plan.dump(rows[0]))
+
+    async def get_stores(self, request):
+        if 'items' in request.args.get('expand', '').split(',') or not self.fast_path(store_plan):
+            return None
+        if 'ids' in request.args:
+            return await self.lookup(request, 'stores', StoreModel, store_plan, None)
+        keys = [StoreModel.id]
+        limit = page_size(request.args, self.config)
+        statement = keyset_query(
+            select(*store_plan.columns, StoreModel.version), keys, limit, request.args.get('cursor')
+        )
+        stores, next_cursor = finish_page(await self.fetch(request, statement), keys, limit)
+        etag = collection_etag('stores', rows_fingerprint(stores), None, next_cursor)
+        return self.conditional(request, etag, {"data": store_plan.dump_many(stores), "next": next_cursor})
+
+    async def get_store(self, request, store_id):
+        if 'items' in request.args.get('expand', '').split(',') or not self.fast_path(store_plan):
+            return None
+        store_id = int(store_id)
+        rows = await self.fetch(
+            request, select(*store_plan.columns, StoreModel.version).where(StoreModel.id == store_id)
+        )
+        if not rows:
+            return self.not_found()
+        etag = entity_etag('store', store_id, rows[0].version)
+        return self.conditional(request, etag, store_plan.dump(rows[0]))
+
+
+app = AsyncAPI(create_app(serving=True))
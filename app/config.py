@@ -1,8 +1,147 @@
 import os
+from datetime import timedelta
 
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica: GET requests and the login lookup read from it
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    # After a write, the client reads from the primary for this many seconds
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', '5'))
     DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret')
+
+    # JWT auth: short-lived access tokens, long-lived refresh tokens (POST /refresh)
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', SECRET_KEY)
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', '30')))
+    # Per-process cache of user principals for authenticated requests. Updates
+    # and deletes evict locally; other workers catch up within the TTL.
+    PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', '60'))
+    PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv('PRINCIPAL_CACHE_MAX_ENTRIES', '10000'))
+
+    # Password hashing: any Werkzeug method string, e.g. "scrypt:32768:8:1" or
+    # "pbkdf2:sha256:600000". Stored hashes with another method or cost are
+    # upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Hashes run on a per-process pool of this many threads (about one per core)
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    # Hash requests allowed in flight per process; beyond that callers wait up
+    # to PASSWORD_HASH_WAIT_TIMEOUT seconds, then get a 503
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+    PASSWORD_HASH_WAIT_TIMEOUT = float(os.getenv('PASSWORD_HASH_WAIT_TIMEOUT', '2'))
+
+    # Connection pool, per worker process. Workers x (size + overflow) must fit
+    # in Postgres max_connections.
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'
+
+    # Optional token required by the /internal endpoints (X-Internal-Token header)
+    INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN')
+
+    # Rate limiting: "memory" (per worker), "redis" (shared, CACHE_REDIS_URL) or
+    # "null". Rules are "<count>/<second|minute|hour|day>"; empty disables one.
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+    RATE_LIMIT_AUTH = os.getenv('RATE_LIMIT_AUTH', '120/minute')
+    RATE_LIMIT_LOGIN_IP = os.getenv('RATE_LIMIT_LOGIN_IP', '20/minute')
+    RATE_LIMIT_LOGIN_ACCOUNT = os.getenv('RATE_LIMIT_LOGIN_ACCOUNT', '5/minute')
+    RATE_LIMIT_REGISTER_IP = os.getenv('RATE_LIMIT_REGISTER_IP', '5/minute')
+
+    # Keyset pagination for collection endpoints
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '50'))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '500'))
+    # GET /stores/stats rows are small; allow thousands of stores per page
+    STORE_STATS_PAGE_SIZE_MAX = int(os.getenv('STORE_STATS_PAGE_SIZE_MAX', '5000'))
+
+    # Rows fetched per round trip by the streaming item export
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+    # Upper bound on ids per batch lookup (GET /items?ids=, POST /items/lookup, same for stores)
+    BATCH_LOOKUP_MAX_IDS = int(os.getenv('BATCH_LOOKUP_MAX_IDS', '100'))
+
+    # Upper bound on operations accepted by POST /items/bulk
+    BULK_MAX_OPERATIONS = int(os.getenv('BULK_MAX_OPERATIONS', '5000'))
+
+    # DELETE /stores/<id>: stores with at least this many items (0 = only with
+    # ?background=true) are deleted by a background worker in batches
+    STORE_DELETE_BACKGROUND_MIN_ITEMS = int(os.getenv('STORE_DELETE_BACKGROUND_MIN_ITEMS', '0'))
+    STORE_DELETE_BATCH_SIZE = int(os.getenv('STORE_DELETE_BATCH_SIZE', '5000'))
+    STORE_DELETE_WORKERS = int(os.getenv('STORE_DELETE_WORKERS', '1'))
+
+    # Buffered price updates: with PRICE_WRITE_BUFFER on, PUT /items/<id> with
+    # only a price and `Prefer: respond-async` is answered 202 and written by
+    # a per-worker flush of up to PRICE_BUFFER_MAX_ITEMS items at least every
+    # PRICE_BUFFER_MAX_DELAY seconds. Past PRICE_BUFFER_MAX_PENDING items,
+    # updates are written synchronously again.
+    PRICE_WRITE_BUFFER = os.getenv('PRICE_WRITE_BUFFER', 'False').lower() == 'true'
+    PRICE_BUFFER_MAX_ITEMS = int(os.getenv('PRICE_BUFFER_MAX_ITEMS', '500'))
+    PRICE_BUFFER_MAX_DELAY = float(os.getenv('PRICE_BUFFER_MAX_DELAY', '0.5'))
+    PRICE_BUFFER_MAX_PENDING = int(os.getenv('PRICE_BUFFER_MAX_PENDING', '10000'))
+
+    # Change log (GET /changes, GET /changes/stream). Each worker polls for
+    # changes committed by other workers once per interval, whatever the
+    # number of stream subscribers; a subscriber that falls this many
+    # batches behind is disconnected and resumes from its Last-Event-ID.
+    CHANGES_POLL_INTERVAL = float(os.getenv('CHANGES_POLL_INTERVAL', '1'))
+    CHANGES_STREAM_HEARTBEAT = float(os.getenv('CHANGES_STREAM_HEARTBEAT', '15'))
+    CHANGES_STREAM_QUEUE = int(os.getenv('CHANGES_STREAM_QUEUE', '1000'))
+    # `flask prune-changes` removes rows older than this
+    CHANGES_RETENTION_DAYS = int(os.getenv('CHANGES_RETENTION_DAYS', '7'))
+
+    # Response cache for read endpoints: "memory" (per process), "redis" or "null"
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'null')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '60'))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Idempotency-Key replay store for POST/PUT/DELETE on stores and items:
+    # "memory" (per process), "redis" (shared, uses CACHE_REDIS_URL) or "null"
+    IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'memory')
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000'))
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '10'))
+
+    # "fast" dumps hot read endpoints from column tuples via a precomputed plan;
+    # "schema" always goes through marshmallow. Both produce identical bytes.
+    SERIALIZATION_MODE = os.getenv('SERIALIZATION_MODE', 'fast')
+
+    # Response compression, in order of preference among what the client
+    # accepts ("br" needs the brotli package; empty disables compression).
+    # Bodies under COMPRESSION_MIN_SIZE bytes are sent as they are.
+    COMPRESSION_ALGORITHMS = os.getenv('COMPRESSION_ALGORITHMS', 'br,gzip')
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+    # Request instrumentation: Server-Timing header, JSON slow logs on the
+    # "app.perf" logger, and latency histograms at GET /internal/metrics
+    SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True').lower() == 'true'
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '100'))
+    METRICS_BUCKETS = os.getenv(
+        'METRICS_BUCKETS', '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10')
+
+    # ASGI mode (app/asgi.py). Async views use ASYNC_DATABASE_URL, or
+    # DATABASE_URL with its driver swapped for asyncpg/aiosqlite; other
+    # routes run on the Flask app with this many threads per worker.
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '8'))
+
+    # Defer marshmallow and schema/serialization-plan construction to the
+    # first request that needs them, for faster cold starts (see README)
+    LAZY_STARTUP = os.getenv('LAZY_STARTUP', 'False').lower() == 'true'
+
+    # Production server (gunicorn.conf.py). See README for sizing.
+    WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5005')
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '2'))
+    WEB_THREADS = int(os.getenv('WEB_THREADS', '4'))
+    WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', '5'))
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', '30'))
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+    WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', '10000'))
+    WEB_MAX_REQUESTS_JITTER = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '1000'))
@@ -0,0 +1,41 @@
+"""add store stats
+
+Revision ID: 2fa908442c48
+Revises: 47334cc1e7d9
+Create Date: 2026-10-18 14:02:51.630277
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2fa908442c48'
+down_revision = '47334cc1e7d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('store_stats',
+    sa.Column('store_id', sa.Integer(), nullable=False),
+    sa.Column('item_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('price_sum', sa.Float(), server_default='0', nullable=False),
+    sa.Column('min_price', sa.Float(), nullable=True),
+    sa.Column('max_price', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('store_id')
+    )
+
+    # Backfill one summary row per existing store
+    op.execute("""
+        INSERT INTO store_stats (store_id, item_count, price_sum, min_price, max_price)
+        SELECT stores.id, count(items.id), coalesce(sum(items.price), 0),
+               min(items.price), max(items.price)
+        FROM stores LEFT OUTER JOIN items ON items.store_id = stores.id
+        GROUP BY stores.id
+    """)
+
+
+def downgrade():
+    op.drop_table('store_stats')
@@ -0,0 +1,47 @@
+"""add item filter indexes
+
+Revision ID: 47334cc1e7d9
+Revises: f550e506d99c
+Create Date: 2026-10-18 12:40:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '47334cc1e7d9'
+down_revision = 'f550e506d99c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.create_index('ix_items_store_id_id', ['store_id', 'id'], unique=False)
+        batch_op.create_index('ix_items_price_id', ['price', 'id'], unique=False)
+        batch_op.create_index('ix_items_store_id_price_id', ['store_id', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_items_name_id', ['name', 'id'], unique=False)
+        batch_op.create_index('ix_items_store_id_name_id', ['store_id', 'name', 'id'], unique=False)
+        batch_op.create_index(
+            'ix_items_name_pattern', ['name'], unique=False,
+            postgresql_ops={'name': 'varchar_pattern_ops'}
+        )
+        batch_op.create_index(
+            'ix_items_name_trgm', ['name'], unique=False,
+            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_index('ix_items_name_trgm')
+        batch_op.drop_index('ix_items_name_pattern')
+        batch_op.drop_index('ix_items_store_id_name_id')
+        batch_op.drop_index('ix_items_name_id')
+        batch_op.drop_index('ix_items_store_id_price_id')
+        batch_op.drop_index('ix_items_price_id')
+        batch_op.drop_index('ix_items_store_id_id')
@@ -0,0 +1,74 @@
+"""ensure store cascades, add store deletions
+
+Revision ID: b41c7e9d2f06
+Revises: 2fa908442c48
+Create Date: 2026-10-18 16:40:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41c7e9d2f06'
+down_revision = '2fa908442c48'
+branch_labels = None
+depends_on = None
+
+# Names Postgres gives unnamed foreign keys; lets batch mode drop SQLite's unnamed ones
+naming_convention = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _ensure_cascade(table, column):
+    """
+    Make ``table.column -> stores.id`` carry ON DELETE CASCADE. Earlier
+    revisions dropped and recreated this key under different names, so the
+    existing constraint is looked up rather than assumed.
+    """
+    bind = op.get_bind()
+    existing = [
+        fk for fk in sa.inspect(bind).get_foreign_keys(table)
+        if fk['referred_table'] == 'stores' and fk['constrained_columns'] == [column]
+    ]
+    if bind.dialect.name == 'sqlite':
+        # Reflection misses ON DELETE on column-level REFERENCES; SQLite itself knows
+        rules = {
+            row[6].upper() for row in bind.exec_driver_sql(f'PRAGMA foreign_key_list("{table}")')
+            if row[2] == 'stores' and row[3] == column
+        }
+    else:
+        rules = {(fk.get('options') or {}).get('ondelete', '').upper() for fk in existing}
+    if existing and rules == {'CASCADE'}:
+        return
+
+    name = f'{table}_{column}_fkey'
+    with op.batch_alter_table(table, naming_convention=naming_convention) as batch_op:
+        for fk in existing:
+            batch_op.drop_constraint(fk['name'] or name, type_='foreignkey')
+        batch_op.create_foreign_key(name, 'stores', [column], ['id'], ondelete='CASCADE')
+
+
+def upgrade():
+    _ensure_cascade('items', 'store_id')
+    _ensure_cascade('store_stats', 'store_id')
+
+    op.create_table('store_deletions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('store_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), server_default='pending', nullable=False),
+    sa.Column('items_deleted', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('store_deletions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_store_deletions_store_id'), ['store_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('store_deletions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_store_deletions_store_id'))
+
+    op.drop_table('store_deletions')
+    # The cascades are what every earlier revision meant to have; they stay
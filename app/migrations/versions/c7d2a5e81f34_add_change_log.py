@@ -0,0 +1,39 @@
+"""add change log
+
+Revision ID: c7d2a5e81f34
+Revises: b41c7e9d2f06
+Create Date: 2026-10-18 18:05:41.302617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2a5e81f34'
+down_revision = 'b41c7e9d2f06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('changes',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('xid', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('entity', sa.String(length=16), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=16), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('changes', schema=None) as batch_op:
+        batch_op.create_index('ix_changes_xid_id', ['xid', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_changes_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('changes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_changes_created_at'))
+        batch_op.drop_index('ix_changes_xid_id')
+
+    op.drop_table('changes')
@@ -1,6 +1,13 @@
+from datetime import datetime, timezone
+
 from app import db
 
 
+def utcnow():
+    """Naive UTC timestamp, comparable across databases and server time zones."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -29,12 +36,20 @@ class StoreModel(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
+    # Bumped by every UPDATE; backs the ETag of store responses
+    version = db.Column(
+        db.Integer, nullable=False, default=1, server_default="1",
+        onupdate=db.literal_column("version + 1")
+    )
 
-    # Relationship to ItemModel
+    # Relationship to ItemModel. Deleting a store leaves its items to the
+    # database's ON DELETE CASCADE instead of loading and deleting each one.
     items = db.relationship(
         "ItemModel",
         back_populates="store",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="ItemModel.id"
     )
 
     def __repr__(self):
@@ -44,10 +59,32 @@ class StoreModel(db.Model):
 # ItemModel
 class ItemModel(db.Model):
     __tablename__ = "items"
+    # Access paths for GET /items filters and keyset sorts (see item_filters.py)
+    __table_args__ = (
+        db.Index("ix_items_store_id_id", "store_id", "id"),
+        db.Index("ix_items_price_id", "price", "id"),
+        db.Index("ix_items_store_id_price_id", "store_id", "price", "id"),
+        db.Index("ix_items_name_id", "name", "id"),
+        db.Index("ix_items_store_id_name_id", "store_id", "name", "id"),
+        # Prefix LIKE under any collation, and trigram ILIKE substring search
+        db.Index(
+            "ix_items_name_pattern", "name",
+            postgresql_ops={"name": "varchar_pattern_ops"}
+        ),
+        db.Index(
+            "ix_items_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), nullable=False)
     price = db.Column(db.Float, nullable=False)
+    # Bumped by every UPDATE; backs the ETag of item responses
+    version = db.Column(
+        db.Integer, nullable=False, default=1, server_default="1",
+        onupdate=db.literal_column("version + 1")
+    )
 
     # Add ON DELETE CASCADE explicitly for clarity
     store_id = db.Column(
@@ -64,3 +101,67 @@ class ItemModel(db.Model):
 
     def __repr__(self):
         return f"<Item {self.name}, Price: {self.price}, Store ID: {self.store_id}>"
+
+
+# StoreStatsModel
+class StoreStatsModel(db.Model):
+    """Per-store item aggregates, maintained in the same transaction as item writes."""
+    __tablename__ = "store_stats"
+
+    store_id = db.Column(
+        db.Integer,
+        db.ForeignKey("stores.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    item_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    price_sum = db.Column(db.Float, nullable=False, default=0, server_default="0")
+    min_price = db.Column(db.Float, nullable=True)
+    max_price = db.Column(db.Float, nullable=True)
+
+    @property
+    def avg_price(self):
+        return self.price_sum / self.item_count if self.item_count else None
+
+    def __repr__(self):
+        return f"<StoreStats {self.store_id}: {self.item_count} items>"
+
+
+# StoreDeletionModel
+class StoreDeletionModel(db.Model):
+    """Progress of a background store deletion (DELETE /stores/<id>?background=true)."""
+    __tablename__ = "store_deletions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # No foreign key: the row outlives the store it reports on
+    store_id = db.Column(db.Integer, nullable=False, index=True)
+    status = db.Column(db.String(16), nullable=False, default="pending", server_default="pending")
+    items_deleted = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+
+    def __repr__(self):
+        return f"<StoreDeletion {self.id}: store {self.store_id} {self.status}>"
+
+
+# ChangeModel
+class ChangeModel(db.Model):
+    """
+    One row per store or item write, inserted in the writing transaction
+    (see app/services/change_log.py). Read in ``(xid, id)`` order.
+    """
+    __tablename__ = "changes"
+    __table_args__ = (
+        db.Index("ix_changes_xid_id", "xid", "id"),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    # Writing transaction on PostgreSQL (txid_current()); 0 elsewhere
+    xid = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+    entity = db.Column(db.String(16), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(16), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow, index=True)
+
+    def __repr__(self):
+        return f"<Change {self.id}: {self.op} {self.entity} {self.entity_id}>"
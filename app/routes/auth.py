@@ -1,16 +1,30 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
-from app import db
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+)
+from app import db, rate_limiter
 from app.models import User
+from app.services.auth_service import (
+    PasswordHasherBusy, hash_password, needs_rehash, verify_password
+)
+from app.services.principal_service import get_principal
+from app.utils.db_routing import replica_reads
+from app.utils.rate_limit import client_ip, json_field
 
 # Create Blueprint for auth routes
 auth_bp = Blueprint('auth', __name__)
+rate_limiter.limit_blueprint(auth_bp, 'RATE_LIMIT_AUTH')
+
+
+@auth_bp.errorhandler(PasswordHasherBusy)
+def hasher_busy(e):
+    return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
 
 # User Registration
 
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limiter.limit('RATE_LIMIT_REGISTER_IP', client_ip)
 def register():
     """
     Register a new user.
@@ -27,7 +41,7 @@ def register():
         return jsonify({"error": "Email already in use"}), 409
 
     # Hash password
-    hashed_password = generate_password_hash(data['password'], method='sha256')
+    hashed_password = hash_password(data['password'])
 
     # Create and save new user
     new_user = User(
@@ -44,9 +58,11 @@ def register():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('RATE_LIMIT_LOGIN_IP', client_ip)
+@rate_limiter.limit('RATE_LIMIT_LOGIN_ACCOUNT', json_field('email'))
 def login():
     """
-    Authenticate user and return JWT token.
+    Authenticate user and return JWT access and refresh tokens.
     Expects JSON: {"email": "test@test.com", "password": "password123"}
     """
     data = request.get_json()
@@ -56,19 +72,42 @@ def login():
         return jsonify({"error": "Email and password are required"}), 400
 
     # Fetch user by email
-    user = User.query.filter_by(email=data['email']).first()
+    with replica_reads():
+        user = User.query.filter_by(email=data['email']).first()
 
-    # Check password
-    if not user or not check_password_hash(user.password, data['password']):
+    # Check password (unknown emails are checked against a dummy hash)
+    if not verify_password(user.password if user else None, data['password']):
         return jsonify({"error": "Invalid email or password"}), 401
 
-    # Create JWT token
-    access_token = create_access_token(identity=user.id)
+    # Upgrade hashes made with an older method or cost
+    if needs_rehash(user.password):
+        user.password = hash_password(data['password'])
+        db.session.commit()
+
+    # Create JWT tokens (the subject claim must be a string)
+    identity = str(user.id)
     return jsonify({
         "message": "Login successful",
-        "access_token": access_token
+        "access_token": create_access_token(identity=identity),
+        "refresh_token": create_refresh_token(identity=identity)
     }), 200
 
+# Token Refresh
+
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Issue a new access token.
+    Expects the refresh token in the Authorization header.
+    """
+    identity = get_jwt_identity()
+    if get_principal(int(identity)) is None:
+        return jsonify({"error": "User not found"}), 401
+
+    return jsonify({"access_token": create_access_token(identity=identity)}), 200
+
 # Protected Route Example
 
 
@@ -77,16 +116,11 @@ def login():
 def profile():
     """
     Get user profile (protected route).
+    Served from the principal cache; the users table is read on a miss only.
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = get_principal(int(get_jwt_identity()))
 
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    return jsonify({
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "created_at": user.created_at
-    }), 200
+    return jsonify(user), 200
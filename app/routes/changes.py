@@ -0,0 +1,80 @@
+import threading
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from app import db
+from app.services.change_log import (
+    change_dict, change_events, change_position, fetch_changes, parse_position
+)
+from app.utils.pagination import encode_cursor, get_page_size
+
+changes_bp = Blueprint('changes', __name__, url_prefix='/changes')
+
+# Reconnect delay, in milliseconds, suggested to EventSource clients
+STREAM_RETRY_MS = 2000
+
+
+@changes_bp.route('', methods=['GET'])
+def get_changes():
+    """
+    Store and item changes after ?since=<cursor>, oldest first. Returns
+    {"data": [{"entity", "id", "op", "at"}], "next": cursor, "more": bool}.
+    "next" is returned even when the page is empty: pass it as ?since= to
+    continue from where this page ended.
+    """
+    position = parse_position(request.args.get('since'))
+    rows, more = fetch_changes(get_page_size(), position)
+    if rows:
+        position = change_position(rows[-1])
+    return jsonify({
+        "data": [change_dict(row) for row in rows],
+        "next": encode_cursor(list(position)) if position else None,
+        "more": more,
+    }), 200
+
+
+@changes_bp.route('/stream', methods=['GET'])
+def stream_changes():
+    """
+    Server-Sent Events stream of changes after ?since=<cursor> (or the
+    Last-Event-ID header of a reconnecting EventSource), then of new
+    changes as they commit. Each event's id is its cursor.
+    """
+    position = parse_position(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    feed = current_app.extensions['change_feed']
+    wake = threading.Event()
+    subscription = feed.subscribe(wake.set)
+    if subscription is None:
+        abort(503)
+    heartbeat = current_app.config['CHANGES_STREAM_HEARTBEAT']
+    page_size = current_app.config['PAGE_SIZE_MAX']
+
+    def generate():
+        nonlocal position
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            # Catch up from the log; the subscription queues what commits meanwhile
+            more = True
+            while more:
+                rows, more = fetch_changes(page_size, position)
+                for position, frame in change_events(rows):
+                    yield frame
+            db.session.remove()
+
+            while not subscription.dropped:
+                if not wake.wait(heartbeat):
+                    yield ": keepalive\n\n"
+                    continue
+                wake.clear()
+                for event_position, frame in subscription.drain():
+                    if position is None or event_position > position:
+                        position = event_position
+                        yield frame
+            # Fell too far behind: end the stream, the client resumes from its Last-Event-ID
+        finally:
+            feed.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,33 @@
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from app import db
+
+internal_bp = Blueprint('internal', __name__, url_prefix='/internal')
+
+
+@internal_bp.before_request
+def require_token():
+    """Guard internal endpoints with INTERNAL_API_TOKEN when it is configured."""
+    token = current_app.config['INTERNAL_API_TOKEN']
+    if token and request.headers.get('X-Internal-Token') != token:
+        abort(403)
+
+
+@internal_bp.route('/stats/db', methods=['GET'])
+def db_stats():
+    """Connection pool statistics for every engine of this worker."""
+    engines = {
+        bind_key or 'default': engine for bind_key, engine in db.engines.items()
+    }
+    return jsonify({
+        name: stats.snapshot(engines[name].pool)
+        for name, stats in current_app.extensions['pool_stats'].items()
+    }), 200
+
+
+@internal_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Request latency, DB time and query count histograms of this worker, in Prometheus format."""
+    return Response(
+        current_app.extensions['request_metrics'].render_prometheus(),
+        mimetype='text/plain; version=0.0.4',
+    )
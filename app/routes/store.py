@@ -1,39 +1,206 @@
-from flask import Blueprint, jsonify, request
-from app import db
-from app.models import StoreModel
-from app.schemas.store_schema import StoreSchema
+from flask import Blueprint, abort, current_app, jsonify, request, url_for
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from app import db, idempotency, response_cache
+from app.models import ItemModel, StoreDeletionModel, StoreModel, StoreStatsModel
+from app.services import store_deletion
+from app.services.batch_lookup import id_filter, in_request_order, parse_ids
+from app.services.cache_service import invalidate_stores
+from app.services.change_log import record_changes
+from app.services.store_stats import create_store_stats
+from app.utils.etag import (
+    collection_etag, entity_etag, not_modified, rows_fingerprint, with_etag
+)
+from app.utils.lazy import LazyObject
+from app.utils.pagination import get_page_size, paginate
+from app.utils.serialization import SerializationPlan, fast_serialization_enabled
+
+STORE_SCHEMA = 'app.schemas.store_schema:StoreSchema'
+STORE_WITH_ITEMS_SCHEMA = 'app.schemas.store_schema:StoreWithItemsSchema'
+STORE_STATS_SCHEMA = 'app.schemas.store_stats_schema:StoreStatsSchema'
 
 store_bp = Blueprint('store', __name__, url_prefix='/stores')
-store_schema = StoreSchema()
-stores_schema = StoreSchema(many=True)
+# Built on first use (or by create_app unless LAZY_STARTUP is set)
+store_schema = LazyObject(STORE_SCHEMA)
+stores_schema = LazyObject(STORE_SCHEMA, many=True)
+store_with_items_schema = LazyObject(STORE_WITH_ITEMS_SCHEMA)
+stores_with_items_schema = LazyObject(STORE_WITH_ITEMS_SCHEMA, many=True)
+store_plan = LazyObject(SerializationPlan, STORE_SCHEMA, StoreModel)
+store_stats_schema = LazyObject(STORE_STATS_SCHEMA)
+stores_stats_schema = LazyObject(STORE_STATS_SCHEMA, many=True)
+
+
+def _expand_items():
+    """Whether the request asked for nested items via ?expand=items."""
+    return 'items' in request.args.get('expand', '').split(',')
+
+
+def _items_fingerprint(store_ids):
+    """(count, max id, sum of versions) of the items of ``store_ids``, as one aggregate query."""
+    return tuple(db.session.execute(
+        select(
+            func.count(ItemModel.id),
+            func.coalesce(func.max(ItemModel.id), 0),
+            func.coalesce(func.sum(ItemModel.version), 0),
+        ).where(ItemModel.store_id.in_(store_ids))
+    ).one())
 
 
 @store_bp.route('', methods=['GET'])
+@response_cache.cached('stores')
 def get_all_stores():
-    """Get all stores."""
-    stores = StoreModel.query.all()
-    return stores_schema.dump(stores), 200
+    """
+    Get a page of stores, ordered by ID. Use ?expand=items to nest items.
+    With ?ids=3,1,2 returns just those stores instead (see lookup_stores).
+    """
+    ids = request.args.get('ids')
+    if ids is not None:
+        return _lookup_stores(parse_ids(ids, current_app.config['BATCH_LOOKUP_MAX_IDS']))
+
+    expand = _expand_items()
+    if request.if_none_match:
+        # Answer revalidations from (id, version) keys only, without loading rows
+        keys, next_cursor = paginate(
+            StoreModel.query.with_entities(StoreModel.id, StoreModel.version), StoreModel
+        )
+        items = _items_fingerprint([key.id for key in keys]) if expand else None
+        response = not_modified(
+            collection_etag('stores', rows_fingerprint(keys), items, next_cursor)
+        )
+        if response:
+            return response
+
+    if expand:
+        query = StoreModel.query.options(selectinload(StoreModel.items))
+        stores, next_cursor = paginate(query, StoreModel)
+        items = rows_fingerprint(item for store in stores for item in store.items)
+        etag = collection_etag('stores', rows_fingerprint(stores), items, next_cursor)
+        return with_etag(jsonify({"data": stores_with_items_schema.dump(stores), "next": next_cursor}), etag)
+
+    if fast_serialization_enabled(store_plan):
+        query = StoreModel.query.with_entities(*store_plan.columns, StoreModel.version)
+        stores, next_cursor = paginate(query, StoreModel)
+        etag = collection_etag('stores', rows_fingerprint(stores), None, next_cursor)
+        body = {"data": store_plan.dump_many(stores), "next": next_cursor}
+        return with_etag(store_plan.response(body), etag)
+
+    stores, next_cursor = paginate(StoreModel.query, StoreModel)
+    etag = collection_etag('stores', rows_fingerprint(stores), None, next_cursor)
+    return with_etag(jsonify({"data": stores_schema.dump(stores), "next": next_cursor}), etag)
+
+
+@store_bp.route('/lookup', methods=['POST'])
+def lookup_stores():
+    """
+    Get many stores by ID with one query (?expand=items nests their items).
+    Expects JSON: {"ids": [3, 1, 2]}. Returns {"data": [...], "missing": [...]}
+    with data in request order; unknown ids are listed in "missing".
+    """
+    data = request.get_json()
+    ids = data.get('ids') if isinstance(data, dict) else None
+    return _lookup_stores(parse_ids(ids, current_app.config['BATCH_LOOKUP_MAX_IDS']))
+
+
+def _lookup_stores(ids):
+    """Response for a batch lookup of ``ids``: one IN query, rows in request order."""
+    condition = id_filter(StoreModel.id, ids, db.engine.dialect.name)
+    if _expand_items():
+        rows = StoreModel.query.options(selectinload(StoreModel.items)).filter(condition).all()
+        stores, missing = in_request_order(rows, ids)
+        items = rows_fingerprint(item for store in stores for item in store.items)
+        etag = collection_etag('stores', ids, rows_fingerprint(stores), items)
+        schema, fast = stores_with_items_schema, False
+    else:
+        fast = fast_serialization_enabled(store_plan)
+        if fast:
+            rows = db.session.execute(select(*store_plan.columns, StoreModel.version).where(condition)).all()
+        else:
+            rows = StoreModel.query.filter(condition).all()
+        stores, missing = in_request_order(rows, ids)
+        etag = collection_etag('stores', ids, rows_fingerprint(stores), None)
+        schema = stores_schema
+
+    response = not_modified(etag) if request.method == 'GET' else None
+    if response:
+        return response
+    if fast:
+        return with_etag(store_plan.response({"data": store_plan.dump_many(stores), "missing": missing}), etag)
+    return with_etag(jsonify({"data": schema.dump(stores), "missing": missing}), etag)
 
 
 @store_bp.route('/<int:store_id>', methods=['GET'])
+@response_cache.cached('store:{store_id}')
 def get_store(store_id):
-    """Get a single store by ID."""
-    store = StoreModel.query.get_or_404(store_id)
-    return store_schema.dump(store), 200
+    """Get a single store by ID. Use ?expand=items to nest items."""
+    if _expand_items():
+        if request.if_none_match:
+            version = db.session.scalar(
+                select(StoreModel.version).where(StoreModel.id == store_id)
+            )
+            if version is None:
+                abort(404)
+            etag = entity_etag('store', store_id, version, 'items', *_items_fingerprint([store_id]))
+            response = not_modified(etag)
+            if response:
+                return response
+
+        query = StoreModel.query.options(selectinload(StoreModel.items))
+        store = query.get_or_404(store_id)
+        etag = entity_etag('store', store_id, store.version, 'items', *rows_fingerprint(store.items))
+        return with_etag(store_with_items_schema.dump(store), etag)
+
+    # Plain column tuple: a 304 costs one PK lookup and no ORM hydration or dump
+    store = db.session.execute(
+        select(*store_plan.columns, StoreModel.version).where(StoreModel.id == store_id)
+    ).first()
+    if store is None:
+        abort(404)
+    etag = entity_etag('store', store_id, store.version)
+    response = not_modified(etag)
+    if response:
+        return response
+    if fast_serialization_enabled(store_plan):
+        return with_etag(store_plan.response(store_plan.dump(store)), etag)
+    return with_etag(store_schema.dump(store), etag)
+
+
+@store_bp.route('/stats', methods=['GET'])
+@response_cache.cached('stores')
+def get_all_store_stats():
+    """Get item count and min/max/avg price for a page of stores, ordered by store ID."""
+    stats, next_cursor = paginate(
+        StoreStatsModel.query, StoreStatsModel, key=StoreStatsModel.store_id,
+        limit=get_page_size(current_app.config['STORE_STATS_PAGE_SIZE_MAX'])
+    )
+    return jsonify({"data": stores_stats_schema.dump(stats), "next": next_cursor}), 200
+
+
+@store_bp.route('/<int:store_id>/stats', methods=['GET'])
+@response_cache.cached('store:{store_id}')
+def get_store_stats(store_id):
+    """Get item count and min/max/avg price for one store."""
+    stats = StoreStatsModel.query.get_or_404(store_id)
+    return store_stats_schema.dump(stats), 200
 
 
 @store_bp.route('', methods=['POST'])
+@idempotency.idempotent
 def create_store():
     """Create a new store."""
     data = request.get_json()
     store = store_schema.load(data, session=db.session)
 
     db.session.add(store)
+    db.session.flush()
+    create_store_stats(store.id)
+    record_changes([('store', 'create', store.id)])
     db.session.commit()
+    invalidate_stores([store.id])
     return store_schema.dump(store), 201
 
 
 @store_bp.route('/<int:store_id>', methods=['PUT'])
+@idempotency.idempotent
 def update_store(store_id):
     """Update an existing store."""
     store = StoreModel.query.get_or_404(store_id)
@@ -42,21 +209,64 @@ def update_store(store_id):
     if 'name' in data:
         store.name = data['name']
 
+    if db.session.is_modified(store):
+        record_changes([('store', 'update', store_id)])
     db.session.commit()
+    invalidate_stores([store_id])
     return store_schema.dump(store), 200
 
 
 @store_bp.route('/<int:store_id>', methods=['DELETE'])
+@idempotency.idempotent
 def delete_store(store_id):
-    """Delete a store by ID."""
-    try:
-        store = StoreModel.query.get_or_404(store_id)
-        print(f"Items associated with store {store_id}: {
-              [item.name for item in store.items]}")
-        db.session.delete(store)
-        db.session.commit()
-        return jsonify({"message": "Store deleted successfully"}), 200
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error occurred: {e}")
-        return jsonify({"error": str(e)}), 500
+    """
+    Delete a store by ID; the database cascade removes its items.
+    With ?background=true (or for stores with at least
+    STORE_DELETE_BACKGROUND_MIN_ITEMS items) the items are deleted in
+    batches after responding 202 with a status URL.
+    """
+    if _delete_in_background(store_id):
+        deletion = store_deletion.start_background_deletion(store_id)
+        if deletion is None:
+            abort(404)
+        status_url = url_for('store.get_store_deletion', deletion_id=deletion.id)
+        return jsonify({**_deletion_status(deletion), "status_url": status_url}), 202, {"Location": status_url}
+
+    if not store_deletion.delete_store(store_id):
+        abort(404)
+    db.session.commit()
+    invalidate_stores([store_id], deleted=True)
+    return jsonify({"message": "Store deleted successfully"}), 200
+
+
+def _delete_in_background(store_id):
+    if request.args.get('background', 'false').lower() == 'true':
+        return True
+    threshold = current_app.config['STORE_DELETE_BACKGROUND_MIN_ITEMS']
+    if not threshold:
+        return False
+    item_count = db.session.scalar(
+        select(StoreStatsModel.item_count).where(StoreStatsModel.store_id == store_id)
+    )
+    return item_count is not None and item_count >= threshold
+
+
+def _deletion_status(deletion):
+    return {
+        "id": deletion.id,
+        "store_id": deletion.store_id,
+        "status": deletion.status,
+        "items_deleted": deletion.items_deleted,
+        "error": deletion.error,
+        "created_at": deletion.created_at.isoformat(),
+        "updated_at": deletion.updated_at.isoformat(),
+    }
+
+
+@store_bp.route('/deletions/<int:deletion_id>', methods=['GET'])
+def get_store_deletion(deletion_id):
+    """Progress of a background store deletion: pending, running, done or failed."""
+    deletion = db.session.get(StoreDeletionModel, deletion_id)
+    if deletion is None:
+        abort(404)
+    return jsonify(_deletion_status(deletion)), 200
@@ -1,57 +1,287 @@
-from flask import Blueprint, jsonify, request
-from app import db
+import math
+from functools import partial
+
+from flask import (
+    Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+)
+from sqlalchemy import select
+from app import db, idempotency, response_cache
 from app.models import ItemModel, StoreModel
-from app.schemas.items_schema import ItemSchema
+from app.services.batch_lookup import id_filter, in_request_order, parse_ids
+from app.services.cache_service import invalidate_items
+from app.services.change_log import record_changes
+from app.services.item_filters import number_arg, parse_item_query
+from app.services.item_service import apply_bulk_operations
+from app.services.price_buffer import supersede_buffered_prices
+from app.services.store_stats import record_item_changes
+from app.utils.etag import (
+    collection_etag, entity_etag, not_modified, rows_fingerprint, with_etag
+)
+from app.utils.pagination import paginate
+from app.utils.lazy import LazyObject
+from app.utils.serialization import SerializationPlan, fast_serialization_enabled
+
+ITEM_SCHEMA = 'app.schemas.items_schema:ItemSchema'
 
 item_bp = Blueprint('item', __name__, url_prefix='/items')
-item_schema = ItemSchema()
-items_schema = ItemSchema(many=True)
+# Built on first use (or by create_app unless LAZY_STARTUP is set)
+item_schema = LazyObject(ITEM_SCHEMA)
+items_schema = LazyObject(ITEM_SCHEMA, many=True)
+item_plan = LazyObject(SerializationPlan, ITEM_SCHEMA, ItemModel)
+# Validation only, for the fields update_item accepts
+item_update_schema = LazyObject(ITEM_SCHEMA, load_instance=False, transient=True, partial=True)
+UPDATABLE_FIELDS = ('name', 'price')
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
 
 
 @item_bp.route('', methods=['GET'])
+@response_cache.cached('items')
 def get_all_items():
-    """Get all items."""
-    items = ItemModel.query.all()
-    return items_schema.dump(items), 200
+    """
+    Get a page of items.
+    Filters: ?store_id=, ?min_price=, ?max_price=, ?name_prefix=, ?q= (substring).
+    Sort: ?sort=id|price|name, prefixed with '-' for descending.
+    With ?ids=3,1,2 returns just those items instead (see lookup_items).
+    """
+    ids = request.args.get('ids')
+    if ids is not None:
+        return _lookup_items(parse_ids(ids, current_app.config['BATCH_LOOKUP_MAX_IDS']))
+
+    filters, sort, descending = parse_item_query(request.args)
+    query = ItemModel.query.filter(*filters)
+    page = partial(paginate, model=ItemModel, sort=sort, descending=descending)
+
+    if request.if_none_match:
+        # Answer revalidations from keyset columns only, without loading rows
+        keys = [ItemModel.id, ItemModel.version] + ([sort] if sort is not None else [])
+        keys, next_cursor = page(query.with_entities(*keys))
+        response = not_modified(collection_etag('items', rows_fingerprint(keys), next_cursor))
+        if response:
+            return response
+
+    if fast_serialization_enabled(item_plan):
+        items, next_cursor = page(query.with_entities(*item_plan.columns, ItemModel.version))
+        etag = collection_etag('items', rows_fingerprint(items), next_cursor)
+        body = {"data": item_plan.dump_many(items), "next": next_cursor}
+        return with_etag(item_plan.response(body), etag)
+
+    items, next_cursor = page(query)
+    etag = collection_etag('items', rows_fingerprint(items), next_cursor)
+    return with_etag(jsonify({"data": items_schema.dump(items), "next": next_cursor}), etag)
+
+
+@item_bp.route('/lookup', methods=['POST'])
+def lookup_items():
+    """
+    Get many items by ID with one query.
+    Expects JSON: {"ids": [3, 1, 2]}. Returns {"data": [...], "missing": [...]}
+    with data in request order; unknown ids are listed in "missing".
+    """
+    data = request.get_json()
+    ids = data.get('ids') if isinstance(data, dict) else None
+    return _lookup_items(parse_ids(ids, current_app.config['BATCH_LOOKUP_MAX_IDS']))
+
+
+def _lookup_items(ids):
+    """Response for a batch lookup of ``ids``: one IN query, rows in request order."""
+    condition = id_filter(ItemModel.id, ids, db.engine.dialect.name)
+    fast = fast_serialization_enabled(item_plan)
+    if fast:
+        rows = db.session.execute(select(*item_plan.columns, ItemModel.version).where(condition)).all()
+    else:
+        rows = ItemModel.query.filter(condition).all()
+    items, missing = in_request_order(rows, ids)
+    etag = collection_etag('items', ids, rows_fingerprint(items))
+    response = not_modified(etag) if request.method == 'GET' else None
+    if response:
+        return response
+    if fast:
+        return with_etag(item_plan.response({"data": item_plan.dump_many(items), "missing": missing}), etag)
+    return with_etag(jsonify({"data": items_schema.dump(items), "missing": missing}), etag)
+
+
+@item_bp.route('/export', methods=['GET'])
+def export_items():
+    """
+    Stream the full item catalogue.
+    Supports ?format=ndjson (default) or ?format=json and an optional ?store_id filter.
+    Rows are read through a server-side cursor, so memory stays flat
+    regardless of table size.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+
+    stmt = select(*item_plan.columns).order_by(ItemModel.id)
+    store_id = number_arg(request.args, 'store_id', int)
+    if store_id is not None:
+        stmt = stmt.where(ItemModel.store_id == store_id)
+    stmt = stmt.execution_options(
+        yield_per=current_app.config['EXPORT_BATCH_SIZE'])
+    dump_many = item_plan.dump_many if fast_serialization_enabled(item_plan) else items_schema.dump
+
+    def generate_ndjson():
+        dumps = current_app.json.dumps
+        result = db.session.execute(stmt)
+        for rows in result.partitions():
+            yield ''.join(dumps(item) + '\n' for item in dump_many(rows))
+
+    def generate_json():
+        dumps = current_app.json.dumps
+        result = db.session.execute(stmt)
+        separator = '['
+        for rows in result.partitions():
+            chunk = ','.join(dumps(item) for item in dump_many(rows))
+            yield separator + chunk
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+    generate = generate_ndjson if fmt == 'ndjson' else generate_json
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[fmt]
+    )
 
 
 @item_bp.route('/<int:item_id>', methods=['GET'])
+@response_cache.cached('item:{item_id}', 'items:all')
 def get_item(item_id):
     """Get a single item by ID."""
-    item = ItemModel.query.get_or_404(item_id)
-    return item_schema.dump(item), 200
+    # Plain column tuple: a 304 costs one PK lookup and no ORM hydration or dump
+    item = db.session.execute(
+        select(*item_plan.columns, ItemModel.version).where(ItemModel.id == item_id)
+    ).first()
+    if item is None:
+        abort(404)
+    etag = entity_etag('item', item_id, item.version)
+    response = not_modified(etag)
+    if response:
+        return response
+    if fast_serialization_enabled(item_plan):
+        return with_etag(item_plan.response(item_plan.dump(item)), etag)
+    return with_etag(item_schema.dump(item), etag)
 
 
 @item_bp.route('', methods=['POST'])
+@idempotency.idempotent
 def create_item():
     """Create a new item."""
     data = request.get_json()
     item = item_schema.load(data, session=db.session)
 
     db.session.add(item)
+    record_item_changes([(item.store_id, None, item.price)])
+    record_changes([('item', 'create', item.id)])
     db.session.commit()
+    invalidate_items([item.id], [item.store_id])
     return item_schema.dump(item), 201
 
 
+@item_bp.route('/bulk', methods=['POST'])
+@idempotency.idempotent
+def bulk_items():
+    """
+    Apply a batch of item operations in one transaction.
+    Expects JSON: {"operations": [{"op": "create", "name": "x", "price": 1.0, "store_id": 1},
+                                  {"op": "update", "id": 2, "price": 9.99},
+                                  {"op": "delete", "id": 3}]}
+    With ?atomic=true nothing is written unless every operation is valid.
+    """
+    data = request.get_json()
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "A non-empty list of operations is required"}), 400
+
+    max_operations = current_app.config['BULK_MAX_OPERATIONS']
+    if len(operations) > max_operations:
+        return jsonify({"error": f"At most {max_operations} operations per batch"}), 413
+
+    atomic = request.args.get('atomic', 'false').lower() == 'true'
+    results, ok = apply_bulk_operations(operations, atomic=atomic)
+    status = 200 if ok else (422 if atomic else 207)
+    return jsonify({"results": results}), status
+
+
 @item_bp.route('/<int:item_id>', methods=['PUT'])
+@idempotency.idempotent
 def update_item(item_id):
-    """Update an existing item."""
-    item = ItemModel.query.get_or_404(item_id)
+    """
+    Update an existing item. With PRICE_WRITE_BUFFER on, a price-only
+    update sent with ``Prefer: respond-async`` is buffered instead and
+    answered 202; it is written within PRICE_BUFFER_MAX_DELAY seconds.
+    """
     data = request.get_json()
+    buffer = current_app.extensions.get('price_buffer')
+    if buffer is not None and _buffered_price_update(data):
+        response = _buffer_price(buffer, item_id, data['price'])
+        if response is not None:
+            return response
+    errors = item_update_schema.validate({k: data[k] for k in UPDATABLE_FIELDS if k in data})
+    if errors:
+        return jsonify({"errors": errors}), 400
+    if 'price' in data:
+        supersede_buffered_prices([item_id])
+
+    item = ItemModel.query.get_or_404(item_id)
 
     if 'name' in data:
         item.name = data['name']
     if 'price' in data:
+        old_price = item.price
         item.price = data['price']
 
+    # Before record_item_changes, whose flush clears the pending changes
+    if db.session.is_modified(item):
+        record_changes([('item', 'update', item_id)])
+    if 'price' in data:
+        record_item_changes([(item.store_id, old_price, item.price)])
     db.session.commit()
+    invalidate_items([item_id], [item.store_id])
     return item_schema.dump(item), 200
 
 
+def _buffered_price_update(data):
+    """Whether the client opted in and the update is a single, valid price."""
+    if 'respond-async' not in request.headers.get('Prefer', '').replace(' ', '').split(','):
+        return False
+    if not isinstance(data, dict) or set(data) != {'price'}:
+        return False
+    price = data['price']
+    return isinstance(price, (int, float)) and not isinstance(price, bool) and math.isfinite(price)
+
+
+def _buffer_price(buffer, item_id, price):
+    """202 for a buffered price, or None to write synchronously (buffer full)."""
+    # Items already buffered were checked when first seen; a deletion in between is skipped at flush
+    if not buffer.pending(item_id) and db.session.scalar(
+        select(ItemModel.id).where(ItemModel.id == item_id)
+    ) is None:
+        abort(404)
+    if not buffer.put(item_id, price):
+        return None
+    return jsonify({
+        "id": item_id,
+        "price": price,
+        "status": "buffered",
+        "durable": False,
+        "flush_within_ms": round(buffer.max_delay * 1000),
+    }), 202, {"Preference-Applied": "respond-async"}
+
+
 @item_bp.route('/<int:item_id>', methods=['DELETE'])
+@idempotency.idempotent
 def delete_item(item_id):
     """Delete an item by ID."""
+    supersede_buffered_prices([item_id])
     item = ItemModel.query.get_or_404(item_id)
+    store_id = item.store_id
     db.session.delete(item)
+    record_item_changes([(store_id, item.price, None)])
+    record_changes([('item', 'delete', item_id)])
     db.session.commit()
+    invalidate_items([item_id], [store_id])
     return jsonify({"message": "Item deleted"}), 200
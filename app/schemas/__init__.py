@@ -3,4 +3,6 @@
 # Example import for a ItemSchema
 from app.schemas.items_schema import ItemSchema
 # Example import for a StoreSchema
-from app.schemas.store_schema import StoreSchema
+from app.schemas.store_schema import StoreSchema, StoreWithItemsSchema
+# Example import for a StoreStatsSchema
+from app.schemas.store_stats_schema import StoreStatsSchema
@@ -0,0 +1,10 @@
+from marshmallow_sqlalchemy import SQLAlchemySchema
+from app.utils.instrumentation import timed
+
+
+class BaseSchema(SQLAlchemySchema):
+    """Base for API schemas; dumps are counted as serialization time per request."""
+
+    def dump(self, obj, *, many=None):
+        with timed('serialize'):
+            return super().dump(obj, many=many)
@@ -1,8 +1,9 @@
-from marshmallow_sqlalchemy import SQLAlchemySchema, auto_field
+from marshmallow_sqlalchemy import auto_field
+from app.schemas.base import BaseSchema
 from app.models import ItemModel
 
 
-class ItemSchema(SQLAlchemySchema):
+class ItemSchema(BaseSchema):
     class Meta:
         model = ItemModel
         load_instance = True  # Deserialize to SQLAlchemy objects
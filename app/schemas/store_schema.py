@@ -1,11 +1,19 @@
-from marshmallow_sqlalchemy import SQLAlchemySchema, auto_field
+from marshmallow import fields
+from marshmallow_sqlalchemy import auto_field
+from app.schemas.base import BaseSchema
 from app.models import StoreModel
+from app.schemas.items_schema import ItemSchema
 
 
-class StoreSchema(SQLAlchemySchema):
+class StoreSchema(BaseSchema):
     class Meta:
         model = StoreModel
         load_instance = True  # Deserialize to SQLAlchemy objects
 
     id = auto_field()
     name = auto_field()
+
+
+class StoreWithItemsSchema(StoreSchema):
+    # Load StoreModel.items with selectinload before dumping to avoid N+1 queries
+    items = fields.Nested(ItemSchema, many=True, dump_only=True)
@@ -0,0 +1,15 @@
+from marshmallow import fields
+from marshmallow_sqlalchemy import auto_field
+from app.schemas.base import BaseSchema
+from app.models import StoreStatsModel
+
+
+class StoreStatsSchema(BaseSchema):
+    class Meta:
+        model = StoreStatsModel
+
+    store_id = auto_field()
+    item_count = auto_field()
+    min_price = auto_field()
+    max_price = auto_field()
+    avg_price = fields.Float(dump_only=True)
@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when no hashing slot frees up in time; the request should be retried."""
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small, bounded thread pool.
+
+    At most ``workers`` hashes run at once per process (the KDFs release the
+    GIL, so this maps to cores), and at most ``max_pending`` may be queued.
+    Callers that cannot get a slot within ``wait_timeout`` seconds get
+    PasswordHasherBusy instead of piling up behind a login storm.
+    """
+
+    def __init__(self, workers, max_pending, wait_timeout):
+        self.workers = workers
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pwhash')
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise PasswordHasherBusy("Too many concurrent password checks")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+_hasher = None
+_hasher_pid = None
+_hasher_lock = threading.Lock()
+
+
+def _get_hasher():
+    """Per-process hasher, created lazily so Gunicorn workers don't inherit dead threads."""
+    global _hasher, _hasher_pid
+    with _hasher_lock:
+        if _hasher is None or _hasher_pid != os.getpid():
+            config = current_app.config
+            _hasher = PasswordHasher(
+                config['PASSWORD_HASH_WORKERS'],
+                config['PASSWORD_HASH_MAX_PENDING'],
+                config['PASSWORD_HASH_WAIT_TIMEOUT'],
+            )
+            _hasher_pid = os.getpid()
+        return _hasher
+
+
+_canonical_methods = {}
+
+
+def _canonical_method(method):
+    """The method prefix Werkzeug stores for ``method``, e.g. 'scrypt' -> 'scrypt:32768:8:1'."""
+    if method not in _canonical_methods:
+        _canonical_methods[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _canonical_methods[method]
+
+
+def _check_legacy_hash(pwhash, password):
+    """Verify pre-Werkzeug-2.3 'sha256$salt$hexdigest' (salted HMAC) hashes."""
+    method, salt, digest = pwhash.split('$', 2)
+    expected = hmac.new(salt.encode(), password.encode(), method).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+def _verify(pwhash, password):
+    if pwhash.split('$', 1)[0] in hashlib.algorithms_guaranteed:
+        return _check_legacy_hash(pwhash, password)
+    return check_password_hash(pwhash, password)
+
+
+def hash_password(password):
+    """Hash ``password`` with the configured PASSWORD_HASH_METHOD on the hashing pool."""
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    return _get_hasher().run(generate_password_hash, password, method)
+
+
+def verify_password(pwhash, password):
+    """
+    Check ``password`` against ``pwhash`` on the hashing pool.
+    Pass ``pwhash=None`` for unknown users: a dummy hash is still checked so
+    response times do not reveal which emails exist.
+    """
+    if pwhash is None:
+        pwhash = _dummy_hash()
+        _get_hasher().run(_verify, pwhash, password)
+        return False
+    return _get_hasher().run(_verify, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """Whether ``pwhash`` was made with a different method or cost than configured."""
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    return pwhash.split('$', 1)[0] != _canonical_method(method)
+
+
+_dummy_hashes = {}
+
+
+def _dummy_hash():
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    if method not in _dummy_hashes:
+        _dummy_hashes[method] = generate_password_hash(os.urandom(16).hex(), method=method)
+    return _dummy_hashes[method]
@@ -0,0 +1,42 @@
+from sqlalchemy import ARRAY, Integer, any_, bindparam
+
+from app.services.item_filters import InvalidQueryArgument
+
+
+def parse_ids(value, maximum):
+    """
+    Ids of a batch lookup, from ``?ids=1,2,3`` (a string) or a JSON list.
+    Returns them deduplicated in request order.
+    """
+    if isinstance(value, str):
+        try:
+            ids = [int(part) for part in value.split(',') if part.strip()]
+        except ValueError:
+            raise InvalidQueryArgument("ids must be a comma-separated list of integers") from None
+    elif isinstance(value, list) and all(isinstance(v, int) and not isinstance(v, bool) for v in value):
+        ids = value
+    else:
+        raise InvalidQueryArgument("ids must be a list of integers")
+
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise InvalidQueryArgument("At least one id is required")
+    if len(ids) > maximum:
+        raise InvalidQueryArgument(f"At most {maximum} ids per lookup")
+    return ids
+
+
+def id_filter(column, ids, dialect):
+    """
+    ``column IN (...)``; on PostgreSQL ``column = ANY(:ids)`` instead, a
+    single array parameter, so every batch size shares one statement.
+    """
+    if dialect == 'postgresql':
+        return column == any_(bindparam('lookup_ids', ids, type_=ARRAY(Integer)))
+    return column.in_(ids)
+
+
+def in_request_order(rows, ids):
+    """``(rows ordered like ids, ids no row matched)``. Rows expose ``id``."""
+    by_id = {row.id: row for row in rows}
+    return [by_id[i] for i in ids if i in by_id], [i for i in ids if i not in by_id]
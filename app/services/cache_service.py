@@ -0,0 +1,27 @@
+from app import response_cache
+
+# Cache namespaces used by the read endpoints:
+#   "stores"       store collection (all variants, including ?expand=items)
+#   "store:<id>"   a single store, with or without nested items
+#   "items"        item collection
+#   "item:<id>"    a single item
+#   "items:all"    every single-item response; bumped when a store delete
+#                  cascades to items whose ids we never loaded
+
+
+def invalidate_stores(store_ids, deleted=False):
+    """Invalidate cached responses after a store was created, updated or deleted."""
+    namespaces = ['stores'] + [f'store:{store_id}' for store_id in store_ids]
+    if deleted:
+        namespaces += ['items', 'items:all']
+    response_cache.invalidate(*namespaces)
+
+
+def invalidate_items(item_ids, store_ids):
+    """Invalidate cached responses after items changed, including their parent stores."""
+    response_cache.invalidate(
+        'items',
+        *(f'item:{item_id}' for item_id in item_ids),
+        'stores',
+        *(f'store:{store_id}' for store_id in store_ids),
+    )
@@ -0,0 +1,264 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, func, insert, literal, select
+
+from app import db
+from app.models import ChangeModel, ItemModel, utcnow
+from app.utils.db_routing import RoutingSession
+from app.utils.pagination import cursor_values, encode_cursor, finish_page, keyset_query
+
+logger = logging.getLogger(__name__)
+
+changes_table = ChangeModel.__table__
+# Read order. On PostgreSQL ids are drawn before commit, so a later id can
+# become visible first; ordering by writing transaction, and only reading
+# transactions older than every one still running, means a row never
+# appears behind a position a reader has already passed.
+KEYS = [ChangeModel.xid, ChangeModel.id]
+COLUMNS = (ChangeModel.xid, ChangeModel.id, ChangeModel.entity, ChangeModel.entity_id,
+           ChangeModel.op, ChangeModel.created_at)
+
+# Session.info key set when the current transaction wrote to the change log
+_WRITTEN = 'change_log_written'
+
+
+def _current_xid():
+    """The writing transaction's id on PostgreSQL, else 0 (SQLite commits in id order)."""
+    return func.txid_current() if db.engine.dialect.name == 'postgresql' else literal(0)
+
+
+def record_changes(changes):
+    """
+    Append ``(entity, op, entity_id)`` tuples ("item"/"store",
+    "create"/"update"/"delete") to the change log inside the current
+    transaction, with one executemany INSERT.
+    """
+    now = utcnow()
+    rows = [
+        {'entity': entity, 'op': op, 'entity_id': entity_id, 'created_at': now}
+        for entity, op, entity_id in changes
+    ]
+    if not rows:
+        return
+    db.session.execute(insert(changes_table).values(xid=_current_xid()), rows)
+    db.session.info[_WRITTEN] = True
+
+
+def record_cascaded_item_deletes(store_id):
+    """
+    Log a delete for every item ``store_id`` still has, with one
+    INSERT ... SELECT. Call right before the store is deleted, since the
+    database cascade removes those items without the application seeing them.
+    """
+    db.session.execute(insert(changes_table).from_select(
+        ['xid', 'entity', 'op', 'entity_id', 'created_at'],
+        select(_current_xid(), literal('item'), literal('delete'), ItemModel.id, literal(utcnow(), db.DateTime))
+        .where(ItemModel.store_id == store_id)
+        .order_by(ItemModel.id),
+    ))
+    db.session.info[_WRITTEN] = True
+
+
+def parse_position(cursor):
+    """``(xid, id)`` of a change cursor, or None for the start of the log."""
+    if not cursor:
+        return None
+    return tuple(cursor_values(cursor, KEYS))
+
+
+def changes_statement(dialect, limit, position=None):
+    """SELECT of up to ``limit + 1`` changes after ``position``; pair with ``finish_page``."""
+    statement = select(*COLUMNS)
+    if dialect == 'postgresql':
+        statement = statement.where(
+            ChangeModel.xid < func.txid_snapshot_xmin(func.txid_current_snapshot())
+        )
+    cursor = encode_cursor(list(position)) if position else None
+    return keyset_query(statement, KEYS, limit, cursor)
+
+
+def fetch_changes(limit, position=None):
+    """``(rows, more)``: up to ``limit`` changes after ``position``, oldest first."""
+    statement = changes_statement(db.engine.dialect.name, limit, position)
+    rows, next_cursor = finish_page(db.session.execute(statement).all(), KEYS, limit)
+    return rows, next_cursor is not None
+
+
+def change_position(row):
+    return (row.xid, row.id)
+
+
+def change_dict(row):
+    return {
+        "entity": row.entity,
+        "id": row.entity_id,
+        "op": row.op,
+        "at": row.created_at.isoformat(),
+    }
+
+
+def change_events(rows):
+    """``(position, frame)`` per row: one Server-Sent Event, with the row's cursor as its id."""
+    return [
+        (change_position(row),
+         f"id: {encode_cursor(list(change_position(row)))}\nevent: change\n"
+         f"data: {json.dumps(change_dict(row), separators=(',', ':'))}\n\n")
+        for row in rows
+    ]
+
+
+def prune_changes(older_than_days):
+    """Delete change rows older than ``older_than_days``. Returns the number removed."""
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    return db.session.execute(delete(ChangeModel).where(ChangeModel.created_at < cutoff)).rowcount
+
+
+class Subscription:
+    """
+    A stream client's queue of change batches, filled by the feed thread.
+    ``notify`` is called after every push and must not block (set an
+    Event, or schedule one on an event loop). A client that lets
+    ``max_batches`` pile up is dropped: ``dropped`` is set and it
+    receives nothing more.
+    """
+
+    def __init__(self, max_batches, notify):
+        self.max_batches = max_batches
+        self.notify = notify
+        self.dropped = False
+        self._batches = deque()
+        self._lock = threading.Lock()
+
+    def push(self, events):
+        with self._lock:
+            if len(self._batches) >= self.max_batches:
+                self.dropped = True
+            else:
+                self._batches.append(events)
+        self.notify()
+        return not self.dropped
+
+    def drain(self):
+        """Every queued event, oldest first."""
+        with self._lock:
+            batches, self._batches = self._batches, deque()
+        return [item for batch in batches for item in batch]
+
+
+class ChangeFeed:
+    """
+    In-process fan-out of the change log to stream subscribers.
+
+    While anyone is subscribed, one thread per worker reads new changes
+    (every CHANGES_POLL_INTERVAL, or right after a local commit that wrote
+    some), formats each as an event once, and queues the batch to every
+    subscriber. The database sees one poll per interval however many
+    clients are connected.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._pid = None
+        self._ready = None
+        self._wake = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['change_feed'] = self
+
+    def subscribe(self, notify, timeout=10):
+        """
+        Register a subscriber and return its Subscription once the feed
+        knows the head of the log, so changes past anything the caller
+        reads from the database afterwards are queued to it. Returns None
+        if the feed cannot reach the database within ``timeout`` seconds.
+        """
+        subscription = Subscription(self.app.config['CHANGES_STREAM_QUEUE'], notify)
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._ready = threading.Event()
+                self._pid = os.getpid()
+                self._subscribers = set()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._ready,), name='change-feed', daemon=True
+                )
+                self._thread.start()
+            self._subscribers.add(subscription)
+            ready = self._ready
+        if not ready.wait(timeout):
+            self.unsubscribe(subscription)
+            return None
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def notify(self):
+        """Poll now rather than at the next interval, e.g. after a local commit."""
+        self._wake.set()
+
+    def _run(self, ready):
+        config = self.app.config
+        batch_size = config['PAGE_SIZE_MAX']
+        position = None
+        with self.app.app_context():
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                    subscribers = list(self._subscribers)
+
+                self._wake.clear()
+                rows = []
+                try:
+                    if ready.is_set():
+                        rows, _ = fetch_changes(batch_size, position)
+                    else:
+                        position = self._head()
+                        ready.set()
+                except Exception:
+                    logger.exception("Change feed poll failed")
+                finally:
+                    db.session.remove()
+
+                if rows:
+                    position = change_position(rows[-1])
+                    events = change_events(rows)
+                    for subscription in subscribers:
+                        if not subscription.push(events):
+                            self.unsubscribe(subscription)
+                if len(rows) < batch_size:
+                    self._wake.wait(config['CHANGES_POLL_INTERVAL'])
+
+    def _head(self):
+        """Position of the newest visible change, or None if the log is empty."""
+        statement = changes_statement(db.engine.dialect.name, 1)
+        statement = statement.order_by(None).order_by(*(key.desc() for key in KEYS))
+        row = db.session.execute(statement).first()
+        return change_position(row) if row is not None else None
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _wake_change_feed(session):
+    if session.info.pop(_WRITTEN, False) and has_app_context():
+        feed = current_app.extensions.get('change_feed')
+        if feed is not None:
+            feed.notify()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_written_flag(session):
+    session.info.pop(_WRITTEN, None)
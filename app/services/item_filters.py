@@ -0,0 +1,86 @@
+import math
+
+from app.models import ItemModel
+
+
+class InvalidQueryArgument(ValueError):
+    """Raised when a filter or sort argument is not accepted."""
+
+
+# Whitelisted sort keys and the column each one orders by (ties broken by id).
+# Every entry is backed by an index on (column, id) / (store_id, column, id).
+ITEM_SORTS = {
+    'id': None,
+    'price': ItemModel.price,
+    'name': ItemModel.name,
+}
+
+SEARCH_MAX_LENGTH = 80
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def number_arg(args, name, cast):
+    """Query argument ``name`` converted with ``cast``; None when absent, InvalidQueryArgument when malformed."""
+    raw = args.get(name)
+    if raw is None or raw == '':
+        return None
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise InvalidQueryArgument(f"Invalid {name}: {raw}") from None
+    # float() also parses "nan" and "inf", which no price compares sensibly to
+    if not math.isfinite(value):
+        raise InvalidQueryArgument(f"Invalid {name}: {raw}")
+    return value
+
+
+def _search_term(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    if len(value) > SEARCH_MAX_LENGTH:
+        raise InvalidQueryArgument(f"{name} must be at most {SEARCH_MAX_LENGTH} characters")
+    return value
+
+
+def parse_item_query(args):
+    """
+    Build the filter and sort plan for GET /items from the query string.
+
+    Supported arguments: ``store_id``, ``min_price``, ``max_price``,
+    ``name_prefix`` (case-sensitive prefix), ``q`` (case-insensitive
+    substring) and ``sort`` (``id``, ``price`` or ``name``, prefixed with
+    ``-`` for descending). Returns ``(filters, sort_column, descending)``.
+    """
+    filters = []
+
+    store_id = number_arg(args, 'store_id', int)
+    if store_id is not None:
+        filters.append(ItemModel.store_id == store_id)
+
+    min_price = number_arg(args, 'min_price', float)
+    if min_price is not None:
+        filters.append(ItemModel.price >= min_price)
+    max_price = number_arg(args, 'max_price', float)
+    if max_price is not None:
+        filters.append(ItemModel.price <= max_price)
+
+    prefix = _search_term(args, 'name_prefix')
+    if prefix is not None:
+        filters.append(ItemModel.name.like(_escape_like(prefix) + '%', escape='\\'))
+
+    term = _search_term(args, 'q')
+    if term is not None:
+        filters.append(ItemModel.name.ilike('%' + _escape_like(term) + '%', escape='\\'))
+
+    sort = args.get('sort', 'id')
+    descending = sort.startswith('-')
+    key = sort.lstrip('-')
+    if key not in ITEM_SORTS:
+        raise InvalidQueryArgument(
+            f"Invalid sort: {sort}. Use one of {', '.join(ITEM_SORTS)}, optionally prefixed with '-'"
+        )
+    return filters, ITEM_SORTS[key], descending
@@ -0,0 +1,162 @@
+from sqlalchemy import delete, insert, select, update
+from app import db
+from app.models import ItemModel, StoreModel
+from app.services.cache_service import invalidate_items
+from app.services.change_log import record_changes
+from app.services.price_buffer import supersede_buffered_prices
+from app.services.store_stats import record_item_changes
+from app.utils.lazy import LazyObject
+
+BULK_OPERATIONS = ('create', 'update', 'delete')
+UPDATABLE_FIELDS = ('name', 'price')
+
+# Validation only: rows are written with batched statements, not ORM instances
+_create_schema = LazyObject(
+    'app.schemas.items_schema:ItemSchema', load_instance=False, transient=True
+)
+_update_schema = LazyObject(
+    'app.schemas.items_schema:ItemSchema', load_instance=False, transient=True, partial=True
+)
+
+
+def _validate(operation):
+    """Validate one bulk operation. Returns (op, payload, errors)."""
+    if not isinstance(operation, dict):
+        return None, None, {"_schema": ["Operation must be an object."]}
+
+    op = operation.get('op')
+    if op not in BULK_OPERATIONS:
+        return op, None, {"op": [f"Must be one of {', '.join(BULK_OPERATIONS)}."]}
+
+    if op == 'create':
+        data = {k: v for k, v in operation.items() if k != 'op'}
+        errors = _create_schema.validate(data)
+        if 'id' in data:
+            errors.setdefault('id', []).append("Cannot be set on create.")
+        return op, data, errors
+
+    item_id = operation.get('id')
+    if not isinstance(item_id, int) or isinstance(item_id, bool):
+        return op, None, {"id": ["Missing or invalid id."]}
+
+    if op == 'delete':
+        return op, {'id': item_id}, {}
+
+    data = {k: operation[k] for k in UPDATABLE_FIELDS if k in operation}
+    errors = _update_schema.validate(data)
+    if not data:
+        errors.setdefault('_schema', []).append("Nothing to update.")
+    data['id'] = item_id
+    return op, data, errors
+
+
+def apply_bulk_operations(operations, atomic=False):
+    """
+    Validate and apply a batch of item operations in a single transaction.
+
+    Creates are written with one executemany INSERT, updates with one
+    executemany UPDATE per set of changed columns, and deletes with a
+    single ``DELETE ... WHERE id IN (...)``. Returns ``(results, ok)``
+    where ``results`` holds one entry per operation, in request order.
+    When ``atomic`` is set, nothing is written if any operation fails.
+    """
+    results = []
+    valid = []
+    seen_ids = set()
+
+    for index, operation in enumerate(operations):
+        op, payload, errors = _validate(operation)
+        result = {"index": index, "op": op}
+        if not errors and op != 'create':
+            if payload['id'] in seen_ids:
+                errors = {"id": ["Duplicate id in batch."]}
+            seen_ids.add(payload['id'])
+        if errors:
+            result.update(status="error", errors=errors)
+        else:
+            valid.append((result, op, payload))
+        results.append(result)
+
+    # Resolve referenced stores and existing items with one query each
+    store_ids = {p['store_id'] for _, op, p in valid if op == 'create'}
+    known_stores = set(db.session.scalars(
+        select(StoreModel.id).where(StoreModel.id.in_(store_ids))
+    )) if store_ids else set()
+    known_items = {
+        row.id: row for row in db.session.execute(
+            select(ItemModel.id, ItemModel.store_id, ItemModel.price)
+            .where(ItemModel.id.in_(seen_ids))
+        )
+    } if seen_ids else {}
+
+    creates, updates, deletes = [], {}, []
+    for result, op, payload in valid:
+        if op == 'create' and payload['store_id'] not in known_stores:
+            result.update(status="error", errors={"store_id": ["Store not found."]})
+        elif op != 'create' and payload['id'] not in known_items:
+            result.update(status="error", errors={"id": ["Item not found."]})
+        elif op == 'create':
+            creates.append((result, payload))
+        elif op == 'update':
+            updates.setdefault(tuple(sorted(payload)), []).append((result, payload))
+        else:
+            deletes.append((result, payload))
+
+    ok = all(result.get('status') != 'error' for result in results)
+    if atomic and not ok:
+        for result in results:
+            result.setdefault('status', 'skipped')
+        return results, ok
+
+    supersede_buffered_prices(
+        [payload['id'] for _, payload in deletes]
+        + [payload['id'] for batch in updates.values() for _, payload in batch if 'price' in payload]
+    )
+    try:
+        if creates:
+            new_ids = db.session.scalars(
+                insert(ItemModel).returning(ItemModel.id, sort_by_parameter_order=True),
+                [payload for _, payload in creates]
+            ).all()
+            for (result, _), item_id in zip(creates, new_ids):
+                result.update(status="created", id=item_id)
+
+        for batch in updates.values():
+            db.session.execute(update(ItemModel), [payload for _, payload in batch])
+            for result, payload in batch:
+                result.update(status="updated", id=payload['id'])
+
+        if deletes:
+            db.session.execute(
+                delete(ItemModel).where(
+                    ItemModel.id.in_([payload['id'] for _, payload in deletes])
+                ),
+                execution_options={"synchronize_session": False}
+            )
+            for result, payload in deletes:
+                result.update(status="deleted", id=payload['id'])
+
+        record_item_changes(
+            [(payload['store_id'], None, payload['price']) for _, payload in creates]
+            + [(known_items[payload['id']].store_id, known_items[payload['id']].price, payload['price'])
+               for batch in updates.values() for _, payload in batch if 'price' in payload]
+            + [(known_items[payload['id']].store_id, known_items[payload['id']].price, None)
+               for _, payload in deletes]
+        )
+        record_changes(
+            [('item', 'create', result['id']) for result, _ in creates]
+            + [('item', 'update', payload['id']) for batch in updates.values() for _, payload in batch]
+            + [('item', 'delete', payload['id']) for _, payload in deletes]
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    written = [payload for _, payload in creates + deletes]
+    written += [payload for batch in updates.values() for _, payload in batch]
+    invalidate_items(
+        [result['id'] for result in results if 'id' in result],
+        {payload.get('store_id') or known_items[payload['id']].store_id for payload in written},
+    )
+    return results, ok
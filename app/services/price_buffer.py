@@ -0,0 +1,222 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import select, update
+
+from app import db
+from app.models import ItemModel
+from app.services.batch_lookup import id_filter
+from app.services.cache_service import invalidate_items
+from app.services.change_log import record_changes
+from app.services.store_stats import record_item_changes
+from app.utils.instrumentation import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class PriceWriteBuffer:
+    """
+    Coalescing buffer for item price updates (PRICE_WRITE_BUFFER).
+
+    ``put`` records the latest price per item id in memory; a writer
+    thread per worker flushes them as one transaction (one locking SELECT,
+    one executemany UPDATE, store summaries, change log, cache
+    invalidation) once PRICE_BUFFER_MAX_ITEMS items are pending or the
+    oldest pending write is PRICE_BUFFER_MAX_DELAY seconds old. A price
+    replaced before its flush is never written.
+
+    Accepted writes are not durable until flushed: a worker killed in
+    between loses them (a graceful shutdown flushes first). A failed
+    flush is retried with whatever arrived meanwhile.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._cond = threading.Condition()
+        # item id -> (price, monotonic time of the first write since the last flush);
+        # insertion order is oldest first
+        self._pending = {}
+        self._inflight = set()
+        # In-flight ids superseded meanwhile; not re-buffered if the flush fails
+        self._superseded = set()
+        self._closed = False
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        self.max_items = config['PRICE_BUFFER_MAX_ITEMS']
+        self.max_delay = config['PRICE_BUFFER_MAX_DELAY']
+        self.max_pending = config['PRICE_BUFFER_MAX_PENDING']
+        buckets = [float(b) for b in config['METRICS_BUCKETS'].split(',')]
+        self.writes = Counter(
+            'price_buffer_writes_total',
+            "Price updates offered to the write buffer: buffered, coalesced (replaced a pending "
+            "price, which is never written) or overflow (buffer full, written synchronously).",
+            ('outcome',))
+        self.flushed = Counter(
+            'price_buffer_flushed_items_total',
+            "Buffered prices at flush: written, unchanged (already current) or missing (item deleted).",
+            ('outcome',))
+        self.flushes = Counter(
+            'price_buffer_flushes_total', "Buffer flushes by trigger and result.", ('trigger', 'result'))
+        self.flush_delay = Histogram(
+            'price_buffer_flush_delay_seconds',
+            "Age of the oldest write in each flush when it committed.", (), buckets)
+        self.flush_time = Histogram(
+            'price_buffer_flush_seconds', "Duration of each flush transaction.", (), buckets)
+        metrics = app.extensions.get('request_metrics')
+        if metrics is not None:
+            metrics.register(self.writes, self.flushed, self.flushes, self.flush_delay, self.flush_time)
+        app.extensions['price_buffer'] = self
+
+    def pending(self, item_id):
+        with self._cond:
+            return item_id in self._pending
+
+    def put(self, item_id, price):
+        """
+        Buffer ``price`` for ``item_id``, replacing any pending one. Returns
+        False, buffering nothing, when PRICE_BUFFER_MAX_PENDING items are
+        already waiting (e.g. the database is down); write synchronously then.
+        """
+        with self._cond:
+            self._ensure_thread()
+            if self._closed:
+                return False
+            entry = self._pending.get(item_id)
+            if entry is None and len(self._pending) >= self.max_pending:
+                self.writes.inc('overflow')
+                return False
+            self._pending[item_id] = (price, entry[1] if entry else time.monotonic())
+            self.writes.inc('coalesced' if entry else 'buffered')
+            # The first pending write starts the flush timer; a full batch flushes now
+            if len(self._pending) == 1 or len(self._pending) >= self.max_items:
+                self._cond.notify_all()
+        return True
+
+    def supersede(self, item_ids):
+        """
+        Drop buffered prices of ``item_ids`` and wait out a flush already
+        writing them, before a synchronous write to those items, so an
+        older buffered price never lands on top of it.
+        """
+        with self._cond:
+            for item_id in item_ids:
+                self._pending.pop(item_id, None)
+            self._superseded.update(self._inflight.intersection(item_ids))
+            while self._inflight.intersection(item_ids):
+                self._cond.wait()
+
+    def close(self, timeout=None):
+        """Flush what is pending and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None:
+            thread.join(timeout)
+
+    def _ensure_thread(self):
+        # Called with the lock held; per process, so forked workers start their own
+        if self._thread is None or self._pid != os.getpid():
+            self._pending = {}
+            self._inflight = set()
+            self._closed = False
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='price-buffer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close, self.max_delay + 10)
+
+    def _next_batch(self):
+        """Wait for a flush trigger; returns ``(trigger, batch)``, or None once closed and empty."""
+        with self._cond:
+            while True:
+                if self._pending:
+                    age = time.monotonic() - next(iter(self._pending.values()))[1]
+                    if self._closed:
+                        trigger = 'shutdown'
+                    elif len(self._pending) >= self.max_items:
+                        trigger = 'size'
+                    elif age >= self.max_delay:
+                        trigger = 'time'
+                    else:
+                        self._cond.wait(self.max_delay - age)
+                        continue
+                    ids = list(self._pending)[:self.max_items]
+                    batch = {item_id: self._pending.pop(item_id) for item_id in ids}
+                    self._inflight = set(batch)
+                    return trigger, batch
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _run(self):
+        with self.app.app_context():
+            while (next_batch := self._next_batch()) is not None:
+                trigger, batch = next_batch
+                start = time.perf_counter()
+                try:
+                    self._write(batch)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Price buffer flush of %d items failed", len(batch))
+                    self.flushes.inc(trigger, 'failed')
+                    with self._cond:
+                        # Prices buffered or written synchronously meanwhile are newer and win
+                        retry = {
+                            i: e for i, e in batch.items()
+                            if i not in self._pending and i not in self._superseded
+                        }
+                        self._pending = {**retry, **self._pending}
+                        self._inflight, self._superseded = set(), set()
+                        self._cond.notify_all()
+                        self._cond.wait(self.max_delay)
+                    continue
+                finally:
+                    db.session.remove()
+                now = time.monotonic()
+                self.flushes.inc(trigger, 'ok')
+                self.flush_time.observe(time.perf_counter() - start)
+                self.flush_delay.observe(now - min(first for _, first in batch.values()))
+                with self._cond:
+                    self._inflight, self._superseded = set(), set()
+                    self._cond.notify_all()
+
+    def _write(self, batch):
+        """Apply ``{item_id: (price, _)}`` in one transaction, skipping unchanged and deleted items."""
+        ids = sorted(batch)
+        # Locked in id order, so flushes of different workers cannot deadlock each other
+        rows = db.session.execute(
+            select(ItemModel.id, ItemModel.store_id, ItemModel.price)
+            .where(id_filter(ItemModel.id, ids, db.engine.dialect.name))
+            .order_by(ItemModel.id)
+            .with_for_update()
+        ).all()
+        changed = [row for row in rows if row.price != batch[row.id][0]]
+        if changed:
+            db.session.execute(update(ItemModel), [
+                {'id': row.id, 'price': batch[row.id][0]} for row in changed
+            ])
+            record_item_changes([(row.store_id, row.price, batch[row.id][0]) for row in changed])
+            record_changes([('item', 'update', row.id) for row in changed])
+        db.session.commit()
+        if changed:
+            invalidate_items([row.id for row in changed], {row.store_id for row in changed})
+        self.flushed.inc('written', amount=len(changed))
+        self.flushed.inc('unchanged', amount=len(rows) - len(changed))
+        self.flushed.inc('missing', amount=len(ids) - len(rows))
+
+
+def supersede_buffered_prices(item_ids):
+    """``PriceWriteBuffer.supersede`` when the buffer is enabled; call before synchronous item writes."""
+    buffer = current_app.extensions.get('price_buffer') if has_app_context() else None
+    if buffer is not None:
+        buffer.supersede(item_ids)
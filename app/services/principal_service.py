@@ -0,0 +1,66 @@
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+from app import db
+from app.models import User
+from app.utils.cache import MemoryBackend
+from app.utils.db_routing import RoutingSession, primary_reads
+
+# Session.info key collecting users changed in the current transaction
+_CHANGED_USERS = 'changed_user_ids'
+
+
+def init_principal_cache(app):
+    """Per-process TTL/LRU cache of user principals, keyed by user id."""
+    app.extensions['principal_cache'] = MemoryBackend(
+        max_entries=app.config['PRINCIPAL_CACHE_MAX_ENTRIES'],
+        default_ttl=app.config['PRINCIPAL_CACHE_TTL'],
+    )
+
+
+def get_principal(user_id):
+    """
+    Public fields of a user (id, username, email, created_at), or None if the
+    user no longer exists. Served from the principal cache when possible;
+    misses read the primary so a lagging replica is never cached.
+    """
+    cache = current_app.extensions['principal_cache']
+    principal = cache.get(str(user_id))
+    if principal is None:
+        with primary_reads():
+            row = db.session.execute(
+                select(User.id, User.username, User.email, User.created_at).where(User.id == user_id)
+            ).first()
+        if row is None:
+            return None
+        principal = row._asdict()
+        cache.set(str(user_id), principal)
+    return principal
+
+
+def forget_principal(user_id):
+    if has_app_context():
+        current_app.extensions['principal_cache'].delete(str(user_id))
+
+
+# Changed users are evicted at flush and again after commit, so a principal
+# re-read from the pre-commit row in between does not survive the commit.
+# Core UPDATE/DELETE statements on users bypass these events.
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    object_session(target).info.setdefault(_CHANGED_USERS, set()).add(target.id)
+    forget_principal(target.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _evict_committed_users(session):
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        forget_principal(user_id)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop(_CHANGED_USERS, None)
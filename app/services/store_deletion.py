@@ -0,0 +1,129 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from app import db
+from app.models import ItemModel, StoreDeletionModel, StoreModel, utcnow
+from app.services.cache_service import invalidate_stores
+from app.services.change_log import record_cascaded_item_deletes, record_changes
+from app.services.store_stats import record_item_changes
+
+ACTIVE_STATUSES = ('pending', 'running')
+# A deletion that has not committed a batch for this long is assumed dead
+# (e.g. its worker was recycled) and is started again on the next request
+STALE_AFTER = timedelta(minutes=5)
+
+
+def delete_store(store_id):
+    """
+    Delete a store with a single statement; the database cascades to its
+    items and summary row, so no item is loaded. Deletes of the cascaded
+    items and the store go to the change log. Returns False if there is
+    no such store. The caller commits.
+    """
+    record_cascaded_item_deletes(store_id)
+    result = db.session.execute(
+        delete(StoreModel).where(StoreModel.id == store_id),
+        execution_options={"synchronize_session": False},
+    )
+    if not result.rowcount:
+        return False
+    record_changes([('store', 'delete', store_id)])
+    return True
+
+
+def delete_store_items(store_id, batch_size):
+    """
+    Delete up to ``batch_size`` items of a store, updating its summary and
+    the change log. Returns the number deleted. The caller commits.
+    """
+    batch = select(ItemModel.id).where(ItemModel.store_id == store_id).limit(batch_size)
+    deleted = db.session.execute(
+        delete(ItemModel).where(ItemModel.id.in_(batch.scalar_subquery()))
+        .returning(ItemModel.id, ItemModel.price),
+        execution_options={"synchronize_session": False},
+    ).all()
+    record_item_changes([(store_id, row.price, None) for row in deleted])
+    record_changes([('item', 'delete', row.id) for row in sorted(deleted)])
+    return len(deleted)
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Per-process pool, created lazily so Gunicorn workers don't inherit dead threads."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config['STORE_DELETE_WORKERS'], thread_name_prefix='store-delete'
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def start_background_deletion(store_id):
+    """
+    Queue a batched deletion of ``store_id`` and return its
+    StoreDeletionModel, or None if there is no such store. A deletion
+    already in progress for the store is returned instead of a new one.
+    """
+    if db.session.get(StoreModel, store_id) is None:
+        return None
+    active = db.session.scalar(
+        select(StoreDeletionModel)
+        .where(StoreDeletionModel.store_id == store_id, StoreDeletionModel.status.in_(ACTIVE_STATUSES))
+        .order_by(StoreDeletionModel.id.desc())
+        .limit(1)
+    )
+    if active is not None and active.updated_at > utcnow() - STALE_AFTER:
+        return active
+    if active is not None:
+        active.status = 'failed'
+        active.error = "Abandoned; restarted as a new deletion"
+
+    deletion = StoreDeletionModel(store_id=store_id)
+    db.session.add(deletion)
+    db.session.commit()
+    _get_executor().submit(
+        _run_deletion, current_app._get_current_object(), deletion.id,
+        current_app.config['STORE_DELETE_BATCH_SIZE'],
+    )
+    return deletion
+
+
+def _run_deletion(app, deletion_id, batch_size):
+    """Delete the store's items in committed batches, then the store itself."""
+    with app.app_context():
+        try:
+            deletion = db.session.get(StoreDeletionModel, deletion_id)
+            store_id = deletion.store_id
+            deletion.status = 'running'
+            db.session.commit()
+            # Short transactions: locks are held per batch, and progress survives a crash
+            while deleted := delete_store_items(store_id, batch_size):
+                deletion.items_deleted += deleted
+                db.session.commit()
+                invalidate_stores([store_id], deleted=True)
+            delete_store(store_id)
+            deletion.status = 'done'
+            db.session.commit()
+            invalidate_stores([store_id], deleted=True)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception("Background deletion %s failed", deletion_id)
+            db.session.execute(
+                StoreDeletionModel.__table__.update()
+                .where(StoreDeletionModel.id == deletion_id)
+                .values(status='failed', error=str(e), updated_at=utcnow())
+            )
+            db.session.commit()
+        finally:
+            db.session.remove()
@@ -0,0 +1,118 @@
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from app import db
+from app.models import ItemModel, StoreModel, StoreStatsModel
+
+stats_table = StoreStatsModel.__table__
+items_table = ItemModel.__table__
+
+
+def _price_bound(aggregate):
+    """Min/max price of the bound store; one probe of the (store_id, price, id) index."""
+    return select(aggregate(items_table.c.price)).where(
+        items_table.c.store_id == bindparam('b_store_id')
+    ).scalar_subquery()
+
+
+# Count and sum move by deltas. Min/max are either set from the locked row
+# and the new prices, or, when a write removes the current extreme,
+# re-read from the index.
+_apply_deltas = (
+    update(stats_table)
+    .where(stats_table.c.store_id == bindparam('b_store_id'))
+    .values(
+        item_count=stats_table.c.item_count + bindparam('b_count'),
+        price_sum=stats_table.c.price_sum + bindparam('b_sum'),
+        min_price=bindparam('b_min'),
+        max_price=bindparam('b_max'),
+    )
+)
+_apply_deltas_recomputing_bounds = _apply_deltas.values(
+    min_price=_price_bound(func.min),
+    max_price=_price_bound(func.max),
+)
+
+
+def create_store_stats(store_id):
+    """Add the empty summary row for a new store."""
+    db.session.execute(insert(stats_table).values(store_id=store_id, item_count=0, price_sum=0))
+
+
+def record_item_changes(changes):
+    """
+    Apply item writes to the store summaries inside the current transaction.
+
+    ``changes`` holds ``(store_id, old_price, new_price)`` tuples: old price
+    None for a created item, new price None for a deleted one. The affected
+    summary rows are locked first, in store order, so concurrent writers to
+    a store take turns and each sees the extremes the previous one
+    committed. Min/max are recomputed from items only for stores losing
+    their current extreme; pending ORM changes are flushed first. Stores
+    are updated with one executemany UPDATE per kind.
+    """
+    # store id -> (prices removed, prices added)
+    deltas = {}
+    for store_id, old_price, new_price in changes:
+        removed, added = deltas.setdefault(store_id, ([], []))
+        if old_price is not None:
+            removed.append(float(old_price))
+        if new_price is not None:
+            added.append(float(new_price))
+    if not deltas:
+        return
+
+    db.session.flush()
+    current = db.session.execute(
+        select(stats_table.c.store_id, stats_table.c.min_price, stats_table.c.max_price)
+        .where(stats_table.c.store_id.in_(deltas))
+        .order_by(stats_table.c.store_id)
+        .with_for_update()
+    ).all()
+    moved, recomputed = [], []
+    for row in current:
+        removed, added = deltas[row.store_id]
+        params = {
+            'b_store_id': row.store_id,
+            'b_count': len(added) - len(removed),
+            'b_sum': sum(added) - sum(removed),
+        }
+        if removed and (row.min_price is None or min(removed) <= row.min_price
+                        or max(removed) >= row.max_price):
+            recomputed.append(params)
+            continue
+        bounds = added + [price for price in (row.min_price, row.max_price) if price is not None]
+        params.update(b_min=min(bounds, default=None), b_max=max(bounds, default=None))
+        moved.append(params)
+
+    if moved:
+        db.session.execute(_apply_deltas, moved)
+    if recomputed:
+        # Runs after the lock, so on Postgres it sees every item write committed before it
+        db.session.execute(_apply_deltas_recomputing_bounds, recomputed)
+
+
+def refresh_store_stats(store_ids=None):
+    """Rebuild summaries from the items table, for all stores or only ``store_ids``."""
+    stores = select(StoreModel.id)
+    if store_ids is not None:
+        stores = stores.where(StoreModel.id.in_(store_ids))
+    stores = stores.subquery()
+
+    rebuilt = (
+        select(
+            stores.c.id,
+            func.count(items_table.c.id),
+            func.coalesce(func.sum(items_table.c.price), 0),
+            func.min(items_table.c.price),
+            func.max(items_table.c.price),
+        )
+        .select_from(stores.outerjoin(items_table, items_table.c.store_id == stores.c.id))
+        .group_by(stores.c.id)
+    )
+    existing = delete(stats_table)
+    if store_ids is not None:
+        existing = existing.where(stats_table.c.store_id.in_(store_ids))
+
+    db.session.execute(existing)
+    db.session.execute(insert(stats_table).from_select(
+        ['store_id', 'item_count', 'price_sum', 'min_price', 'max_price'], rebuilt
+    ))
@@ -0,0 +1,224 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+
+from app.utils.db_routing import primary_reads
+from app.utils.serialization import current_representation
+
+
+class NullBackend:
+    """Backend that stores nothing; used when caching is disabled."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def add(self, key, value, ttl=None):
+        return True
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend:
+    """
+    In-process LRU cache with per-entry TTL.
+    Thread-safe, bounded to ``max_entries``; the least recently used entry is
+    evicted first. Each process (e.g. each Gunicorn worker) has its own copy.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Set ``key`` only if it holds no live entry. Returns whether it was set."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def _store(self, key, value, ttl):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """Shared backend for multi-worker deployments. Requires the ``redis`` package."""
+
+    def __init__(self, url, prefix='cache:', default_ttl=None):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for the redis cache backend") from e
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def add(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        return bool(self._client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None, nx=True))
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + '*'):
+            self._client.delete(key)
+
+
+def create_backend(kind, max_entries=1024, default_ttl=None, redis_url=None, prefix='cache:'):
+    """Build a cache backend from its configured name: ``memory``, ``redis`` or ``null``."""
+    if kind == 'memory':
+        return MemoryBackend(max_entries=max_entries, default_ttl=default_ttl)
+    if kind == 'redis':
+        return RedisBackend(redis_url, prefix=prefix, default_ttl=default_ttl)
+    if kind in ('null', 'none', '', None):
+        return NullBackend()
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+class ResponseCache:
+    """
+    Cache for GET responses, keyed by route plus query args and the
+    negotiated representation (see ``serialization.negotiate``).
+
+    Every cached view declares the namespaces its response depends on
+    (e.g. ``"items"`` or ``"item:{item_id}"``, formatted with the view
+    arguments). Each namespace has a generation token that is part of the
+    cache key; ``invalidate`` replaces the token so all entries built on the
+    old one become unreachable and age out through LRU/TTL. This works the
+    same way on the in-process and the shared backend.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.ttl = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        self.backend = create_backend(
+            app.config['RESPONSE_CACHE_BACKEND'],
+            max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+            default_ttl=self.ttl,
+            redis_url=app.config['CACHE_REDIS_URL'],
+            prefix='response:',
+        )
+        app.extensions['response_cache'] = self
+
+    @property
+    def enabled(self):
+        return not isinstance(self.backend, NullBackend)
+
+    def _generation(self, namespace):
+        key = 'gen:' + namespace
+        token = self.backend.get(key)
+        if token is None:
+            token = uuid.uuid4().hex[:12]
+            # Generations must outlive the entries that embed them
+            self.backend.set(key, token, ttl=0)
+        return token
+
+    def invalidate(self, *namespaces):
+        """Make every cached response depending on ``namespaces`` stale."""
+        if not self.enabled:
+            return
+        for namespace in namespaces:
+            self.backend.set('gen:' + namespace, uuid.uuid4().hex[:12], ttl=0)
+
+    def _make_key(self, namespaces):
+        generations = ','.join(
+            f"{namespace}={self._generation(namespace)}" for namespace in namespaces
+        )
+        query = '&'.join(
+            f"{k}={v}" for k, v in sorted(request.args.items(multi=True))
+        )
+        return f"{request.path}?{query}|{current_representation().tag}|{generations}"
+
+    def cached(self, *namespaces):
+        """Cache successful responses of a GET view under ``namespaces``."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                # Generations are read before the view queries the database,
+                # so a concurrent write can only orphan an entry, never hide itself.
+                key = self._make_key([ns.format(**kwargs) for ns in namespaces])
+                entry = self.backend.get(key)
+                if entry is not None:
+                    body, status, headers = entry
+                    response = current_app.response_class(body, status=status, headers=headers)
+                    # Cached responses carry their ETag; revalidate without the view
+                    return response.make_conditional(request)
+
+                # Filled from the primary: a lagging replica could otherwise store a
+                # row older than the write whose invalidation already ran, and serve
+                # it to that writer once their read-your-writes window is over.
+                with primary_reads():
+                    response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    headers = [
+                        (k, v) for k, v in response.headers.items()
+                        if k.lower() not in ('set-cookie', 'content-length')
+                    ]
+                    self.backend.set(key, (response.get_data(), 200, headers), ttl=self.ttl)
+                return response
+            return wrapper
+        return decorator
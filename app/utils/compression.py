@@ -0,0 +1,87 @@
+import gzip
+
+from flask import request
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = (
+    'application/json', 'application/msgpack', 'application/x-ndjson', 'text/plain', 'text/html',
+)
+# Responses that may differ by Accept (see serialization.negotiate)
+NEGOTIATED_MIMETYPES = ('application/json', 'application/msgpack')
+
+
+class Compression:
+    """
+    gzip/brotli compression of responses of at least COMPRESSION_MIN_SIZE
+    bytes, in the first of COMPRESSION_ALGORITHMS the client accepts.
+
+    Compressed responses get a weak ETag (the strong one names the
+    uncompressed bytes; If-None-Match compares weakly). JSON and MessagePack
+    responses carry ``Vary: Accept, Accept-Encoding`` so shared caches keep
+    each representation apart. Streamed responses are left alone.
+    """
+
+    def __init__(self, app=None):
+        self.algorithms = ()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.algorithms = tuple(
+            name for name in (part.strip() for part in config['COMPRESSION_ALGORITHMS'].split(','))
+            if name == 'gzip' or (name == 'br' and brotli is not None)
+        )
+        self.min_size = config['COMPRESSION_MIN_SIZE']
+        self.gzip_level = config['COMPRESSION_GZIP_LEVEL']
+        self.brotli_quality = config['COMPRESSION_BROTLI_QUALITY']
+        app.after_request(self._after_request)
+        app.extensions['compression'] = self
+
+    def choose(self, accept_encoding):
+        """The content coding to use for a client sending ``accept_encoding``, or None."""
+        if not accept_encoding or not self.algorithms:
+            return None
+        accepted = parse_accept_header(accept_encoding, Accept)
+        for name in self.algorithms:
+            if accepted[name] > 0:
+                return name
+        return None
+
+    def compressible(self, mimetype, size):
+        return size >= self.min_size and mimetype in COMPRESSIBLE_MIMETYPES
+
+    def compress(self, body, coding):
+        if coding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _after_request(self, response):
+        if response.status_code == 304 or response.mimetype in NEGOTIATED_MIMETYPES:
+            response.vary.add('Accept')
+        if response.status_code == 304 or response.mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add('Accept-Encoding')
+
+        if (response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.cache_control):
+            return response
+        coding = self.choose(request.headers.get('Accept-Encoding'))
+        if coding is None:
+            return response
+        body = response.get_data()
+        if not self.compressible(response.mimetype, len(body)):
+            return response
+
+        response.set_data(self.compress(body, coding))
+        response.headers['Content-Encoding'] = coding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,100 @@
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+# Cookie and header carrying the end of a client's read-your-writes window
+PRIMARY_UNTIL_COOKIE = 'db_primary_until'
+PRIMARY_UNTIL_HEADER = 'X-Read-Primary-Until'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to the read replica while the current
+    request allows it (see ``replica_reads``). Flushes, DML and
+    ``SELECT ... FOR UPDATE`` always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _can_use_replica(clause):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _can_use_replica(clause):
+    return (
+        has_request_context()
+        and g.get('db_replica_reads', False)
+        and getattr(clause, 'is_select', False)
+        and getattr(clause, '_for_update_arg', None) is None
+    )
+
+
+@contextmanager
+def replica_reads():
+    """Route SELECTs inside the block to the replica (outside read-your-writes windows)."""
+    previous = g.get('db_replica_reads', False)
+    g.db_replica_reads = not _in_primary_window()
+    try:
+        yield
+    finally:
+        g.db_replica_reads = previous
+
+
+@contextmanager
+def primary_reads():
+    """Route SELECTs inside the block to the primary, e.g. when filling a cache."""
+    previous = g.get('db_replica_reads', False)
+    g.db_replica_reads = False
+    try:
+        yield
+    finally:
+        g.db_replica_reads = previous
+
+
+def _in_primary_window():
+    """Whether the client wrote recently enough that it must read from the primary."""
+    return primary_window_open(request.cookies.get(PRIMARY_UNTIL_COOKIE),
+                               request.headers.get(PRIMARY_UNTIL_HEADER))
+
+
+def primary_window_open(*values):
+    """Whether any of the given primary-until timestamps is still in the future."""
+    for value in values:
+        try:
+            if value and float(value) > time.time():
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def init_db_routing(app):
+    """Route safe-method requests to the replica and pin recent writers to the primary."""
+
+    @app.before_request
+    def select_database():
+        if not app.config.get('SQLALCHEMY_BINDS', {}).get(REPLICA_BIND):
+            return
+        g.db_replica_reads = request.method in SAFE_METHODS and not _in_primary_window()
+
+    @app.after_request
+    def mark_writer(response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        if not app.config.get('SQLALCHEMY_BINDS', {}).get(REPLICA_BIND):
+            return response
+        until = f"{time.time() + current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']:.3f}"
+        response.set_cookie(
+            PRIMARY_UNTIL_COOKIE, until,
+            max_age=current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS'],
+            httponly=True, samesite='Lax',
+        )
+        response.headers[PRIMARY_UNTIL_HEADER] = until
+        return response
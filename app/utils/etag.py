@@ -0,0 +1,56 @@
+import hashlib
+
+from flask import current_app, make_response, request
+
+from app.utils.serialization import current_representation
+
+
+def entity_etag(kind, entity_id, version, *extra):
+    """Strong ETag for a single row, e.g. ``item-5-v3``."""
+    return '-'.join([kind, str(entity_id), f'v{version}', *map(str, extra)])
+
+
+def rows_fingerprint(rows):
+    """
+    Cheap summary of a set of rows exposing ``id`` and ``version``.
+    (count, max id, sum of versions) changes on any insert, update or
+    delete within the set, because ids only grow and versions only increase.
+    """
+    count = max_id = total = 0
+    for row in rows:
+        count += 1
+        max_id = max(max_id, row.id)
+        total += row.version
+    return count, max_id, total
+
+
+def collection_etag(kind, *parts):
+    """Strong ETag for a collection response built from fingerprints and cursors."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'{kind}-{digest}'
+
+
+def represented_etag(etag, representation):
+    """``etag`` of the given representation; each encoding/layout has its own strong ETag."""
+    return f'{etag}.{representation.tag}' if representation.tag else etag
+
+
+def not_modified(etag):
+    """
+    Return a 304 response if the request's If-None-Match matches ``etag``
+    (in the negotiated representation), else None. Weak comparison, so the
+    weak ETag of a compressed response matches too.
+    """
+    etag = represented_etag(etag, current_representation())
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def with_etag(rv, etag):
+    """Build a response from a view return value and attach ``etag`` (in the negotiated representation)."""
+    response = make_response(rv)
+    response.set_etag(represented_etag(etag, current_representation()))
+    return response
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+from app.utils.cache import NullBackend, create_backend
+from app.utils.serialization import JSON, current_representation, encode_body
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+class _KeyLocks:
+    """One lock per key in flight, dropped when no thread holds or waits on it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    @contextmanager
+    def hold(self, key, timeout):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        acquired = entry[0].acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+def _principal():
+    """Who is calling: the JWT identity if a valid token came along, else the client address."""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        identity = None
+    return f"user:{identity}" if identity is not None else f"ip:{request.remote_addr}"
+
+
+class Idempotency:
+    """
+    ``Idempotency-Key`` support for mutating views.
+
+    Keys are scoped to the caller (JWT identity, else client address),
+    method and path. The first request with a given key runs the view and
+    its response is stored for ``IDEMPOTENCY_TTL`` seconds, as plain JSON;
+    retries with the same key and body get it back, in the representation
+    their own Accept header negotiates, without touching the database,
+    marked with ``Idempotent-Replayed: true``. Reusing a key with a
+    different body is rejected with 422. While the first request is still
+    running, duplicates wait for it (a per-key lock within the process, a
+    pending marker in the backend across processes) and replay its
+    response, or get 409 after ``IDEMPOTENCY_WAIT_TIMEOUT`` seconds.
+    Responses with a 5xx status are not stored, so those can be retried.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.ttl = None
+        self.lease = None
+        self.wait_timeout = None
+        self._locks = _KeyLocks()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['IDEMPOTENCY_TTL']
+        # A pending marker outlives any request the server lets run
+        self.lease = app.config['WEB_TIMEOUT']
+        self.wait_timeout = app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+        self.backend = create_backend(
+            app.config['IDEMPOTENCY_BACKEND'],
+            max_entries=app.config['IDEMPOTENCY_MAX_ENTRIES'],
+            default_ttl=self.ttl,
+            redis_url=app.config['CACHE_REDIS_URL'],
+            prefix='idempotency:',
+        )
+        app.extensions['idempotency'] = self
+
+    @property
+    def enabled(self):
+        return not isinstance(self.backend, NullBackend)
+
+    def _claim(self, key, fingerprint, deadline):
+        """
+        Mark ``key`` as in progress. Returns None once claimed, otherwise the
+        entry already stored under it (finished, or still pending at the deadline).
+        """
+        pending = (fingerprint, None, None, None)
+        while True:
+            if self.backend.add(key, pending, ttl=self.lease):
+                return None
+            entry = self.backend.get(key)
+            if entry is None:
+                continue  # expired in between
+            if entry[1] is not None or entry[0] != fingerprint or time.monotonic() >= deadline:
+                return entry
+            time.sleep(POLL_INTERVAL)
+
+    def _replay(self, entry, fingerprint):
+        stored_fingerprint, status, body, headers = entry
+        if stored_fingerprint != fingerprint:
+            return jsonify({"error": f"{IDEMPOTENCY_HEADER} was already used with a different request"}), 422
+        if status is None:
+            return self._in_progress()
+        response = _represent(current_app.response_class(body, status=status, headers=headers))
+        response.headers[REPLAYED_HEADER] = 'true'
+        return response
+
+    def _in_progress(self):
+        response = jsonify({"error": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"})
+        response.status_code = 409
+        response.headers['Retry-After'] = '1'
+        return response
+
+    def idempotent(self, view):
+        """Honour ``Idempotency-Key`` on a mutating view."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None or not self.enabled:
+                return view(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return jsonify({"error": f"{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}), 400
+
+            key = f"{_principal()}:{request.method}:{request.path}:{key}"
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            deadline = time.monotonic() + self.wait_timeout
+            with self._locks.hold(key, self.wait_timeout) as acquired:
+                if not acquired:
+                    return self._in_progress()
+                entry = self._claim(key, fingerprint, deadline)
+                if entry is not None:
+                    return self._replay(entry, fingerprint)
+                # Stored responses are plain JSON, re-encoded for each replay's Accept
+                representation, g.representation = current_representation(), JSON
+                try:
+                    response = current_app.make_response(view(*args, **kwargs))
+                except BaseException:
+                    self.backend.delete(key)
+                    raise
+                finally:
+                    g.representation = representation
+                if response.status_code < 500 and not response.direct_passthrough:
+                    headers = [
+                        (k, v) for k, v in response.headers.items()
+                        if k.lower() not in ('set-cookie', 'content-length')
+                    ]
+                    self.backend.set(key, (fingerprint, response.status_code, response.get_data(), headers))
+                else:
+                    self.backend.delete(key)
+                return _represent(response)
+        return wrapper
+
+
+def _represent(response):
+    """A stored-form (plain JSON) response, re-encoded in the current request's representation."""
+    representation = current_representation()
+    if representation != JSON and response.mimetype == 'application/json' and not response.direct_passthrough:
+        response.set_data(encode_body(current_app, json.loads(response.get_data()), representation))
+        response.content_type = representation.content_type
+    return response
@@ -0,0 +1,239 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+logger = logging.getLogger('app.perf')
+
+# Request metrics accumulated in ``g``: seconds per timer, plus the query count
+_METRICS = '_request_metrics'
+STATEMENT_LOG_LIMIT = 1000
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels. Thread-safe."""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for label_values, (counts, total) in series:
+            labels = ','.join(
+                f'{name}="{_escape_label(value)}"' for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                bucket_labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            lines.append(f"{_series(self.name + '_sum', labels)} {total}")
+            lines.append(f"{_series(self.name + '_count', labels)} {cumulative}")
+        return '\n'.join(lines)
+
+
+class Counter:
+    """Prometheus-style counter with labels. Thread-safe."""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, count in series:
+            labels = ','.join(
+                f'{name}="{_escape_label(value)}"' for name, value in zip(self.labels, label_values)
+            )
+            lines.append(f"{_series(self.name, labels)} {count}")
+        return '\n'.join(lines)
+
+
+def _series(name, labels):
+    return f"{name}{{{labels}}}" if labels else name
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in the block to the current request's ``name`` timer.
+    Nested blocks for the same timer (e.g. a nested schema) are counted once.
+    """
+    metrics = g.get(_METRICS) if has_request_context() else None
+    if metrics is None or metrics['depth'].get(name):
+        yield
+        return
+    metrics['depth'][name] = 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics[name] = metrics.get(name, 0.0) + time.perf_counter() - start
+        metrics['depth'][name] = 0
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with encoding counted as serialization time."""
+
+    def dumps(self, obj, **kwargs):
+        with timed('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+class RequestMetrics:
+    """
+    Per-request performance instrumentation.
+
+    Records wall time, database time and query count (from engine events) and
+    serialization time (``timed('serialize')``) for every request, then:
+    adds a ``Server-Timing`` header, logs requests and queries over the
+    SLOW_REQUEST_MS / SLOW_QUERY_MS thresholds as JSON on the ``app.perf``
+    logger, and feeds latency histograms rendered by ``render_prometheus``,
+    along with any metrics other components ``register``. Histograms are
+    per process (per Gunicorn worker).
+    """
+
+    def __init__(self, app=None):
+        self.histograms = ()
+        self.registered = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        buckets = [float(b) for b in app.config['METRICS_BUCKETS'].split(',')]
+        self.duration = Histogram(
+            'http_request_duration_seconds', "Request wall time.",
+            ('endpoint', 'method', 'status'), buckets)
+        self.db_time = Histogram(
+            'http_request_db_seconds', "Time spent executing SQL per request.",
+            ('endpoint', 'method'), buckets)
+        self.serialize_time = Histogram(
+            'http_request_serialize_seconds', "Time spent serializing responses per request.",
+            ('endpoint', 'method'), buckets)
+        self.queries = Histogram(
+            'http_request_db_queries', "SQL statements executed per request.",
+            ('endpoint', 'method'), (0, 1, 2, 5, 10, 25, 50, 100))
+        self.histograms = (self.duration, self.db_time, self.serialize_time, self.queries)
+        # Components register against the app being built, not one built before it
+        self.registered = []
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions['request_metrics'] = self
+
+    def watch_engine(self, engine):
+        """Count and time every statement executed on ``engine``."""
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+    def _start(self):
+        g.setdefault(_METRICS, {'start': time.perf_counter(), 'db': 0.0, 'queries': 0, 'depth': {}})
+
+    def _finish(self, response):
+        metrics = g.pop(_METRICS, None)
+        if metrics is None:
+            return response
+        wall = time.perf_counter() - metrics['start']
+        db_time = metrics['db']
+        serialize = metrics.get('serialize', 0.0)
+        endpoint = request.endpoint or 'unmatched'
+
+        self.duration.observe(wall, endpoint, request.method, str(response.status_code))
+        self.db_time.observe(db_time, endpoint, request.method)
+        self.serialize_time.observe(serialize, endpoint, request.method)
+        self.queries.observe(metrics['queries'], endpoint, request.method)
+
+        config = current_app.config
+        if config['SERVER_TIMING_HEADER']:
+            response.headers.add('Server-Timing', (
+                f"app;dur={wall * 1000:.1f}, "
+                f"db;dur={db_time * 1000:.1f};desc=\"{metrics['queries']} queries\", "
+                f"serialize;dur={serialize * 1000:.1f}"
+            ))
+        if wall * 1000 >= config['SLOW_REQUEST_MS']:
+            logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": endpoint,
+                "status": response.status_code,
+                "duration_ms": round(wall * 1000, 1),
+                "db_ms": round(db_time * 1000, 1),
+                "queries": metrics['queries'],
+                "serialize_ms": round(serialize * 1000, 1),
+            }))
+        return response
+
+    def register(self, *metrics):
+        """Render ``metrics`` (Histograms or Counters) along with the request metrics."""
+        self.registered.extend(metrics)
+
+    def render_prometheus(self):
+        metrics = (*self.histograms, *self.registered)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if not has_request_context():
+        return
+    metrics = g.get(_METRICS)
+    if metrics is not None:
+        metrics['db'] += elapsed
+        metrics['queries'] += 1
+    if elapsed * 1000 >= current_app.config['SLOW_QUERY_MS']:
+        # Parameters are never logged; they may hold credentials or personal data
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "endpoint": request.endpoint,
+            "duration_ms": round(elapsed * 1000, 1),
+            "executemany": executemany,
+            "statement": ' '.join(statement.split())[:STATEMENT_LOG_LIMIT],
+        }))
+
+
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
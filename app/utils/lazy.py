@@ -0,0 +1,48 @@
+import threading
+
+from werkzeug.utils import import_string
+
+_registry = []
+
+
+class LazyObject:
+    """
+    Stand-in for ``factory(*args, **kwargs)`` that is only built on first
+    attribute access. ``factory`` may be a callable or an import path
+    (``'package.module:Name'``), so module-level schemas and plans cost
+    nothing to import until a request uses them.
+    """
+
+    def __init__(self, factory, *args, **kwargs):
+        self._factory = factory
+        self._args = args
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._target = None
+        _registry.append(self)
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                if self._target is None:
+                    factory = self._factory
+                    if isinstance(factory, str):
+                        factory = import_string(factory)
+                    self._target = factory(*self._args, **self._kwargs)
+                target = self._target
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self):
+        if self._target is None:
+            return f"<LazyObject {self._factory!r} (not built)>"
+        return repr(self._target)
+
+
+def resolve_all():
+    """Build every LazyObject created so far (eager startup)."""
+    for lazy in list(_registry):
+        lazy._resolve()
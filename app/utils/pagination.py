@@ -0,0 +1,105 @@
+import base64
+import json
+
+from flask import current_app, request
+from sqlalchemy import literal, tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(values):
+    """Encode the keyset values of the last row into an opaque cursor."""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def get_page_size(maximum=None):
+    """Read ``limit`` from the query string, clamped to the server-side max."""
+    return page_size(request.args, current_app.config, maximum)
+
+
+def page_size(args, config, maximum=None):
+    """``get_page_size`` for explicit query args and config (e.g. outside Flask)."""
+    default = config['PAGE_SIZE_DEFAULT']
+    if maximum is None:
+        maximum = config['PAGE_SIZE_MAX']
+    limit = args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
+
+
+def cursor_values(cursor, keys):
+    """Decode a cursor and ensure its values line up with the keyset columns."""
+    values = decode_cursor(cursor)
+    if len(values) != len(keys):
+        raise InvalidCursor("Invalid cursor")
+    for value, key in zip(values, keys):
+        python_type = key.type.python_type
+        if python_type is float:
+            python_type = (int, float)
+        if isinstance(value, bool) or not isinstance(value, python_type):
+            raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def paginate(query, model, limit=None, cursor=None, sort=None, descending=False, key=None):
+    """
+    Keyset-paginate ``query`` on ``model.id`` (or ``key`` for tables keyed
+    differently), or on ``(sort, id)`` when a sort column is given (ties
+    are broken by id).
+
+    Returns ``(rows, next_cursor)``. Each page is a single
+    ``WHERE (sort, id) > (:last_sort, :last_id) ORDER BY sort, id LIMIT :n``
+    query, so deep pages cost the same as the first one as long as an
+    index on ``(sort, id)`` exists. Rows must expose the keyset columns as
+    attributes.
+    """
+    if limit is None:
+        limit = get_page_size()
+    if cursor is None:
+        cursor = request.args.get('cursor')
+
+    if key is None:
+        key = model.id
+    keys = [key] if sort is None else [sort, key]
+    rows = keyset_query(query, keys, limit, cursor, descending).all()
+    return finish_page(rows, keys, limit)
+
+
+def keyset_query(query, keys, limit, cursor=None, descending=False):
+    """
+    Apply the keyset position, order and ``limit + 1`` to a Query or a
+    ``select()``. Pair with ``finish_page`` on the fetched rows.
+    """
+    if cursor:
+        values = cursor_values(cursor, keys)
+        if len(keys) == 1:
+            position, last = keys[0], values[0]
+        else:
+            position, last = tuple_(*keys), tuple_(*(literal(v) for v in values))
+        query = query.filter(position < last if descending else position > last)
+
+    order = [column.desc() if descending else column.asc() for column in keys]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def finish_page(rows, keys, limit):
+    """Trim the look-ahead row and build the next cursor. Returns ``(rows, next_cursor)``."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in keys])
+    return rows, next_cursor
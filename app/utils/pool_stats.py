@@ -0,0 +1,155 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """
+    Counters for one engine's connection pool. Thread-safe. ``max_overflow``
+    is the value the engine was configured with (the pool does not expose
+    it); None when it was left to SQLAlchemy.
+    """
+
+    def __init__(self, max_overflow=None):
+        self.max_overflow = max_overflow
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checked_out = 0
+        self.checked_out_peak = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def _on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.checked_out_peak = max(self.checked_out_peak, self.checked_out)
+
+    def _on_checkin(self, *args):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def _on_close(self, *args):
+        with self._lock:
+            self.closes += 1
+
+    def _on_invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool):
+        """Current counters plus live pool state, as a JSON-friendly dict."""
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_avg_ms": round(
+                    1000 * self.checkout_wait_total / self.checkouts, 3
+                ) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": round(1000 * self.checkout_wait_max, 3),
+                "checked_out_peak": self.checked_out_peak,
+                "connects": self.connects,
+                "closes": self.closes,
+                "invalidations": self.invalidations,
+            }
+        data["pool"] = pool.__class__.__name__
+        if isinstance(pool, QueuePool):
+            # A negative max_overflow means no limit, so there is no capacity to saturate
+            bounded = self.max_overflow is not None and self.max_overflow >= 0
+            capacity = pool.size() + self.max_overflow if bounded else 0
+            data.update(
+                size=pool.size(),
+                max_overflow=self.max_overflow,
+                checked_out=pool.checkedout(),
+                overflow=max(0, pool.overflow()),
+                idle=pool.checkedin(),
+                saturation=round(pool.checkedout() / capacity, 3) if capacity > 0 else None,
+            )
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            if self.stats is not None:
+                self.stats.record_timeout()
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep reporting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def instrument_engine(engine, options=None):
+    """Attach a PoolStats to ``engine``'s pool and return it. ``options``: the engine's creation options."""
+    stats = PoolStats(max_overflow=(options or {}).get('max_overflow'))
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.stats = stats
+    event.listen(engine, 'checkout', stats._on_checkout)
+    event.listen(engine, 'checkin', stats._on_checkin)
+    event.listen(engine, 'connect', stats._on_connect)
+    event.listen(engine, 'close', stats._on_close)
+    event.listen(engine, 'invalidate', stats._on_invalidate)
+    return stats
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def enable_sqlite_foreign_keys(engine):
+    """SQLite only enforces foreign keys, and ON DELETE CASCADE, when each connection enables them."""
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _enable_foreign_keys)
+
+
+def engine_options(config, uri):
+    """SQLAlchemy engine/pool options for ``uri`` from the DB_POOL_* settings."""
+    options = {
+        "pool_pre_ping": config['DB_POOL_PRE_PING'],
+        "pool_recycle": config['DB_POOL_RECYCLE'],
+    }
+    # SQLite uses its own single-connection/static pools that take no sizing
+    if uri and make_url(uri).get_backend_name() != 'sqlite':
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+    return options
@@ -0,0 +1,190 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(rule):
+    """
+    Parse ``"<count>/<period>"`` (e.g. ``"5/minute"``) into ``(capacity, tokens_per_second)``.
+    The bucket holds ``count`` tokens and refills at ``count`` per period.
+    """
+    try:
+        count, period = rule.split('/')
+        count = int(count)
+        seconds = PERIODS[period.strip().rstrip('s')]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {rule!r}; expected e.g. '5/minute'") from None
+    return count, count / seconds
+
+
+class NullBuckets:
+    """Backend that never limits; used when rate limiting is disabled."""
+
+    def take(self, key, capacity, rate):
+        return True, 0
+
+
+class MemoryBuckets:
+    """
+    In-process token buckets, bounded to ``max_keys``.
+    The least recently used bucket is evicted first, which only ever
+    forgives a client. Each process (e.g. each Gunicorn worker) has its own.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# KEYS[1] bucket; ARGV: capacity, rate, now. Returns {allowed, tokens * 1000}.
+_TAKE_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, math.floor(tokens * 1000)}
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared by all workers. Requires the ``redis`` package."""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for the redis rate limit backend") from e
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+        self.prefix = prefix
+
+    def take(self, key, capacity, rate):
+        allowed, tokens = self._take(keys=[self.prefix + key], args=[capacity, rate, time.time()])
+        return bool(allowed), 0 if allowed else (1 - tokens / 1000) / rate
+
+
+def create_buckets(kind, max_keys=100000, redis_url=None):
+    """Build a bucket backend from its configured name: ``memory``, ``redis`` or ``null``."""
+    if kind == 'memory':
+        return MemoryBuckets(max_keys=max_keys)
+    if kind == 'redis':
+        return RedisBuckets(redis_url)
+    if kind in ('null', 'none', '', None):
+        return NullBuckets()
+    raise ValueError(f"Unknown rate limit backend: {kind}")
+
+
+def client_ip():
+    """Key requests by client address (configure ProxyFix when behind a proxy)."""
+    return request.remote_addr
+
+
+def json_field(name):
+    """Key requests by a JSON body field, e.g. the account email; skipped when absent."""
+    def key():
+        body = request.get_json(silent=True)
+        value = body.get(name) if isinstance(body, dict) else None
+        return value.strip().lower() if isinstance(value, str) and value.strip() else None
+    key.__name__ = f'json_{name}'
+    return key
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting for routes and blueprints.
+
+    A limit is a rule (``"5/minute"``, or the name of a config entry holding
+    one; an empty value disables it) and a key function (``client_ip``,
+    ``json_field('email')``, ...). Limits are checked before the view runs,
+    so rejected requests cost no hashing or database work and get a 429
+    with ``Retry-After``.
+    """
+
+    def __init__(self, app=None):
+        self.buckets = NullBuckets()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.buckets = create_buckets(
+            app.config['RATE_LIMIT_BACKEND'],
+            max_keys=app.config['RATE_LIMIT_MAX_KEYS'],
+            redis_url=app.config['CACHE_REDIS_URL'],
+        )
+        app.extensions['rate_limiter'] = self
+
+    def _check(self, rule, key_func, scope):
+        """Return a 429 response if the current request is over ``rule``, else None."""
+        rule = current_app.config.get(rule, rule)
+        if not rule:
+            return None
+        key = key_func()
+        if key is None:
+            return None
+        capacity, rate = parse_rate(rule)
+        try:
+            allowed, retry_after = self.buckets.take(f"{scope}:{key}", capacity, rate)
+        except Exception:
+            # A broken shared backend must not take logins down with it
+            logger.exception("Rate limit backend failed; allowing request")
+            return None
+        if allowed:
+            return None
+        response = jsonify({"error": "Too many requests"})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def limit(self, rule, key_func=client_ip, scope=None):
+        """Decorate a view with a limit; ``scope`` defaults to the view name."""
+        def decorator(view):
+            bucket_scope = scope or f"{view.__module__}.{view.__name__}:{key_func.__name__}"
+
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                limited = self._check(rule, key_func, bucket_scope)
+                if limited is not None:
+                    return limited
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def limit_blueprint(self, blueprint, rule, key_func=client_ip):
+        """Apply a limit to every route of ``blueprint``, sharing one bucket per key."""
+        scope = f"{blueprint.name}:{key_func.__name__}"
+        blueprint.before_request(lambda: self._check(rule, key_func, scope))
@@ -0,0 +1,199 @@
+import json
+from typing import NamedTuple
+
+from flask import current_app, g, has_request_context, request
+from werkzeug.http import parse_accept_header, parse_options_header
+from werkzeug.utils import import_string
+
+from app.utils.instrumentation import TimedJSONProvider, timed
+
+try:
+    import msgpack
+except ImportError:  # optional: MessagePack responses are only offered when installed
+    msgpack = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+def _converters():
+    """Python conversion applied by marshmallow when dumping each supported field type."""
+    from marshmallow import fields
+
+    return {
+        fields.Integer: int,
+        fields.Float: float,
+        fields.String: str,
+        fields.Boolean: bool,
+    }
+
+
+class SerializationPlan:
+    """
+    Precomputed dump plan for a flat marshmallow-sqlalchemy schema.
+
+    Instead of hydrating ORM instances and running ``Schema.dump``, callers
+    select ``plan.columns`` as plain tuples and turn them into dicts with
+    ``plan.dump``/``plan.dump_many``. ``plan.response`` encodes with the same
+    settings as Flask's JSON provider, so the bytes are identical to the
+    ``jsonify(schema.dump(...))`` path. Schemas with fields the plan does not
+    understand (e.g. nested fields) are reported as unsupported.
+    ``schema_cls`` may also be an import path to the schema class.
+    """
+
+    def __init__(self, schema_cls, model):
+        if isinstance(schema_cls, str):
+            schema_cls = import_string(schema_cls)
+        schema = schema_cls()
+        converters = _converters()
+        plan = []
+        self.supported = True
+        for name, field in schema.dump_fields.items():
+            converter = converters.get(type(field))
+            column = getattr(model, field.attribute or name, None)
+            if converter is None or column is None or getattr(field, 'as_string', False):
+                self.supported = False
+                break
+            plan.append((field.data_key or name, column, converter))
+        # Column order follows the output key order, so rows map straight to dicts
+        plan.sort(key=lambda entry: entry[0])
+        self.keys = tuple(key for key, _, _ in plan)
+        self.columns = tuple(column for _, column, _ in plan)
+        self._converters = tuple(converter for _, _, converter in plan)
+
+    def dump(self, row):
+        """Dump one selected row, whose first values follow ``plan.columns``."""
+        with timed('serialize'):
+            return self._dump(row)
+
+    def _dump(self, row):
+        return {
+            key: None if value is None else convert(value)
+            for key, convert, value in zip(self.keys, self._converters, row)
+        }
+
+    def dump_many(self, rows):
+        dump = self._dump
+        with timed('serialize'):
+            return [dump(row) for row in rows]
+
+    def response(self, obj, status=200):
+        """Encode ``obj`` exactly like ``jsonify(obj)`` would, in the negotiated representation."""
+        representation = current_representation()
+        body = encode_body(current_app, obj, representation)
+        return current_app.response_class(body, status=status, content_type=representation.content_type)
+
+
+def encode_json(app, obj):
+    """
+    The body ``jsonify(obj)`` would produce for ``app``, without needing an
+    app or request context. Uses a plain encoder in compact mode.
+    """
+    provider = app.json
+    compact = provider.compact
+    if compact is None:
+        compact = not app.debug
+    with timed('serialize'):
+        if not compact:
+            return provider.dumps(obj, indent=2) + '\n'
+        encoder = json.JSONEncoder(
+            ensure_ascii=provider.ensure_ascii,
+            sort_keys=provider.sort_keys,
+            separators=(',', ':'),
+            default=provider.default,
+        )
+        return encoder.encode(obj) + '\n'
+
+
+def fast_serialization_enabled(plan):
+    """Whether the fast path is configured and the plan covers the schema."""
+    return plan.supported and current_app.config['SERIALIZATION_MODE'] == 'fast'
+
+
+class Representation(NamedTuple):
+    """A response encoding (``json`` or ``msgpack``) and row layout (``rows`` or ``columnar``)."""
+    encoding: str
+    layout: str
+
+    @property
+    def content_type(self):
+        mimetype = 'application/msgpack' if self.encoding == 'msgpack' else 'application/json'
+        return mimetype if self.layout == 'rows' else f'{mimetype}; layout={self.layout}'
+
+    @property
+    def tag(self):
+        """ETag and cache key suffix; empty for plain JSON."""
+        return '-'.join(part for part in (
+            self.encoding if self.encoding != 'json' else '',
+            self.layout if self.layout != 'rows' else '',
+        ) if part)
+
+
+JSON = Representation('json', 'rows')
+
+
+def negotiate(accept):
+    """
+    The representation an ``Accept`` header asks for, falling back to
+    plain JSON: ``application/msgpack`` (when msgpack is installed) or
+    ``application/json``, either with ``;layout=columnar``.
+    """
+    if not accept:
+        return JSON
+    for value, quality in parse_accept_header(accept):
+        if quality <= 0:
+            continue
+        mimetype, options = parse_options_header(value)
+        if mimetype in MSGPACK_MIMETYPES and msgpack is not None:
+            encoding = 'msgpack'
+        elif mimetype in ('application/json', 'application/*', '*/*'):
+            encoding = 'json'
+        else:
+            continue
+        layout = 'columnar' if options.get('layout') == 'columnar' else 'rows'
+        return Representation(encoding, layout)
+    return JSON
+
+
+def current_representation():
+    """The representation negotiated for the current request (plain JSON outside one)."""
+    if not has_request_context():
+        return JSON
+    representation = g.get('representation')
+    if representation is None:
+        representation = g.representation = negotiate(request.headers.get('Accept'))
+    return representation
+
+
+def columnar(obj):
+    """
+    ``{"data": [{"id": 1, ...}, ...], ...}`` as ``{"data": {"id": [1, ...], ...}, ...}``:
+    each key once, values as arrays. Other payloads are returned unchanged.
+    """
+    data = obj.get('data') if isinstance(obj, dict) else None
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        return obj
+    keys = list(data[0]) if data else []
+    return {**obj, 'data': {key: [row.get(key) for row in data] for key in keys}}
+
+
+def encode_body(app, obj, representation=JSON):
+    """Body bytes (str for JSON) of ``obj`` in ``representation``; plain JSON matches ``jsonify``."""
+    if representation.layout == 'columnar':
+        obj = columnar(obj)
+    if representation.encoding == 'msgpack':
+        with timed('serialize'):
+            return msgpack.packb(obj, default=app.json.default)
+    return encode_json(app, obj)
+
+
+class NegotiatingJSONProvider(TimedJSONProvider):
+    """Flask's JSON provider, answering ``jsonify`` and dict returns in the negotiated representation."""
+
+    def response(self, *args, **kwargs):
+        representation = current_representation()
+        if representation == JSON:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            encode_body(self._app, obj, representation), content_type=representation.content_type
+        )
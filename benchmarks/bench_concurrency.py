@@ -0,0 +1,232 @@
+"""
+Compare concurrent-request capacity of one sync (Gunicorn) and one async
+(uvicorn, app/asgi.py) worker.
+
+Starts each server with a single worker against the same database and
+drives a read endpoint from an increasing number of keep-alive clients.
+Reports throughput, p50/p99 latency, errors, server threads and peak RSS
+per concurrency level as JSON. With ``--latency-ms`` (Postgres only) the
+servers reach the database through a local TCP proxy that delays every
+client-to-server packet, approximating a database on another host, which
+is where holding a thread per in-flight query hurts.
+
+Usage (from the repository root, against a migrated and seeded database,
+e.g. one prepared by ``python -m benchmarks.suite --database-url ...``):
+    python -m benchmarks.bench_concurrency --database-url postgresql+psycopg2://... \\
+        --latency-ms 5 --concurrency 1,16,64,256 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from sqlalchemy.engine import make_url
+
+from benchmarks.suite import HttpClient, percentile
+
+
+async def _pipe(reader, writer, delay):
+    try:
+        while data := await reader.read(65536):
+            if delay:
+                await asyncio.sleep(delay)
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def run_latency_proxy(listen_port, upstream, delay):
+    """Forward 127.0.0.1:``listen_port`` to ``upstream``, delaying requests by ``delay`` seconds."""
+    async def handle(client_reader, client_writer):
+        if upstream[0].startswith('/'):
+            server_reader, server_writer = await asyncio.open_unix_connection(upstream[0])
+        else:
+            server_reader, server_writer = await asyncio.open_connection(*upstream)
+        await asyncio.gather(
+            _pipe(client_reader, server_writer, delay),
+            _pipe(server_reader, client_writer, 0),
+        )
+
+    async def serve():
+        server = await asyncio.start_server(handle, '127.0.0.1', listen_port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def proxied_url(url, port):
+    """Point a Postgres URL at the proxy; returns (new url, upstream address)."""
+    url = make_url(url)
+    socket_dir = url.query.get('host')
+    if socket_dir:
+        upstream = (os.path.join(socket_dir, f'.s.PGSQL.{url.port or 5432}'),)
+    else:
+        upstream = (url.host or 'localhost', url.port or 5432)
+    proxied = url.set(host='127.0.0.1', port=port).difference_update_query(['host'])
+    return proxied.render_as_string(hide_password=False), upstream
+
+
+def process_tree(pid):
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def tree_status(pid):
+    """(threads, peak RSS in MB) summed over ``pid`` and its children (Linux)."""
+    threads = rss_kb = 0
+    for member in process_tree(pid):
+        try:
+            with open(f'/proc/{member}/status') as status:
+                for line in status:
+                    if line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+                    elif line.startswith('VmHWM:'):
+                        rss_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return threads, round(rss_kb / 1024, 1)
+
+
+def start_server(kind, port, env):
+    if kind == 'sync':
+        command = ['gunicorn', 'app.app:app', '-c', 'gunicorn.conf.py']
+        env = dict(env, WEB_BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY='1')
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'app.asgi:app', '--port', str(port),
+                   '--workers', '1', '--log-level', 'warning', '--no-access-log']
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1).read()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+def drive(url, path, clients, duration, timeout):
+    """Run ``clients`` keep-alive clients against ``path`` for ``duration`` seconds."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        http = HttpClient(url, timeout=timeout)
+        mine, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status, _ = http.request('GET', path)
+                ok = status == 200
+            except OSError:
+                ok = False
+            if ok:
+                mine.append(time.perf_counter() - start)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        "clients": clients,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) or 0, 2),
+        "p99_ms": round(percentile(latencies, 0.99) or 0, 2),
+        "errors": errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database-url', required=True)
+    parser.add_argument('--latency-ms', type=float, default=0, help="added per DB round trip (Postgres only)")
+    parser.add_argument('--path', default='/items?limit=20')
+    parser.add_argument('--concurrency', default='1,16,64,256')
+    parser.add_argument('--duration', type=float, default=10, help="seconds per concurrency level")
+    parser.add_argument('--timeout', type=float, default=30, help="client timeout in seconds")
+    parser.add_argument('--servers', default='sync,async')
+    parser.add_argument('--port', type=int, default=5091)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    proxy = None
+    if args.latency_ms:
+        if make_url(database_url).get_backend_name() != 'postgresql':
+            sys.exit("--latency-ms needs a PostgreSQL database")
+        database_url, upstream = proxied_url(database_url, args.port + 10)
+        proxy = multiprocessing.Process(
+            target=run_latency_proxy, args=(args.port + 10, upstream, args.latency_ms / 1000), daemon=True
+        )
+        proxy.start()
+        time.sleep(0.5)
+
+    env = dict(os.environ, DATABASE_URL=database_url, RATE_LIMIT_BACKEND='null',
+               RESPONSE_CACHE_BACKEND='null', SLOW_REQUEST_MS='100000', SLOW_QUERY_MS='100000')
+    results = {
+        "meta": {"path": args.path, "latency_ms": args.latency_ms, "duration_s": args.duration},
+        "servers": {},
+    }
+    try:
+        for offset, kind in enumerate(args.servers.split(',')):
+            port = args.port + offset
+            server = start_server(kind, port, env)
+            levels = []
+            try:
+                for clients in (int(c) for c in args.concurrency.split(',')):
+                    level = drive(f'http://127.0.0.1:{port}', args.path, clients, args.duration, args.timeout)
+                    level["server_threads"], level["server_peak_rss_mb"] = tree_status(server.pid)
+                    levels.append(level)
+                    print(f"{kind:5} {clients:>4} clients  {level['throughput_rps']:>9} req/s  "
+                          f"p50 {level['p50_ms']:>8} ms  p99 {level['p99_ms']:>8} ms  "
+                          f"errors {level['errors']:>4}  threads {level['server_threads']:>3}  "
+                          f"rss {level['server_peak_rss_mb']} MB", file=sys.stderr)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+            results["servers"][kind] = levels
+    finally:
+        if proxy is not None:
+            proxy.terminate()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Compare bytes on the wire and server CPU per response for each response encoding.
+
+Seeds an in-memory SQLite catalogue, then fetches one page of GET /items
+and GET /stores through the Flask test client for every combination of
+representation (JSON or MessagePack, row or columnar layout) and content
+coding (identity, gzip, brotli). Every body is decoded and checked to
+carry the same rows before timing. MessagePack and brotli rows are
+skipped when the packages are not installed (requirements-encodings.txt).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_encodings --items 20000 --page-size 500
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app, db  # noqa: E402
+from app.utils.compression import brotli  # noqa: E402
+from app.utils.serialization import msgpack  # noqa: E402
+from benchmarks.bench_serialization import seed  # noqa: E402
+
+REPRESENTATIONS = (
+    ('json', 'application/json'),
+    ('json-columnar', 'application/json; layout=columnar'),
+    ('msgpack', 'application/msgpack'),
+    ('msgpack-columnar', 'application/msgpack; layout=columnar'),
+)
+CODINGS = ('identity', 'gzip', 'br')
+
+
+def decode(response):
+    """The response's rows as a list of dicts, whatever its encoding."""
+    body = response.data
+    coding = response.headers.get('Content-Encoding')
+    if coding == 'gzip':
+        body = gzip.decompress(body)
+    elif coding == 'br':
+        body = brotli.decompress(body)
+    payload = msgpack.unpackb(body) if response.mimetype == 'application/msgpack' else json.loads(body)
+    data = payload['data']
+    if isinstance(data, dict):
+        data = [dict(zip(data, values)) for values in zip(*data.values())]
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--stores', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['PAGE_SIZE_MAX'] = args.page_size
+    with app.app_context():
+        db.create_all()
+        seed(args.stores, args.items)
+
+    client = app.test_client()
+    for url in ('/items', '/stores'):
+        url = f"{url}?limit={args.page_size}"
+        expected = None
+        print(f"{url}")
+        for name, accept in REPRESENTATIONS:
+            if name.startswith('msgpack') and msgpack is None:
+                continue
+            for coding in CODINGS:
+                if coding == 'br' and brotli is None:
+                    continue
+                headers = {'Accept': accept, 'Accept-Encoding': coding}
+                response = client.get(url, headers=headers)
+                rows = decode(response)
+                expected = rows if expected is None else expected
+                assert rows == expected, f"{url} {name} {coding}: rows differ"
+                assert response.headers.get('Content-Encoding', 'identity') == coding
+
+                best = None
+                for _ in range(args.rounds):
+                    start = time.process_time()
+                    client.get(url, headers=headers)
+                    elapsed = time.process_time() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                print(f"  {name:17} {coding:9} {len(response.data):>10,} bytes  {best * 1000:>8.2f} ms CPU")
+        print(f"  {len(expected)} rows, identical in every encoding")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Measure password verifications per second for a hashing method.
+
+Verifies a password repeatedly, first on a single thread (logins per
+second per core) and then through the app's bounded hashing pool with
+PASSWORD_HASH_WORKERS threads, so the pool size and method cost can be
+chosen against a login-rate target.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_password_hash [--method scrypt:32768:8:1] [--workers 4] [--seconds 3]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from app.config import Config
+from app.services import auth_service
+
+PASSWORD = 'correct horse battery staple'
+
+
+def rate(fn, seconds):
+    done, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        done += 1
+    return done / (time.perf_counter() - start)
+
+
+def pooled_rate(app, pwhash, workers, seconds):
+    """Drive verify_password from 4x ``workers`` request threads for ``seconds``."""
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        count = 0
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                auth_service.verify_password(pwhash, PASSWORD)
+                count += 1
+        return count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers * 4) as clients:
+        total = sum(clients.map(lambda _: client(), range(workers * 4)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--method', default=Config.PASSWORD_HASH_METHOD)
+    parser.add_argument('--workers', type=int, default=Config.PASSWORD_HASH_WORKERS)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        PASSWORD_HASH_METHOD=args.method,
+        PASSWORD_HASH_WORKERS=args.workers,
+        PASSWORD_HASH_MAX_PENDING=args.workers * 4,
+        PASSWORD_HASH_WAIT_TIMEOUT=60,
+    )
+    pwhash = generate_password_hash(PASSWORD, method=args.method)
+
+    single = rate(lambda: auth_service._verify(pwhash, PASSWORD), args.seconds)
+    pooled = pooled_rate(app, pwhash, args.workers, args.seconds)
+
+    print(f"method            {args.method}")
+    print(f"cpus              {os.cpu_count()}")
+    print(f"1 thread          {single:8.1f} logins/s  ({1000 / single:.1f} ms each)")
+    print(f"pool x{args.workers:<3}         {pooled:8.1f} logins/s  ({pooled / single:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
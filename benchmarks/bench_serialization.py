@@ -0,0 +1,80 @@
+"""
+Compare rows/second of the marshmallow and the fast serialization paths.
+
+Seeds an in-memory SQLite catalogue, then fetches pages of GET /items
+and GET /stores through the Flask test client with SERIALIZATION_MODE set
+to "schema" and to "fast". Responses of both modes are checked to be
+byte-identical before timing.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_serialization --items 50000 --page-size 500
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app, db  # noqa: E402
+from app.models import ItemModel, StoreModel  # noqa: E402
+
+
+def seed(stores, items):
+    db.session.execute(
+        StoreModel.__table__.insert(),
+        [{"name": f"store-{i}"} for i in range(stores)]
+    )
+    db.session.execute(
+        ItemModel.__table__.insert(),
+        [{"name": f"item-{i}-é", "price": i * 0.37, "store_id": i % stores + 1}
+         for i in range(items)]
+    )
+    db.session.commit()
+
+
+def walk(client, url, page_size):
+    """Fetch every page of ``url``; return (rows, bodies)."""
+    rows, bodies, cursor = 0, [], None
+    while True:
+        query = f"?limit={page_size}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url + query)
+        payload = response.get_json()
+        rows += len(payload['data'])
+        bodies.append(response.data)
+        cursor = payload['next']
+        if not cursor:
+            return rows, bodies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--stores', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['PAGE_SIZE_MAX'] = args.page_size
+    with app.app_context():
+        db.create_all()
+        seed(args.stores, args.items)
+
+    client = app.test_client()
+    for url in ('/items', '/stores'):
+        bodies = {}
+        for mode in ('schema', 'fast'):
+            app.config['SERIALIZATION_MODE'] = mode
+            best = None
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                rows, bodies[mode] = walk(client, url, args.page_size)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{url:8} {mode:7} {rows:>8} rows  {rows / best:>12,.0f} rows/s")
+        assert bodies['schema'] == bodies['fast'], f"{url}: fast path output differs"
+        print(f"{url:8} outputs byte-identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Measure cold-start time of the app in each startup mode.
+
+Every sample is a fresh interpreter that imports ``app`` and runs
+``create_app()``, then serves one request through the test client, so
+the cost LAZY_STARTUP moves from startup to the first request is counted
+too. Modes:
+
+    full    create_app() as the ``flask`` CLI builds it (with Flask-Migrate)
+    serving create_app(serving=True) as app/app.py and app/asgi.py build it
+    lazy    serving, with LAZY_STARTUP=true
+
+Reports median/min import and create_app time, time to the first
+response and peak RSS per mode as JSON. ``--profile`` adds the slowest
+imports of each mode (startup and its direct imports) from
+``python -X importtime``.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup --samples 10 --profile
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODES = {
+    'full': (False, 'false'),
+    'serving': (True, 'false'),
+    'lazy': (True, 'true'),
+}
+
+CHILD = """
+import json, resource, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(serving={serving})
+created = time.perf_counter()
+status = app.test_client().get({path!r}).status_code
+first = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (first - created) * 1000,
+    "ready_ms": (created - start) * 1000,
+    "first_response_ms": (first - start) * 1000,
+    "status": status,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def child_env(database_url, lazy):
+    return dict(os.environ, DATABASE_URL=database_url, LAZY_STARTUP=lazy,
+                RATE_LIMIT_BACKEND='null', RESPONSE_CACHE_BACKEND='null')
+
+
+def sample(mode, database_url, path):
+    serving, lazy = MODES[mode]
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.format(serving=serving, path=path)],
+        env=child_env(database_url, lazy), capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile(mode, database_url, top):
+    """
+    The ``top`` slowest imports (cumulative ms) of one startup, among those
+    made by the startup itself and by the modules it imports directly.
+    """
+    serving, lazy = MODES[mode]
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         f"from app import create_app; create_app(serving={serving})"],
+        env=child_env(database_url, lazy), capture_output=True, text=True, check=True,
+    ).stderr
+    modules, total = [], 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        cumulative_ms = int(cumulative) / 1000
+        if depth == 0:
+            total += cumulative_ms
+        if depth <= 1:
+            modules.append((name.strip(), cumulative_ms))
+    modules.sort(key=lambda entry: entry[1], reverse=True)
+    return {
+        "total_import_ms": round(total, 1),
+        "slowest": [{"module": name, "ms": round(ms, 1)} for name, ms in modules[:top]],
+    }
+
+
+def summarize(samples):
+    summary = {}
+    for key in ('import_ms', 'create_app_ms', 'ready_ms', 'first_request_ms', 'first_response_ms', 'peak_rss_mb'):
+        values = [s[key] for s in samples]
+        summary[key] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1)}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database-url', help="defaults to a throwaway SQLite file")
+    parser.add_argument('--samples', type=int, default=10, help="cold starts per mode")
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--path', default='/items?limit=20', help="first request")
+    parser.add_argument('--profile', action='store_true', help="include an import-time profile per mode")
+    parser.add_argument('--top', type=int, default=15, help="imports listed per profile")
+    parser.add_argument('--output', help="write results JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'flask_api_bench.db')
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app, db
+
+    with create_app(serving=True).app_context():
+        db.create_all()
+
+    results = {"meta": {"samples": args.samples, "path": args.path, "python": sys.version.split()[0]},
+               "modes": {}}
+    modes = args.modes.split(',')
+    runs = {mode: [] for mode in modes}
+    # Interleave modes so drift (disk cache, CPU frequency) affects all of them alike
+    for _ in range(args.samples):
+        for mode in modes:
+            runs[mode].append(sample(mode, database_url, args.path))
+    for mode in modes:
+        statuses = sorted({run['status'] for run in runs[mode]})
+        results["modes"][mode] = {"statuses": statuses, **summarize(runs[mode])}
+        if args.profile:
+            results["modes"][mode]["import_profile"] = import_profile(mode, database_url, args.top)
+        timing = results["modes"][mode]
+        print(f"{mode:8} ready {timing['ready_ms']['median']:>7} ms  "
+              f"first response {timing['first_response_ms']['median']:>7} ms  "
+              f"rss {timing['peak_rss_mb']['median']} MB", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Seed a reproducible benchmark catalogue: stores, items, store stats and a
+benchmark user. Shared by the benchmark scripts.
+"""
+import random
+
+from sqlalchemy import delete, func, insert, select
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import ItemModel, StoreModel, StoreStatsModel, User
+from app.services.store_stats import refresh_store_stats
+
+BENCH_EMAIL = 'bench@example.com'
+BENCH_PASSWORD = 'bench-password'
+CHUNK = 10000
+
+
+def catalogue_size():
+    """(stores, items) currently in the database."""
+    return (
+        db.session.scalar(select(func.count()).select_from(StoreModel)),
+        db.session.scalar(select(func.count()).select_from(ItemModel)),
+    )
+
+
+def reset_catalogue():
+    """Delete every item, store summary and store."""
+    for table in (ItemModel.__table__, StoreStatsModel.__table__, StoreModel.__table__):
+        db.session.execute(delete(table))
+    db.session.commit()
+
+
+def seed_catalogue(items, stores, seed=42):
+    """
+    Insert ``stores`` stores and ``items`` items spread across them, in
+    chunks of CHUNK rows, then rebuild the store summaries. Names and
+    prices come from a seeded RNG so runs are comparable.
+    """
+    rng = random.Random(seed)
+    for start in range(0, stores, CHUNK):
+        db.session.execute(insert(StoreModel.__table__), [
+            {"name": f"store-{i}"} for i in range(start, min(start + CHUNK, stores))
+        ])
+    store_ids = db.session.scalars(select(StoreModel.id).order_by(StoreModel.id)).all()
+    for start in range(0, items, CHUNK):
+        db.session.execute(insert(ItemModel.__table__), [
+            {
+                "name": f"item-{i:07d}-{rng.choice('abcdefghij')}",
+                "price": round(rng.uniform(0.5, 500), 2),
+                "store_id": store_ids[i % len(store_ids)],
+            }
+            for i in range(start, min(start + CHUNK, items))
+        ])
+        db.session.commit()
+    refresh_store_stats()
+    db.session.commit()
+
+
+def ensure_bench_user(method):
+    """Create (or re-hash) the benchmark user with password hash ``method``."""
+    user = db.session.scalar(select(User).where(User.email == BENCH_EMAIL))
+    if user is None:
+        user = User(username='bench', email=BENCH_EMAIL, password='')
+        db.session.add(user)
+    user.password = generate_password_hash(BENCH_PASSWORD, method=method)
+    db.session.commit()
+    return user.id
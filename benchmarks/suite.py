@@ -0,0 +1,363 @@
+"""
+Benchmark every blueprint and compare the results against a baseline.
+
+Seeds a catalogue of ``--items`` items across ``--stores`` stores (into a
+new temporary SQLite file, removed on exit, unless ``--database-url`` is
+given), then drives a fixed set of scenarios covering auth_bp, store_bp
+and item_bp either in-process through the Flask test client or, with
+``--url``, against a running server. For each scenario it reports
+p50/p95/p99 latency, throughput, error count and peak memory as JSON, and
+with ``--baseline`` flags scenarios whose p95 or throughput regressed by
+more than ``--tolerance``.
+
+Usage (from the repository root):
+    python -m benchmarks.suite --items 100000 --output results.json
+    python -m benchmarks.suite --items 100000 --baseline results.json
+    python -m benchmarks.suite --url http://localhost:5005 --database-url postgresql+psycopg2://...
+
+The server under ``--url`` must use the same database and run with
+RATE_LIMIT_BACKEND=null, otherwise the auth scenarios hit the limiter.
+Pass ``--server-pid`` to report its peak RSS. An existing catalogue under
+``--database-url`` is reused as-is (write scenarios grow it); ``--reset``
+wipes stores and items and seeds again.
+"""
+import argparse
+import atexit
+import fnmatch
+import http.client
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+Scenario = namedtuple('Scenario', 'name method path body auth expect light')
+Scenario.__new__.__defaults__ = (None, None, (200,), False)
+
+# ``path`` and ``body`` take (ctx, i): ctx holds ids and tokens from setup,
+# i is the request number. ``light`` scenarios run --light-requests times
+# (password hashing makes them deliberately slow).
+SCENARIOS = [
+    Scenario('auth.login', 'POST', lambda c, i: '/login', light=True,
+             body=lambda c, i: {"email": c['email'], "password": c['password']}),
+    Scenario('auth.profile', 'GET', lambda c, i: '/profile', auth='access'),
+    Scenario('auth.refresh', 'POST', lambda c, i: '/refresh', auth='refresh'),
+    Scenario('store.list', 'GET', lambda c, i: '/stores?limit=50'),
+    Scenario('store.list_expand', 'GET', lambda c, i: '/stores?limit=10&expand=items'),
+    Scenario('store.get', 'GET', lambda c, i: f"/stores/{c['store'](i)}"),
+    Scenario('store.get_expand', 'GET', lambda c, i: f"/stores/{c['store'](i)}?expand=items"),
+    Scenario('store.lookup', 'POST', lambda c, i: '/stores/lookup',
+             body=lambda c, i: {"ids": [c['store'](i * 10 + k) for k in range(10)]}),
+    Scenario('store.stats', 'GET', lambda c, i: '/stores/stats?limit=500'),
+    Scenario('store.stats_one', 'GET', lambda c, i: f"/stores/{c['store'](i)}/stats"),
+    Scenario('item.list', 'GET', lambda c, i: '/items?limit=100'),
+    Scenario('item.list_by_store', 'GET', lambda c, i: f"/items?store_id={c['store'](i)}&sort=-price"),
+    Scenario('item.list_price_range', 'GET', lambda c, i: '/items?min_price=10&max_price=20&sort=price'),
+    Scenario('item.list_name_prefix', 'GET', lambda c, i: f"/items?name_prefix=item-{i % 100:02d}"),
+    Scenario('item.search', 'GET', lambda c, i: f"/items?q={i % 1000:03d}-a"),
+    Scenario('item.get', 'GET', lambda c, i: f"/items/{c['item'](i)}"),
+    Scenario('item.lookup', 'GET',
+             lambda c, i: '/items?ids=' + ','.join(str(c['item'](i * 25 + k)) for k in range(25))),
+    Scenario('item.export_store', 'GET', lambda c, i: f"/items/export?store_id={c['store'](i)}"),
+    Scenario('store.create', 'POST', lambda c, i: '/stores', expect=(201,),
+             body=lambda c, i: {"name": f"bench-store-{c['run']}-{i}"}),
+    Scenario('store.update', 'PUT', lambda c, i: f"/stores/{c['store'](i)}",
+             body=lambda c, i: {"name": f"store-renamed-{c['run']}-{i}"}),
+    Scenario('item.create', 'POST', lambda c, i: '/items', expect=(201,),
+             body=lambda c, i: {"name": f"bench-item-{c['run']}-{i}", "price": 9.99, "store_id": c['store'](i)}),
+    Scenario('item.update', 'PUT', lambda c, i: f"/items/{c['item'](i)}",
+             body=lambda c, i: {"price": round(1 + i % 400 * 1.25, 2)}),
+    Scenario('item.bulk_update', 'POST', lambda c, i: '/items/bulk',
+             body=lambda c, i: {"operations": [
+                 {"op": "update", "id": c['item'](i * 100 + k), "price": 5 + k} for k in range(100)
+             ]}),
+    Scenario('item.delete', 'DELETE', lambda c, i: f"/items/{c['doomed'][i]}"),
+]
+
+
+class InProcessClient:
+    """Drives the app through one Flask test client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers or {})
+        data = response.get_data()
+        response.close()
+        return response.status_code, data
+
+
+class HttpClient:
+    """Drives a running server over HTTP/1.1 keep-alive, one connection per thread."""
+
+    def __init__(self, url, timeout=None):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout)
+            try:
+                connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed an idle keep-alive connection; reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_mb(pid=None):
+    """Peak resident memory of this process, or of ``pid`` from /proc (Linux)."""
+    if pid is None:
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def run_scenario(client, scenario, ctx, requests, warmup, concurrency):
+    headers = {}
+    if scenario.auth:
+        headers['Authorization'] = f"Bearer {ctx['tokens'][scenario.auth]}"
+
+    def call(i):
+        body = scenario.body(ctx, i) if scenario.body else None
+        start = time.perf_counter()
+        status, _ = client.request(scenario.method, scenario.path(ctx, i), body, headers)
+        return time.perf_counter() - start, status in scenario.expect
+
+    for i in range(warmup):
+        call(requests + i)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(call, range(requests)))
+    else:
+        outcomes = [call(i) for i in range(requests)]
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in outcomes)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, ok in outcomes if not ok),
+        "throughput_rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def traced_peak_kb(client, scenario, ctx, offset, samples):
+    """Peak Python allocation while serving ``samples`` requests (in-process only)."""
+    headers = {}
+    if scenario.auth:
+        headers['Authorization'] = f"Bearer {ctx['tokens'][scenario.auth]}"
+    tracemalloc.start()
+    try:
+        for i in range(offset, offset + samples):
+            body = scenario.body(ctx, i) if scenario.body else None
+            client.request(scenario.method, scenario.path(ctx, i), body, headers)
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table; return the names of regressed scenarios."""
+    regressed = []
+    for key in ('target', 'database', 'items', 'concurrency', 'response_cache'):
+        if results['meta'].get(key) != baseline.get('meta', {}).get(key):
+            print(f"warning: {key} differs from the baseline "
+                  f"({results['meta'].get(key)} vs {baseline.get('meta', {}).get(key)})", file=sys.stderr)
+    print(f"\n{'scenario':28} {'p95 ms':>10} {'base':>10} {'rps':>10} {'base':>10}")
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            print(f"{name:28} {current['p95_ms']:>10} {'-':>10} {current['throughput_rps']:>10} {'-':>10}  new")
+            continue
+        slower = current['p95_ms'] > previous['p95_ms'] * (1 + tolerance)
+        fewer = current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance)
+        flag = 'REGRESSED' if slower or fewer else ''
+        if flag:
+            regressed.append(name)
+        print(f"{name:28} {current['p95_ms']:>10} {previous['p95_ms']:>10} "
+              f"{current['throughput_rps']:>10} {previous['throughput_rps']:>10}  {flag}")
+    return regressed
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--stores', type=int, default=100)
+    parser.add_argument('--database-url', help="defaults to a temporary SQLite file, removed afterwards")
+    parser.add_argument('--reset', action='store_true', help="wipe stores and items and seed again")
+    parser.add_argument('--url', help="benchmark a running server instead of the in-process app")
+    parser.add_argument('--server-pid', type=int, help="report peak RSS of this server process")
+    parser.add_argument('--requests', type=int, default=200, help="requests per scenario")
+    parser.add_argument('--light-requests', type=int, default=10, help="requests per password-hashing scenario")
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--scenarios', default='*', help="comma-separated name patterns, e.g. 'item.*,auth.login'")
+    parser.add_argument('--cache', default='null', help="RESPONSE_CACHE_BACKEND for the in-process app")
+    parser.add_argument('--hash-method', default=None, help="PASSWORD_HASH_METHOD (default: app config)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="also measure peak Python allocations per scenario (in-process only)")
+    parser.add_argument('--output', help="write results JSON here (default: stdout)")
+    parser.add_argument('--baseline', help="results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        # A fresh file per run, so write scenarios never meet rows of an earlier run
+        fd, path = tempfile.mkstemp(prefix='flask_api_bench-', suffix='.db')
+        os.close(fd)
+        atexit.register(os.remove, path)
+        database_url = 'sqlite:///' + path
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['RATE_LIMIT_BACKEND'] = 'null'
+    os.environ['RESPONSE_CACHE_BACKEND'] = args.cache
+
+    from app import create_app, db
+    from app.models import ItemModel, StoreModel
+    from benchmarks import catalogue
+
+    app = create_app()
+    if args.hash_method:
+        app.config['PASSWORD_HASH_METHOD'] = args.hash_method
+    logging_level = app.logger.level
+    with app.app_context():
+        db.create_all()
+        stores, items = catalogue.catalogue_size()
+        if args.reset or not items:
+            catalogue.reset_catalogue()
+            seed_start = time.perf_counter()
+            catalogue.seed_catalogue(args.items, args.stores)
+            print(f"seeded {args.items} items in {args.stores} stores "
+                  f"in {time.perf_counter() - seed_start:.1f}s", file=sys.stderr)
+            stores, items = catalogue.catalogue_size()
+        catalogue.ensure_bench_user(app.config['PASSWORD_HASH_METHOD'])
+        store_ids = db.session.scalars(db.select(StoreModel.id)).all()
+        item_ids = db.session.scalars(db.select(ItemModel.id).limit(100000)).all()
+        dialect = db.engine.dialect.name
+
+    client = HttpClient(args.url) if args.url else InProcessClient(app)
+    patterns = args.scenarios.split(',')
+    selected = [s for s in SCENARIOS if any(fnmatch.fnmatch(s.name, p) for p in patterns)]
+    ctx = {
+        'run': int(time.time()),
+        'email': catalogue.BENCH_EMAIL,
+        'password': catalogue.BENCH_PASSWORD,
+        'store': lambda i: store_ids[i * 7919 % len(store_ids)],
+        'item': lambda i: item_ids[i * 104729 % len(item_ids)],
+    }
+    status, body = client.request('POST', '/login', {"email": ctx['email'], "password": ctx['password']})
+    if status != 200:
+        sys.exit(f"benchmark login failed with {status}: {body[:200]!r}")
+    login = json.loads(body)
+    ctx['tokens'] = {'access': login['access_token'], 'refresh': login['refresh_token']}
+    if any(s.name == 'item.delete' for s in selected):
+        count = args.requests + args.warmup
+        status, body = client.request('POST', '/items/bulk', {"operations": [
+            {"op": "create", "name": f"doomed-{ctx['run']}-{k}", "price": 1, "store_id": ctx['store'](k)}
+            for k in range(count)
+        ]})
+        # Warm-up calls use the indices past ``requests``
+        ctx['doomed'] = [result['id'] for result in json.loads(body)['results']]
+
+    app.logger.setLevel('ERROR')
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "target": args.url or 'in-process',
+            "database": dialect,
+            "stores": stores,
+            "items": items,
+            "concurrency": args.concurrency,
+            "response_cache": args.cache,
+        },
+        "scenarios": {},
+    }
+    for scenario in selected:
+        requests = args.light_requests if scenario.light else args.requests
+        warmup = min(args.warmup, requests)
+        result = run_scenario(client, scenario, ctx, requests, warmup, args.concurrency)
+        result["peak_rss_mb"] = peak_rss_mb(args.server_pid if args.url else None)
+        if args.trace_memory and not args.url and scenario.name != 'item.delete':
+            result["peak_alloc_kb"] = traced_peak_kb(client, scenario, ctx, requests + warmup, min(10, requests))
+        results["scenarios"][scenario.name] = result
+        print(f"{scenario.name:28} p50 {result['p50_ms']:>9} ms  p95 {result['p95_ms']:>9} ms  "
+              f"p99 {result['p99_ms']:>9} ms  {result['throughput_rps']:>9} req/s  "
+              f"errors {result['errors']}", file=sys.stderr)
+    app.logger.setLevel(logging_level)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressed = compare(results, json.load(f), args.tolerance)
+        if regressed:
+            sys.exit(f"\n{len(regressed)} scenario(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+# Gunicorn configuration for production serving.
+# Run with: gunicorn app.app:app  (this file is picked up from the working directory)
+from app.config import Config
+
+bind = Config.WEB_BIND
+worker_class = 'gthread'
+workers = Config.WEB_CONCURRENCY
+threads = Config.WEB_THREADS
+keepalive = Config.WEB_KEEPALIVE
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+
+# Recycle workers periodically to cap slow memory growth; jitter avoids
+# all workers restarting at once
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = Config.WEB_MAX_REQUESTS_JITTER
+
+# Import create_app() once in the master so workers share the loaded code
+# copy-on-write. Code changes then need a new master (USR2 + QUIT), not HUP.
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master; each worker opens its own."""
+    from app import db
+
+    flask_app = server.app.wsgi()
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,127 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app import create_app, db
+from app.config import Config
+from app.models import ItemModel, StoreModel
+from app.services.store_stats import refresh_store_stats
+
+DATABASE_URL = os.getenv('DATABASE_URL', '')
+
+requires_postgres = pytest.mark.skipif(
+    not DATABASE_URL.startswith('postgresql'), reason="needs a PostgreSQL DATABASE_URL"
+)
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Build an app on a fresh SQLite file; keyword arguments override Config
+    entries, since extensions read them in ``init_app``.
+    """
+    apps = []
+
+    def make_app(**config):
+        config.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+        config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+        for name, value in config.items():
+            monkeypatch.setattr(Config, name, value, raising=False)
+        app = create_app(serving=True)
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all(bind_key=None)
+        apps.append(app)
+        return app
+
+    yield make_app
+
+    for app in apps:
+        buffer = app.extensions.get('price_buffer')
+        if buffer is not None:
+            buffer.close(timeout=5)
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """``seed(stores, items_per_store)``: insert a catalogue, with summaries; returns the store ids."""
+    def seed(stores, items_per_store=0):
+        with app.app_context():
+            rows = [StoreModel(name=f"store-{i}") for i in range(stores)]
+            db.session.add_all(rows)
+            db.session.flush()
+            for store in rows:
+                db.session.add_all(
+                    ItemModel(name=f"item-{store.id}-{i}", price=i + 0.5, store_id=store.id)
+                    for i in range(items_per_store)
+                )
+            refresh_store_stats()
+            db.session.commit()
+            return [store.id for store in rows]
+    return seed
+
+
+@pytest.fixture
+def count_queries(app):
+    """``with count_queries() as statements:`` collects the SQL run against the database."""
+    @contextmanager
+    def count_queries():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+    return count_queries
+
+
+@pytest.fixture(scope='module')
+def pg_app():
+    """
+    An app on the DATABASE_URL Postgres database, with its tables in a
+    scratch schema that is dropped after the module. Use with requires_postgres.
+    """
+    schema = f"test_{os.getpid()}_{os.urandom(4).hex()}"
+    admin = create_engine(DATABASE_URL)
+    with admin.begin() as connection:
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        connection.execute(text(f'CREATE SCHEMA {schema}'))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL)
+        monkeypatch.setattr(Config, 'SQLALCHEMY_ENGINE_OPTIONS', {
+            'connect_args': {'options': f'-csearch_path={schema},public'},
+        }, raising=False)
+        app = create_app(serving=True)
+    try:
+        with app.app_context():
+            db.create_all(bind_key=None)
+        yield app
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        with admin.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        admin.dispose()
@@ -0,0 +1,88 @@
+import asyncio
+import importlib
+from urllib.parse import urlsplit
+
+import pytest
+
+pytest.importorskip('a2wsgi')
+pytest.importorskip('aiosqlite')
+
+PATHS = [
+    '/items', '/items?limit=3', '/items?sort=-price&limit=5', '/items?store_id=2&sort=name&limit=4',
+    '/items?name_prefix=item-1-&limit=2', '/items?ids=5,1,999', '/items?cursor=bad', '/items?min_price=abc',
+    '/items/5', '/items/999', '/stores', '/stores?limit=2', '/stores/3', '/stores/999', '/stores?ids=2,1',
+    # Deferred to the Flask app
+    '/stores?expand=items&limit=2', '/stores/2?expand=items', '/stores/stats',
+]
+
+
+async def asgi_get(asgi, path, headers=None):
+    """Drive one GET through ``asgi``; returns (status, headers, body)."""
+    url = urlsplit(path)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(), 'root_path': '',
+        'query_string': url.query.encode(), 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+        ],
+    }
+    requested = asyncio.Event()
+    messages = []
+
+    async def receive():
+        if not requested.is_set():
+            requested.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi(scope, receive, send)
+    start = messages[0]
+    response_headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+    return start['status'], response_headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+@pytest.fixture
+def asgi(app, seed):
+    seed(4, 5)
+    # Imported late: the module builds its own app from Config, patched by make_app
+    AsyncAPI = importlib.import_module('app.asgi').AsyncAPI
+    return AsyncAPI(app)
+
+
+def test_async_views_match_flask_views(app, asgi):
+    client = app.test_client()
+
+    async def run():
+        try:
+            for path in PATHS:
+                for headers in (None, {'Accept': 'application/json; layout=columnar', 'Accept-Encoding': 'gzip'}):
+                    flask = client.get(path, headers=headers)
+                    status, response_headers, body = await asgi_get(asgi, path, headers)
+                    assert (status, body) == (flask.status_code, flask.data), path
+                    assert response_headers.get('etag') == flask.headers.get('ETag'), path
+                    assert response_headers['content-type'] == flask.headers['Content-Type'], path
+                    assert response_headers.get('content-encoding') == flask.headers.get('Content-Encoding'), path
+
+                    if flask.headers.get('ETag'):
+                        revalidate = {**(headers or {}), 'If-None-Match': flask.headers['ETag']}
+                        status, _, _ = await asgi_get(asgi, path, revalidate)
+                        assert status == client.get(path, headers=revalidate).status_code == 304, path
+        finally:
+            await asgi.stop()
+
+    asyncio.run(run())
+
+
+def test_async_views_report_server_timing(asgi):
+    async def run():
+        try:
+            _, headers, _ = await asgi_get(asgi, '/items/1')
+        finally:
+            await asgi.stop()
+        return headers
+
+    assert '1 queries' in asyncio.run(run())['server-timing']
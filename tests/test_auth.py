@@ -0,0 +1,118 @@
+import hashlib
+import hmac
+import threading
+
+import pytest
+
+from app import db
+from app.models import User
+from app.services.auth_service import PasswordHasher, PasswordHasherBusy
+
+
+def register(client, email='ada@example.com', password='s3cret'):
+    return client.post('/register', json={"username": email.split('@')[0], "email": email, "password": password})
+
+
+def login(client, email='ada@example.com', password='s3cret'):
+    return client.post('/login', json={"email": email, "password": password})
+
+
+def stored_hash(app, email='ada@example.com'):
+    with app.app_context():
+        return db.session.execute(db.select(User.password).where(User.email == email)).scalar_one()
+
+
+def test_register_and_login(app, client):
+    assert register(client).status_code == 201
+    assert stored_hash(app).startswith('pbkdf2:sha256:1000$')
+
+    response = login(client)
+    assert response.status_code == 200
+    assert {'access_token', 'refresh_token'} <= response.get_json().keys()
+    assert login(client, password='wrong').status_code == 401
+    assert login(client, email='nobody@example.com').status_code == 401
+
+
+def test_login_upgrades_hash_to_configured_cost(app, client):
+    register(client)
+    old_hash = stored_hash(app)
+
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    assert login(client).status_code == 200
+
+    new_hash = stored_hash(app)
+    assert new_hash != old_hash and new_hash.startswith('pbkdf2:sha256:2000$')
+    assert login(client).status_code == 200
+    assert stored_hash(app) == new_hash
+
+
+def test_legacy_salted_hash_is_verified_and_upgraded(app, client):
+    digest = hmac.new(b'salt', b's3cret', 'sha256').hexdigest()
+    with app.app_context():
+        db.session.add(User(username='old', email='old@example.com', password=f'sha256$salt${digest}'))
+        db.session.commit()
+
+    assert login(client, email='old@example.com', password='nope').status_code == 401
+    assert login(client, email='old@example.com').status_code == 200
+    assert stored_hash(app, 'old@example.com').startswith('pbkdf2:sha256:1000$')
+
+
+def test_hasher_rejects_callers_beyond_its_queue():
+    hasher = PasswordHasher(workers=1, max_pending=1, wait_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def hold_slot():
+        started.set()
+        release.wait()
+
+    running = threading.Thread(target=hasher.run, args=(hold_slot,))
+    running.start()
+    started.wait()
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.run(hashlib.sha256, b'x')
+    finally:
+        release.set()
+        running.join()
+    # The slot is free again once the first hash finished
+    assert hasher.run(len, 'abc') == 3
+
+
+def auth_header(client, email='ada@example.com'):
+    return {"Authorization": f"Bearer {login(client, email=email).get_json()['access_token']}"}
+
+
+def test_profile_is_served_from_principal_cache(app, client, count_queries):
+    register(client)
+    headers = auth_header(client)
+    assert client.get('/profile', headers=headers).get_json()['username'] == 'ada'
+
+    with count_queries() as statements:
+        response = client.get('/profile', headers=headers)
+    assert response.status_code == 200
+    assert statements == []
+
+
+def test_user_changes_evict_cached_principal(app, client):
+    register(client)
+    login_response = login(client).get_json()
+    headers = {"Authorization": f"Bearer {login_response['access_token']}"}
+    client.get('/profile', headers=headers)
+
+    with app.app_context():
+        user = db.session.execute(db.select(User).where(User.email == 'ada@example.com')).scalar_one()
+        user.username = 'lovelace'
+        db.session.commit()
+        user_id = user.id
+    assert client.get('/profile', headers=headers).get_json()['username'] == 'lovelace'
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+    assert client.get('/profile', headers=headers).status_code == 404
+    refresh = client.post('/refresh', headers={"Authorization": f"Bearer {login_response['refresh_token']}"})
+    assert refresh.status_code == 401
+
+
+def test_profile_requires_a_token(client):
+    assert client.get('/profile').status_code == 401
@@ -0,0 +1,64 @@
+import pytest
+
+
+@pytest.fixture(params=['fast', 'schema'])
+def lookup_client(request, app, seed):
+    app.config['SERIALIZATION_MODE'] = request.param
+    seed(3, 1)
+    return app.test_client()
+
+
+def lookup(client, resource, ids, method, query=''):
+    if method == 'GET':
+        return client.get(f"/{resource}?ids={','.join(map(str, ids))}{query and '&' + query}")
+    return client.post(f'/{resource}/lookup{query and "?" + query}', json={"ids": ids})
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST'])
+@pytest.mark.parametrize('resource', ['items', 'stores'])
+def test_lookup_keeps_request_order(lookup_client, resource, method):
+    response = lookup(lookup_client, resource, [3, 1, 2], method)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [row['id'] for row in body['data']] == [3, 1, 2]
+    assert body['missing'] == []
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST'])
+@pytest.mark.parametrize('resource', ['items', 'stores'])
+def test_lookup_lists_missing_ids(lookup_client, resource, method):
+    response = lookup(lookup_client, resource, [9, 2, 7, 2, 1], method)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [row['id'] for row in body['data']] == [2, 1]
+    assert body['missing'] == [9, 7]
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST'])
+def test_store_lookup_expands_items(lookup_client, method):
+    response = lookup(lookup_client, 'stores', [2, 3], method, 'expand=items')
+
+    data = response.get_json()['data']
+    assert [store['id'] for store in data] == [2, 3]
+    assert [[item['name'] for item in store['items']] for store in data] == [['item-2-0'], ['item-3-0']]
+
+
+def test_lookup_runs_one_query(lookup_client, count_queries):
+    with count_queries() as statements:
+        lookup_client.get('/items?ids=3,1,2')
+
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize('ids', ['', '1,x', ','.join(map(str, range(101)))])
+def test_lookup_rejects_bad_ids(client, ids):
+    response = client.get(f'/items?ids={ids}')
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('body', [{}, {"ids": 1}, {"ids": [1, True]}, [1, 2]])
+def test_post_lookup_rejects_bad_body(client, body):
+    assert client.post('/items/lookup', json=body).status_code == 400
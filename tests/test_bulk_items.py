@@ -0,0 +1,159 @@
+import pytest
+
+from app import db
+from app.models import ChangeModel, ItemModel
+from tests.test_store_stats import assert_stats_match
+
+
+def items_table(app):
+    with app.app_context():
+        return {item.id: (item.name, item.price, item.store_id) for item in ItemModel.query.all()}
+
+
+def change_count(app):
+    with app.app_context():
+        return db.session.query(ChangeModel).count()
+
+
+def bulk(client, operations, query=''):
+    return client.post(f'/items/bulk{query}', json={"operations": operations})
+
+
+@pytest.fixture
+def catalogue(seed):
+    """Stores 1 and 2 with items 1-3 and 4-6."""
+    return seed(2, 3)
+
+
+def test_valid_batch_applies_every_operation(app, client, catalogue):
+    response = bulk(client, [
+        {"op": "create", "name": "new", "price": 7, "store_id": 2},
+        {"op": "update", "id": 1, "price": 9.5},
+        {"op": "update", "id": 2, "name": "renamed"},
+        {"op": "delete", "id": 4},
+    ])
+
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {"index": 0, "op": "create", "status": "created", "id": 7},
+        {"index": 1, "op": "update", "status": "updated", "id": 1},
+        {"index": 2, "op": "update", "status": "updated", "id": 2},
+        {"index": 3, "op": "delete", "status": "deleted", "id": 4},
+    ]
+    items = items_table(app)
+    assert items[7] == ("new", 7, 2)
+    assert items[1][1] == 9.5 and items[2][0] == "renamed"
+    assert 4 not in items
+    assert_stats_match(app)
+
+
+def test_partial_failure_reports_each_row(app, client, catalogue):
+    response = bulk(client, [
+        {"op": "create", "name": "kept", "price": 1, "store_id": 1},
+        {"op": "create", "name": "orphan", "price": 1, "store_id": 99},
+        {"op": "create", "name": "bad", "price": "abc", "store_id": 1},
+        {"op": "create", "id": 50, "name": "with-id", "price": 1, "store_id": 1},
+        {"op": "update", "id": 99, "price": 1},
+        {"op": "update", "id": 3},
+        {"op": "delete", "id": 98},
+        {"op": "delete"},
+        {"op": "upsert", "id": 1},
+        "not an object",
+        {"op": "delete", "id": 5},
+    ])
+
+    assert response.status_code == 207
+    results = response.get_json()['results']
+    assert [result['index'] for result in results] == list(range(11))
+    assert [result['status'] for result in results] == ['created'] + ['error'] * 9 + ['deleted']
+    errors = [result.get('errors') for result in results]
+    assert errors[1] == {"store_id": ["Store not found."]}
+    assert 'price' in errors[2]
+    assert errors[3]['id'] == ["Cannot be set on create."]
+    assert errors[4] == errors[6] == {"id": ["Item not found."]}
+    assert errors[5] == {"_schema": ["Nothing to update."]}
+    assert errors[7] == {"id": ["Missing or invalid id."]}
+    assert 'op' in errors[8]
+    assert '_schema' in errors[9]
+    # The valid rows were written, and nothing else
+    items = items_table(app)
+    assert items[results[0]['id']][0] == "kept"
+    assert 5 not in items
+    assert len(items) == 6
+    assert_stats_match(app)
+
+
+def test_duplicate_ids_in_one_batch(app, client, catalogue):
+    response = bulk(client, [
+        {"op": "update", "id": 1, "price": 3},
+        {"op": "delete", "id": 1},
+        {"op": "update", "id": 1, "name": "again"},
+    ])
+
+    assert response.status_code == 207
+    results = response.get_json()['results']
+    assert results[0]['status'] == 'updated'
+    assert results[1]['errors'] == results[2]['errors'] == {"id": ["Duplicate id in batch."]}
+    assert items_table(app)[1] == ("item-1-0", 3, 1)
+
+
+def test_atomic_batch_with_an_error_writes_nothing(app, client, catalogue):
+    before, changes = items_table(app), change_count(app)
+
+    response = bulk(client, [
+        {"op": "create", "name": "new", "price": 1, "store_id": 1},
+        {"op": "update", "id": 1, "price": 9},
+        {"op": "delete", "id": 2},
+        {"op": "update", "id": 99, "price": 1},
+    ], '?atomic=true')
+
+    assert response.status_code == 422
+    assert [result['status'] for result in response.get_json()['results']] == [
+        'skipped', 'skipped', 'skipped', 'error',
+    ]
+    assert items_table(app) == before
+    assert change_count(app) == changes
+    assert_stats_match(app)
+
+
+def test_atomic_batch_without_errors_applies(app, client, catalogue):
+    response = bulk(client, [{"op": "update", "id": 1, "price": 9}], '?atomic=true')
+
+    assert response.status_code == 200
+    assert items_table(app)[1][1] == 9
+
+
+def test_batches_over_the_limit_are_413(make_app):
+    app = make_app(BULK_MAX_OPERATIONS=3)
+    client = app.test_client()
+    store_id = client.post('/stores', json={"name": "limited"}).get_json()['id']
+    operation = {"op": "create", "name": "x", "price": 1, "store_id": store_id}
+
+    response = bulk(client, [operation] * 4)
+
+    assert response.status_code == 413
+    assert items_table(app) == {}
+    assert bulk(client, [operation] * 3).status_code == 200
+
+
+@pytest.mark.parametrize('body', [{}, {"operations": []}, {"operations": {"op": "delete"}}, [1]])
+def test_malformed_batches_are_400(client, body):
+    assert client.post('/items/bulk', json=body).status_code == 400
+
+
+def test_statement_count_does_not_grow_with_the_batch(client, catalogue, count_queries):
+    store_id = catalogue[0]
+    bulk(client, [{"op": "create", "name": f"c-{i}", "price": i, "store_id": store_id} for i in range(40)])
+
+    def statements_for(size, first_id):
+        operations = (
+            [{"op": "create", "name": f"n-{first_id}-{i}", "price": i, "store_id": store_id} for i in range(size)]
+            + [{"op": "update", "id": first_id + i, "price": 100 + i} for i in range(0, size, 2)]
+            + [{"op": "delete", "id": first_id + i} for i in range(1, size, 2)]
+        )
+        with count_queries() as statements:
+            assert bulk(client, operations).status_code == 200
+        # SQLite runs INSERT ... RETURNING one row at a time; PostgreSQL batches it
+        return [s for s in statements if not s.startswith('INSERT INTO items')]
+
+    assert len(statements_for(4, 7)) == len(statements_for(30, 11))
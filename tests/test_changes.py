@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+
+def write_history(client):
+    """Create, update and delete through the API; returns the changes it should log, in order."""
+    store_id = client.post('/stores', json={"name": "feed"}).get_json()['id']
+    item_ids = [
+        client.post('/items', json={"name": f"feed-{i}", "price": i + 1, "store_id": store_id}).get_json()['id']
+        for i in range(3)
+    ]
+    client.put(f'/items/{item_ids[0]}', json={"price": 9})
+    client.put(f'/stores/{store_id}', json={"name": "feed-renamed"})
+    client.delete(f'/items/{item_ids[1]}')
+    client.delete(f'/stores/{store_id}')
+    return [
+        ('store', store_id, 'create'),
+        *[('item', item_id, 'create') for item_id in item_ids],
+        ('item', item_ids[0], 'update'),
+        ('store', store_id, 'update'),
+        ('item', item_ids[1], 'delete'),
+        # The store delete logs the items the cascade removes, then the store
+        ('item', item_ids[0], 'delete'),
+        ('item', item_ids[2], 'delete'),
+        ('store', store_id, 'delete'),
+    ]
+
+
+def read_feed(client, since=None, limit=2):
+    """Every change after ``since``, paged ``limit`` at a time; returns (changes, last cursor)."""
+    changes, more = [], True
+    while more:
+        query = f'?limit={limit}' + (f'&since={since}' if since else '')
+        body = client.get(f'/changes{query}').get_json()
+        assert len(body['data']) <= limit
+        changes += [(change['entity'], change['id'], change['op']) for change in body['data']]
+        since, more = body['next'], body['more']
+    return changes, since
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 100])
+def test_feed_returns_each_change_once(client, limit):
+    expected = write_history(client)
+
+    changes, _ = read_feed(client, limit=limit)
+
+    assert changes == expected
+
+
+def test_since_resumes_without_gaps_or_duplicates(client):
+    first = write_history(client)
+    changes, cursor = read_feed(client)
+    assert changes == first
+
+    # Caught up: an empty page hands back the same position
+    body = client.get(f'/changes?since={cursor}').get_json()
+    assert body['data'] == [] and body['more'] is False
+    assert body['next'] == cursor
+
+    second = write_history(client)
+    changes, cursor = read_feed(client, since=cursor)
+    assert changes == second
+    assert read_feed(client, since=cursor)[0] == []
+
+    # Resuming mid-page from any cursor returns exactly the rest
+    everything = first + second
+    for position in range(len(everything)):
+        page = client.get(f'/changes?limit={position + 1}').get_json()
+        assert read_feed(client, since=page['next'], limit=3)[0] == everything[position + 1:]
+
+
+def test_bulk_writes_are_logged(client):
+    store_id = client.post('/stores', json={"name": "bulk"}).get_json()['id']
+    kept, deleted = [
+        client.post('/items', json={"name": f"bulk-{i}", "price": 1, "store_id": store_id}).get_json()['id']
+        for i in range(2)
+    ]
+    _, cursor = read_feed(client)
+
+    response = client.post('/items/bulk', json={"operations": [
+        {"op": "create", "name": "bulk-2", "price": 2, "store_id": store_id},
+        {"op": "update", "id": kept, "price": 3},
+        {"op": "delete", "id": deleted},
+    ]})
+    assert response.status_code == 200
+    created = response.get_json()['results'][0]['id']
+
+    changes, _ = read_feed(client, since=cursor)
+    assert sorted(changes) == sorted([
+        ('item', created, 'create'), ('item', kept, 'update'), ('item', deleted, 'delete'),
+    ])
+
+
+def test_bad_cursor_is_rejected(client):
+    assert client.get('/changes?since=not-a-cursor').status_code == 400
+
+
+def test_stream_catches_up_from_cursor(client):
+    changes = write_history(client)
+    page = client.get('/changes?limit=4').get_json()
+
+    response = client.get(f"/changes/stream?since={page['next']}", buffered=False)
+    frames = response.response
+    try:
+        assert next(frames).startswith(b'retry:')
+        events = [next(frames).decode() for _ in changes[4:]]
+    finally:
+        response.close()
+
+    assert all(event.startswith('id: ') and '\nevent: change\n' in event for event in events)
+    data = [json.loads(event.split('\ndata: ')[1]) for event in events]
+    assert [(change['entity'], change['id'], change['op']) for change in data] == changes[4:]
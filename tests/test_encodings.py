@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from app.utils.compression import brotli
+from app.utils.serialization import msgpack
+
+requires_msgpack = pytest.mark.skipif(msgpack is None, reason="needs msgpack")
+requires_brotli = pytest.mark.skipif(brotli is None, reason="needs brotli")
+
+MSGPACK = 'application/msgpack'
+
+
+@pytest.fixture
+def catalogue(seed):
+    seed(4, 10)
+
+
+def rows(payload):
+    """``data`` as a list of row dicts, from either layout."""
+    data = payload['data']
+    if isinstance(data, dict):
+        return [dict(zip(data, values)) for values in zip(*data.values())]
+    return data
+
+
+@requires_msgpack
+@pytest.mark.parametrize('path', ['/items?limit=25', '/stores?expand=items', '/items?ids=3,1,99', '/items/2'])
+@pytest.mark.parametrize('layout', ['', '; layout=columnar'])
+def test_msgpack_carries_the_json_payload(client, catalogue, path, layout):
+    expected = client.get(path).get_json()
+
+    response = client.get(path, headers={'Accept': MSGPACK + layout})
+
+    assert response.status_code == 200
+    assert response.mimetype == MSGPACK
+    payload = msgpack.unpackb(response.data)
+    if 'data' in expected:
+        assert rows(payload) == expected['data']
+        assert {k: v for k, v in payload.items() if k != 'data'} == {
+            k: v for k, v in expected.items() if k != 'data'
+        }
+    else:
+        assert payload == expected
+
+
+def test_columnar_json_lists_each_key_once(client, catalogue):
+    expected = client.get('/items?limit=5').get_json()
+
+    response = client.get('/items?limit=5', headers={'Accept': 'application/json; layout=columnar'})
+
+    assert response.headers['Content-Type'] == 'application/json; layout=columnar'
+    data = response.get_json()['data']
+    assert list(data) == list(expected['data'][0])
+    assert rows(response.get_json()) == expected['data']
+
+
+@requires_msgpack
+def test_each_representation_has_its_own_etag(client, catalogue):
+    plain = client.get('/items?limit=5')
+    packed = client.get('/items?limit=5', headers={'Accept': MSGPACK})
+
+    assert packed.headers['ETag'] != plain.headers['ETag']
+    assert packed.headers['ETag'].endswith('.msgpack"')
+    # A JSON validator does not revalidate the MessagePack representation
+    stale = client.get('/items?limit=5', headers={'Accept': MSGPACK, 'If-None-Match': plain.headers['ETag']})
+    assert stale.status_code == 200
+    fresh = client.get('/items?limit=5', headers={'Accept': MSGPACK, 'If-None-Match': packed.headers['ETag']})
+    assert fresh.status_code == 304
+    assert 'Accept' in fresh.vary
+
+
+def test_unknown_accept_falls_back_to_json(client, catalogue):
+    response = client.get('/items?limit=5', headers={'Accept': 'text/csv, */*;q=0.1'})
+
+    assert response.mimetype == 'application/json'
+
+
+@requires_brotli
+def test_brotli_only_above_min_size(make_app):
+    app = make_app(COMPRESSION_MIN_SIZE=1024)
+    client = app.test_client()
+    store_id = client.post('/stores', json={"name": "br"}).get_json()['id']
+    for i in range(40):
+        client.post('/items', json={"name": f"br-item-{i}", "price": i, "store_id": store_id})
+    headers = {'Accept-Encoding': 'br'}
+
+    small = client.get('/items/1', headers=headers)
+    assert len(small.data) < 1024
+    assert 'Content-Encoding' not in small.headers
+    assert 'Accept-Encoding' in small.vary
+
+    large = client.get('/items?limit=40', headers=headers)
+    assert large.headers['Content-Encoding'] == 'br'
+    body = brotli.decompress(large.data)
+    assert len(body) >= 1024
+    assert json.loads(body) == client.get('/items?limit=40').get_json()
+    # The compressed bytes get a weak ETag, which still revalidates
+    etag = large.headers['ETag']
+    assert etag.startswith('W/')
+    revalidated = client.get('/items?limit=40', headers={**headers, 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+
+@requires_brotli
+def test_brotli_preferred_over_gzip(client, catalogue):
+    response = client.get('/items?limit=40', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    gzipped = client.get('/items?limit=40', headers={'Accept-Encoding': 'gzip, br;q=0'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
@@ -0,0 +1,90 @@
+import pytest
+
+URLS = [
+    '/items/1', '/items', '/items?sort=-price', '/stores/1', '/stores/1?expand=items', '/stores/3?expand=items',
+    '/stores', '/stores?expand=items', '/stores/2?expand=items', '/stores?ids=2,1&expand=items',
+]
+ITEM_LISTS = {'/items', '/items?sort=-price'}
+STORE_1_ITEMS = {'/stores/1?expand=items', '/stores?expand=items', '/stores?ids=2,1&expand=items'}
+STORE_2_ITEMS = {'/stores/2?expand=items', '/stores?expand=items', '/stores?ids=2,1&expand=items'}
+STORE_1 = {'/stores/1', '/stores', *STORE_1_ITEMS}
+
+# Write, and the responses whose ETag it must change; every other one must still revalidate
+MUTATIONS = {
+    'update item price': (lambda c: c.put('/items/1', json={"price": 9}), {'/items/1', *ITEM_LISTS, *STORE_1_ITEMS}),
+    'rename item': (lambda c: c.put('/items/1', json={"name": "renamed"}), {'/items/1', *ITEM_LISTS, *STORE_1_ITEMS}),
+    'create item': (
+        lambda c: c.post('/items', json={"name": "new", "price": 1, "store_id": 1}), {*ITEM_LISTS, *STORE_1_ITEMS}
+    ),
+    'delete item': (lambda c: c.delete('/items/2'), {*ITEM_LISTS, *STORE_1_ITEMS}),
+    'write other store item': (lambda c: c.put('/items/4', json={"price": 9}), {*ITEM_LISTS, *STORE_2_ITEMS}),
+    'rename store': (lambda c: c.put('/stores/1', json={"name": "renamed"}), STORE_1),
+    'first item of empty store': (
+        lambda c: c.post('/items', json={"name": "first", "price": 1, "store_id": 3}),
+        {*ITEM_LISTS, '/stores/3?expand=items', '/stores?expand=items'},
+    ),
+}
+
+
+@pytest.fixture(params=['fast', 'schema'])
+def client(request, app, seed):
+    app.config['SERIALIZATION_MODE'] = request.param
+    # Stores 1 and 2 hold items 1-3 and 4-6; store 3 is empty
+    seed(2, 3)
+    client = app.test_client()
+    client.post('/stores', json={"name": "empty"})
+    return client
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_etag_revalidates_to_304(client, url):
+    response = client.get(url)
+    etag = response.headers['ETag']
+
+    # The 304 path recomputes the fingerprint (in SQL for collections); it must agree
+    revalidated = revalidate(client, url, etag)
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+    assert revalidated.data == b''
+    assert revalidate(client, url, '"something-else"').status_code == 200
+
+
+@pytest.mark.parametrize('mutation', MUTATIONS)
+def test_writes_change_exactly_the_dependent_etags(client, mutation):
+    write, changed = MUTATIONS[mutation]
+    before = {url: client.get(url).headers['ETag'] for url in URLS}
+
+    assert write(client).status_code < 300
+
+    for url in URLS:
+        response = revalidate(client, url, before[url])
+        if url in changed:
+            assert response.status_code == 200, f"{mutation}: {url} kept its ETag"
+            assert response.headers['ETag'] != before[url]
+            assert revalidate(client, url, response.headers['ETag']).status_code == 304
+        else:
+            assert response.status_code == 304, f"{mutation}: {url} changed"
+
+
+def test_deleted_entities_do_not_revalidate(client):
+    item_etag = client.get('/items/1').headers['ETag']
+    store_etag = client.get('/stores/2?expand=items').headers['ETag']
+
+    client.delete('/items/1')
+    client.delete('/stores/2')
+
+    assert revalidate(client, '/items/1', item_etag).status_code == 404
+    assert revalidate(client, '/stores/2?expand=items', store_etag).status_code == 404
+
+
+def test_etag_is_strong_and_versioned(client):
+    etag = client.get('/items/1').headers['ETag']
+    client.put('/items/1', json={"price": 3})
+
+    assert etag == '"item-1-v1"'
+    assert client.get('/items/1').headers['ETag'] == '"item-1-v2"'
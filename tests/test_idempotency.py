@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models import StoreModel
+from app.utils.serialization import msgpack
+
+
+def store_count(app):
+    with app.app_context():
+        return db.session.query(StoreModel).count()
+
+
+def post_store(client, name, key, headers=None, **kwargs):
+    headers = {'Idempotency-Key': key, **(headers or {})}
+    return client.post('/stores', json={"name": name}, headers=headers, **kwargs)
+
+
+def test_retry_replays_the_stored_response(app, client):
+    first = post_store(client, 'north', 'k1')
+    retry = post_store(client, 'north', 'k1')
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.data == first.data
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    assert store_count(app) == 1
+
+
+def test_reusing_a_key_with_another_body_is_rejected(app, client):
+    post_store(client, 'north', 'k1')
+
+    response = post_store(client, 'south', 'k1')
+
+    assert response.status_code == 422
+    assert store_count(app) == 1
+
+
+def test_concurrent_duplicates_collapse_to_one_write(app, monkeypatch):
+    from app.routes import store as store_routes
+    create_store_stats = store_routes.create_store_stats
+
+    def slow_create_store_stats(store_id):
+        time.sleep(0.3)
+        create_store_stats(store_id)
+
+    monkeypatch.setattr(store_routes, 'create_store_stats', slow_create_store_stats)
+    barrier = threading.Barrier(5)
+    responses = []
+
+    def send():
+        client = app.test_client()
+        barrier.wait()
+        responses.append(post_store(client, 'north', 'k1'))
+
+    threads = [threading.Thread(target=send) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r.status_code for r in responses] == [201] * 5
+    assert len({r.data for r in responses}) == 1
+    assert sum('Idempotent-Replayed' not in r.headers for r in responses) == 1
+    assert store_count(app) == 1
+
+
+def test_keys_are_scoped_to_the_caller(app, client):
+    with app.app_context():
+        token = create_access_token(identity='7')
+
+    post_store(client, 'north', 'k1', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    other_address = post_store(client, 'south', 'k1', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    authenticated = post_store(client, 'east', 'k1', headers={'Authorization': f'Bearer {token}'})
+    same_user = post_store(client, 'east', 'k1', headers={'Authorization': f'Bearer {token}'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.9'})
+
+    assert other_address.status_code == authenticated.status_code == 201
+    assert 'Idempotent-Replayed' not in other_address.headers
+    assert same_user.headers['Idempotent-Replayed'] == 'true'
+    assert store_count(app) == 3
+
+
+def test_keys_are_scoped_to_method_and_path(app, client, seed):
+    first, second = seed(2)
+
+    client.put(f'/stores/{first}', json={"name": "renamed"}, headers={'Idempotency-Key': 'k1'})
+    response = client.put(f'/stores/{second}', json={"name": "renamed-too"}, headers={'Idempotency-Key': 'k1'})
+
+    assert response.status_code == 200
+    assert 'Idempotent-Replayed' not in response.headers
+
+
+@pytest.mark.skipif(msgpack is None, reason="needs msgpack")
+def test_replay_follows_the_retry_accept_header(app, client):
+    first = post_store(client, 'north', 'k1', headers={'Accept': 'application/msgpack'})
+    retry = post_store(client, 'north', 'k1')
+    packed_retry = post_store(client, 'north', 'k1', headers={'Accept': 'application/msgpack'})
+
+    assert first.mimetype == packed_retry.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(first.data) == msgpack.unpackb(packed_retry.data) == retry.get_json()
+    assert retry.mimetype == 'application/json'
+    assert store_count(app) == 1
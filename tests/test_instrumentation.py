@@ -0,0 +1,72 @@
+import json
+import logging
+import re
+
+from app.utils.instrumentation import Counter, Histogram
+
+
+def test_server_timing_reports_query_count(client, seed):
+    seed(3, 2)
+
+    response = client.get('/stores?expand=items')
+
+    timing = response.headers['Server-Timing']
+    assert re.fullmatch(
+        r'app;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries", serialize;dur=[\d.]+', timing
+    )
+
+
+def test_server_timing_can_be_disabled(make_app):
+    client = make_app(SERVER_TIMING_HEADER=False).test_client()
+
+    assert 'Server-Timing' not in client.get('/stores').headers
+
+
+def test_metrics_endpoint_renders_request_histograms(client, seed):
+    seed(1, 1)
+    client.get('/stores')
+    client.get('/stores/999')
+
+    body = client.get('/internal/metrics').get_data(as_text=True)
+
+    assert 'http_request_duration_seconds_count{endpoint="store.get_all_stores",method="GET",status="200"} 1' in body
+    assert 'http_request_duration_seconds_count{endpoint="store.get_store",method="GET",status="404"} 1' in body
+    assert 'http_request_db_queries_bucket{endpoint="store.get_all_stores",method="GET",le="1.0"} 1' in body
+
+
+def test_internal_endpoints_require_the_configured_token(make_app):
+    client = make_app(INTERNAL_API_TOKEN='s3cret').test_client()
+
+    assert client.get('/internal/metrics').status_code == 403
+    assert client.get('/internal/metrics', headers={'X-Internal-Token': 's3cret'}).status_code == 200
+
+
+def test_slow_requests_and_queries_are_logged_without_parameters(make_app, caplog):
+    client = make_app(SLOW_REQUEST_MS=0, SLOW_QUERY_MS=0).test_client()
+
+    with caplog.at_level(logging.WARNING, logger='app.perf'):
+        client.get('/items?name_prefix=secret-value')
+
+    events = [json.loads(record.getMessage()) for record in caplog.records if record.name == 'app.perf']
+    request_event = next(event for event in events if event['event'] == 'slow_request')
+    assert request_event['path'] == '/items' and request_event['status'] == 200
+    assert request_event['queries'] == 1
+    query_events = [event for event in events if event['event'] == 'slow_query']
+    assert query_events and all('secret-value' not in json.dumps(event) for event in query_events)
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    histogram = Histogram('latency_seconds', "Latency.", (), (0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(5)
+    counter = Counter('writes_total', "Writes.", ('outcome',))
+    counter.inc('ok', amount=2)
+
+    assert histogram.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 1',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        'latency_seconds_sum 5.05',
+        'latency_seconds_count 2',
+    ]
+    assert counter.render().splitlines()[2] == 'writes_total{outcome="ok"} 2'
@@ -0,0 +1,41 @@
+import json
+
+
+def test_export_streams_every_item(client, seed):
+    seed(3, 4)
+
+    response = client.get('/items/export')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.data.splitlines()]
+    assert [row['id'] for row in rows] == list(range(1, 13))
+
+
+def test_export_json_filters_by_store(client, seed):
+    first, second = seed(2, 3)
+
+    response = client.get(f'/items/export?format=json&store_id={second}')
+
+    assert response.status_code == 200
+    assert {row['store_id'] for row in response.get_json()} == {second}
+    assert len(response.get_json()) == 3
+
+
+def test_export_rejects_malformed_store_id(client, seed):
+    seed(2, 3)
+
+    response = client.get('/items/export?store_id=abc')
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid store_id: abc"}
+
+
+def test_export_fast_path_matches_schema_dump(app, client, seed):
+    seed(3, 5)
+
+    fast = {fmt: client.get(f'/items/export?format={fmt}').data for fmt in ('ndjson', 'json')}
+    app.config['SERIALIZATION_MODE'] = 'schema'
+    schema = {fmt: client.get(f'/items/export?format={fmt}').data for fmt in ('ndjson', 'json')}
+
+    assert fast == schema
@@ -0,0 +1,139 @@
+"""
+Every GET /items filter and sort is answered from its index.
+
+Each combination of filters and sorts (first page and a cursor page) is
+driven through the real endpoint and the SQL it runs is EXPLAINed. With
+``enable_seqscan = off`` Postgres picks *some* index for any query, so a
+plan only passes when the index it reads is one built for a requested
+filter and that filter's column appears in the scan's ``Index Cond`` (or
+a bitmap's), not in a ``Filter`` applied to rows read in full-index order.
+Unfiltered sorts must read their sort index in order, with no Sort node.
+Needs PostgreSQL (see the pg_app fixture).
+"""
+import itertools
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+from app import db
+from app.models import ItemModel, StoreModel
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+# Query string, the column it constrains, and the indexes that may serve it.
+# Values match well under 1% of the rows, so even under LIMIT an ordered scan
+# that filters as it goes costs more than the filter's index.
+FILTERS = {
+    'store_id': ('store_id=3', 'store_id',
+                 {'ix_items_store_id_id', 'ix_items_store_id_price_id', 'ix_items_store_id_name_id'}),
+    'price': ('min_price=10&max_price=10.1', 'price', {'ix_items_price_id', 'ix_items_store_id_price_id'}),
+    'name_prefix': ('name_prefix=item-1234', 'name',
+                    {'ix_items_name_pattern', 'ix_items_name_id', 'ix_items_store_id_name_id',
+                     'ix_items_name_trgm'}),
+    'q': ('q=tem-1234', 'name', {'ix_items_name_trgm'}),
+}
+SORTS = ['id', '-id', 'price', '-price', 'name', '-name']
+SORT_INDEXES = {'id': 'items_pkey', 'price': 'ix_items_price_id', 'name': 'ix_items_name_id'}
+COMBINATIONS = [
+    (names, sort)
+    for size in range(len(FILTERS) + 1)
+    for names in itertools.combinations(FILTERS, size)
+    for sort in SORTS
+]
+
+SCAN = re.compile(r'(?:Index Scan|Index Only Scan)(?: Backward)? using (\w+) on items|Bitmap Index Scan on (\w+)')
+CONDITION = re.compile(r'(?:Index Cond|Recheck Cond): (.*)')
+
+
+def seed(count):
+    db.session.execute(
+        StoreModel.__table__.insert(),
+        [{"name": f"explain-store-{i}"} for i in range(max(1, count // 100))]
+    )
+    store_ids = db.session.scalars(db.select(StoreModel.id)).all()
+    db.session.execute(
+        ItemModel.__table__.insert(),
+        [{"name": f"item-{i}", "price": (i * 37) % 1000 / 10, "store_id": store_ids[i % len(store_ids)]}
+         for i in range(count)]
+    )
+    db.session.commit()
+    db.session.execute(text('ANALYZE items'))
+    db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def seeded_app(pg_app):
+    with pg_app.app_context():
+        seed(20000)
+    return pg_app
+
+
+def explain(app, statement, parameters):
+    with app.app_context():
+        connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SET enable_seqscan = off')
+        cursor.execute('EXPLAIN ' + statement, parameters)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+def index_conditions(plan):
+    """``{index name: [condition, ...]}`` for every index scan in ``plan``."""
+    conditions, index = {}, None
+    for line in plan:
+        match = SCAN.search(line)
+        if match:
+            index = match.group(1) or match.group(2)
+            conditions.setdefault(index, [])
+        elif '->' in line:
+            index = None
+        elif index and (match := CONDITION.search(line)):
+            conditions[index].append(match.group(1))
+    return conditions
+
+
+def item_plans(app, query):
+    """EXPLAIN of every items query GET /items?<query> runs, first page and next page."""
+    with app.app_context():
+        engine = db.engine
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM items' in statement:
+            captured.append((statement, parameters))
+
+    client = app.test_client()
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        first = client.get(f'/items?{query}').get_json()
+        if first.get('next'):
+            client.get(f"/items?{query}&cursor={first['next']}")
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    assert captured
+    return [explain(app, statement, parameters) for statement, parameters in captured]
+
+
+@pytest.mark.parametrize('names, sort', COMBINATIONS, ids=lambda v: '+'.join(v) if isinstance(v, tuple) else v)
+def test_item_query_uses_its_index(seeded_app, names, sort):
+    query = '&'.join([FILTERS[name][0] for name in names] + [f'sort={sort}', 'limit=1'])
+
+    for plan in item_plans(seeded_app, query):
+        text_plan = '\n'.join(plan)
+        assert 'Seq Scan on items' not in text_plan, f"/items?{query}\n{text_plan}"
+        conditions = index_conditions(plan)
+        if names:
+            served = [
+                name for name in names
+                for index, conds in conditions.items()
+                if index in FILTERS[name][2] and any(FILTERS[name][1] in cond for cond in conds)
+            ]
+            assert served, f"/items?{query}: no filter answered by its index\n{text_plan}"
+        else:
+            assert SORT_INDEXES[sort.lstrip('-')] in conditions, f"/items?{query}\n{text_plan}"
+            assert 'Sort' not in text_plan, f"/items?{query}\n{text_plan}"
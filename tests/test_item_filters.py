@@ -0,0 +1,28 @@
+import pytest
+
+
+def test_price_range_and_sort(client, seed):
+    seed(2, 5)
+
+    response = client.get('/items?min_price=1&max_price=3.5&sort=-price')
+
+    assert response.status_code == 200
+    prices = [item['price'] for item in response.get_json()['data']]
+    assert prices == [3.5, 3.5, 2.5, 2.5, 1.5, 1.5]
+
+
+@pytest.mark.parametrize('query', [
+    'min_price=nan', 'max_price=inf', 'min_price=-Infinity', 'min_price=abc', 'store_id=1.5',
+])
+def test_malformed_numbers_are_rejected(client, query):
+    response = client.get(f'/items?{query}')
+
+    assert response.status_code == 400
+    name, raw = query.split('=')
+    assert response.get_json() == {"error": f"Invalid {name}: {raw}"}
+
+
+def test_unknown_sort_is_rejected(client):
+    response = client.get('/items?sort=store_id')
+
+    assert response.status_code == 400
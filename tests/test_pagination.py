@@ -0,0 +1,111 @@
+import pytest
+
+from app.utils.pagination import encode_cursor
+
+
+def walk(client, url, limit):
+    """Every row of ``url``, following ``next`` ``limit`` rows at a time."""
+    rows, cursor = [], None
+    while True:
+        separator = '&' if '?' in url else '?'
+        page = client.get(f"{url}{separator}limit={limit}" + (f"&cursor={cursor}" if cursor else ''))
+        assert page.status_code == 200
+        body = page.get_json()
+        assert len(body['data']) <= limit
+        # No empty page, unless the whole collection is empty
+        assert body['data'] or (not rows and body['next'] is None)
+        rows += body['data']
+        cursor = body['next']
+        if cursor is None:
+            return rows
+
+
+@pytest.fixture
+def catalogue(seed):
+    # Each store's items are priced 0.5 .. 4.5: every price is shared by four items
+    return seed(4, 5)
+
+
+@pytest.mark.parametrize('sort', ['id', '-id', 'price', '-price', 'name', '-name'])
+@pytest.mark.parametrize('limit', [1, 3, 20])
+def test_walking_items_returns_every_row_once_in_order(client, catalogue, sort, limit):
+    rows = walk(client, f'/items?sort={sort}', limit)
+
+    key = sort.lstrip('-')
+    expected = sorted(
+        client.get('/items?limit=100').get_json()['data'],
+        key=lambda item: (item[key], item['id']), reverse=sort.startswith('-'),
+    )
+    assert [item['id'] for item in rows] == [item['id'] for item in expected]
+
+
+def test_walking_filtered_items(client, catalogue):
+    store_id = catalogue[1]
+
+    rows = walk(client, f'/items?store_id={store_id}&min_price=1&sort=-price', 2)
+
+    assert [(item['price'], item['id']) for item in rows] == sorted(
+        ((item['price'], item['id']) for item in client.get(f'/stores/{store_id}?expand=items').get_json()['items']
+         if item['price'] >= 1),
+        reverse=True,
+    )
+
+
+@pytest.mark.parametrize('url', ['/stores', '/stores?expand=items', '/stores/stats'])
+def test_walking_stores(client, catalogue, url):
+    rows = walk(client, url, 3)
+
+    ids = [row.get('id', row.get('store_id')) for row in rows]
+    assert ids == sorted(catalogue)
+
+
+@pytest.mark.parametrize('limit', [4, 20])
+def test_last_page_has_no_next(client, catalogue, limit):
+    body = client.get(f'/items?limit={limit}&cursor={encode_cursor([16])}').get_json()
+
+    assert len(body['data']) == 4
+    assert body['next'] is None
+
+
+def test_full_last_page_has_no_next(client, catalogue):
+    # 20 items in pages of 10: the second page is full and still the last
+    first = client.get('/items?limit=10').get_json()
+    second = client.get(f"/items?limit=10&cursor={first['next']}").get_json()
+
+    assert len(second['data']) == 10
+    assert second['next'] is None
+
+
+@pytest.mark.parametrize('url, cursor', [
+    ('/items', 'not a cursor'),
+    ('/items', encode_cursor({"id": 1})),
+    ('/items', encode_cursor(['1'])),
+    ('/items', encode_cursor([True])),
+    ('/items', encode_cursor([1, 2])),
+    # A price cursor replayed against another sort
+    ('/items?sort=id', encode_cursor([1.5, 3])),
+    ('/items?sort=price', encode_cursor(['item-1-0', 3])),
+    ('/items?sort=name', encode_cursor([1.5, 3])),
+    ('/stores', encode_cursor(['x'])),
+    ('/stores/stats', encode_cursor([None])),
+])
+def test_malformed_or_tampered_cursor_is_400(client, catalogue, url, cursor):
+    separator = '&' if '?' in url else '?'
+
+    response = client.get(f'{url}{separator}cursor={cursor}')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Invalid cursor"
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('', 2), ('limit=3', 3), ('limit=100', 5), ('limit=0', 1), ('limit=-4', 1), ('limit=abc', 2),
+])
+def test_limit_is_clamped(make_app, query, expected):
+    app = make_app(PAGE_SIZE_DEFAULT=2, PAGE_SIZE_MAX=5)
+    client = app.test_client()
+    store_id = client.post('/stores', json={"name": "clamped"}).get_json()['id']
+    for i in range(8):
+        client.post('/items', json={"name": f"clamped-{i}", "price": i, "store_id": store_id})
+
+    assert len(client.get(f'/items?{query}').get_json()['data']) == expected
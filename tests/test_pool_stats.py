@@ -0,0 +1,76 @@
+from contextlib import ExitStack
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app import db
+from app.utils.pool_stats import InstrumentedQueuePool
+
+
+@pytest.fixture
+def pooled_app(make_app):
+    """An app on a SQLite file behind the instrumented QueuePool, two connections plus one overflow."""
+    return make_app(SQLALCHEMY_ENGINE_OPTIONS={
+        'poolclass': InstrumentedQueuePool, 'pool_size': 2, 'max_overflow': 1, 'pool_timeout': 0.2,
+    })
+
+
+def db_stats(client):
+    response = client.get('/internal/stats/db')
+    assert response.status_code == 200
+    return response.get_json()['default']
+
+
+def test_stats_report_configured_pool(pooled_app):
+    client = pooled_app.test_client()
+    client.get('/stores')
+
+    stats = db_stats(client)
+
+    assert stats['pool'] == 'InstrumentedQueuePool'
+    assert (stats['size'], stats['max_overflow']) == (2, 1)
+    assert stats['checkouts'] >= 1 and stats['connects'] >= 1
+    assert (stats['checked_out'], stats['overflow'], stats['saturation']) == (0, 0, 0.0)
+    assert stats['checkout_timeouts'] == 0
+
+
+def test_stats_follow_checkouts_overflow_and_timeouts(pooled_app):
+    client = pooled_app.test_client()
+    with pooled_app.app_context():
+        engine = db.engine
+
+    with ExitStack() as held:
+        for _ in range(2):
+            held.enter_context(engine.connect())
+        stats = db_stats(client)
+        assert (stats['checked_out'], stats['overflow'], stats['idle']) == (2, 0, 0)
+        assert stats['saturation'] == pytest.approx(2 / 3, abs=0.001)
+
+        held.enter_context(engine.connect())
+        stats = db_stats(client)
+        assert (stats['checked_out'], stats['overflow'], stats['saturation']) == (3, 1, 1.0)
+
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+
+    stats = db_stats(client)
+    assert stats['checkout_timeouts'] == 1
+    assert stats['checked_out'] == 0
+    assert stats['checked_out_peak'] >= 3
+    assert stats['checkout_wait_max_ms'] >= 0
+
+
+def test_unbounded_overflow_has_no_saturation(make_app):
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'poolclass': InstrumentedQueuePool, 'max_overflow': -1})
+
+    stats = db_stats(app.test_client())
+
+    assert stats['max_overflow'] == -1
+    assert stats['saturation'] is None
+
+
+def test_stats_require_the_internal_token(make_app):
+    client = make_app(INTERNAL_API_TOKEN='s3cret').test_client()
+
+    assert client.get('/internal/stats/db').status_code == 403
+    assert client.get('/internal/stats/db', headers={'X-Internal-Token': 's3cret'}).status_code == 200
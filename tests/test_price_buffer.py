@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from tests.test_changes import read_feed
+
+ASYNC = {'Prefer': 'respond-async'}
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app(PRICE_WRITE_BUFFER=True, PRICE_BUFFER_MAX_DELAY=0.5).test_client()
+
+
+def metric(client, series):
+    """Current value of one /internal/metrics series, 0 if it has not been written."""
+    for line in client.get('/internal/metrics').get_data(as_text=True).splitlines():
+        name, _, value = line.rpartition(' ')
+        if name == series:
+            return float(value)
+    return 0
+
+
+def wait_for_flushes(client, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while metric(client, 'price_buffer_flushes_total{trigger="time",result="ok"}') < count:
+        assert time.monotonic() < deadline, "price buffer never flushed"
+        time.sleep(0.02)
+
+
+def create_items(client, count, store_name='buffered'):
+    store_id = client.post('/stores', json={"name": store_name}).get_json()['id']
+    return store_id, [
+        client.post('/items', json={"name": f"{store_name}-{i}", "price": 1, "store_id": store_id}).get_json()['id']
+        for i in range(count)
+    ]
+
+
+def test_buffered_updates_coalesce_into_one_write(client):
+    store_id, (item_id,) = create_items(client, 1)
+    _, cursor = read_feed(client)
+
+    for price in [2, 3, 4, 5]:
+        response = client.put(f'/items/{item_id}', json={"price": price}, headers=ASYNC)
+        assert response.status_code == 202
+        assert response.headers['Preference-Applied'] == 'respond-async'
+    wait_for_flushes(client, 1)
+
+    assert client.get(f'/items/{item_id}').get_json()['price'] == 5
+    assert client.get(f'/stores/{store_id}/stats').get_json()['max_price'] == 5
+    assert metric(client, 'price_buffer_writes_total{outcome="buffered"}') == 1
+    assert metric(client, 'price_buffer_writes_total{outcome="coalesced"}') == 3
+    assert metric(client, 'price_buffer_flushed_items_total{outcome="written"}') == 1
+    assert read_feed(client, since=cursor)[0] == [('item', item_id, 'update')]
+
+
+def test_synchronous_update_after_buffered_one_wins(client):
+    _, (item_id, other_id) = create_items(client, 2)
+
+    assert client.put(f'/items/{item_id}', json={"price": 7}, headers=ASYNC).status_code == 202
+    response = client.put(f'/items/{item_id}', json={"price": 8})
+    assert response.status_code == 200
+    # A later buffered write to another item forces a flush
+    assert client.put(f'/items/{other_id}', json={"price": 9}, headers=ASYNC).status_code == 202
+    wait_for_flushes(client, 1)
+
+    assert client.get(f'/items/{item_id}').get_json()['price'] == 8
+    assert client.get(f'/items/{other_id}').get_json()['price'] == 9
+    assert metric(client, 'price_buffer_flushed_items_total{outcome="written"}') == 1
+
+
+def test_deletion_before_flush_is_skipped(client):
+    doomed_store, doomed_items = create_items(client, 2, 'doomed')
+    _, (kept,) = create_items(client, 1, 'kept')
+
+    for item_id in doomed_items + [kept]:
+        assert client.put(f'/items/{item_id}', json={"price": 6}, headers=ASYNC).status_code == 202
+    # An item delete drops its pending price; a store delete cascades without seeing it
+    assert client.delete(f'/items/{doomed_items[0]}').status_code == 200
+    assert client.delete(f'/stores/{doomed_store}').status_code == 200
+    wait_for_flushes(client, 1)
+
+    assert client.get(f'/items/{kept}').get_json()['price'] == 6
+    assert metric(client, 'price_buffer_flushed_items_total{outcome="written"}') == 1
+    assert metric(client, 'price_buffer_flushed_items_total{outcome="missing"}') == 1
+    assert metric(client, 'price_buffer_flushes_total{trigger="time",result="failed"}') == 0
+
+
+def test_buffered_update_of_unknown_item_is_404(client):
+    assert client.put('/items/999', json={"price": 1}, headers=ASYNC).status_code == 404
@@ -0,0 +1,52 @@
+import pytest
+
+from app.utils.rate_limit import MemoryBuckets, parse_rate
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(RATE_LIMIT_LOGIN_ACCOUNT='3/minute', RATE_LIMIT_LOGIN_IP='', RATE_LIMIT_AUTH='')
+
+
+def test_login_gets_429_once_the_account_bucket_is_empty(client):
+    attempt = {"email": "ada@example.com", "password": "wrong"}
+    for _ in range(3):
+        assert client.post('/login', json=attempt).status_code == 401
+
+    response = client.post('/login', json=attempt)
+    assert response.status_code == 429
+    assert response.get_json() == {"error": "Too many requests"}
+    # One token refills in 20 seconds at 3/minute
+    assert response.headers['Retry-After'] == '20'
+
+    # Buckets are per account: other emails still get through
+    other = client.post('/login', json={"email": "bob@example.com", "password": "wrong"})
+    assert other.status_code == 401
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('app.utils.rate_limit.time.monotonic', lambda: clock[0])
+    buckets = MemoryBuckets()
+    capacity, rate = parse_rate('2/second')
+
+    assert buckets.take('k', capacity, rate) == (True, 0)
+    assert buckets.take('k', capacity, rate) == (True, 0)
+    allowed, retry_after = buckets.take('k', capacity, rate)
+    assert not allowed and retry_after == pytest.approx(0.5)
+
+    clock[0] += 0.5
+    assert buckets.take('k', capacity, rate)[0]
+
+
+def test_memory_buckets_are_bounded():
+    buckets = MemoryBuckets(max_keys=2)
+    for key in 'abc':
+        buckets.take(key, 1, 1)
+    assert len(buckets) == 2
+
+
+@pytest.mark.parametrize('rule', ['5', 'five/minute', '5/fortnight'])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        parse_rate(rule)
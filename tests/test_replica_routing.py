@@ -0,0 +1,120 @@
+import time
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+from app import db
+from app.models import ItemModel, StoreModel, StoreStatsModel
+from app.utils.db_routing import PRIMARY_UNTIL_COOKIE, PRIMARY_UNTIL_HEADER, REPLICA_BIND
+
+REPLICATED = (StoreModel.__table__, ItemModel.__table__, StoreStatsModel.__table__)
+
+
+@pytest.fixture
+def make_replicated_app(make_app, tmp_path):
+    """An app whose replica is a second SQLite file, only updated by ``replicate``."""
+    def make_replicated_app(**config):
+        app = make_app(DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}", **config)
+        with app.app_context():
+            db.metadata.create_all(db.engines[REPLICA_BIND])
+        return app
+    return make_replicated_app
+
+
+def replicate(app):
+    """Copy the primary's catalogue to the replica, as replication catching up would."""
+    with app.app_context():
+        with db.engines[None].connect() as primary, db.engines[REPLICA_BIND].begin() as replica:
+            for table in reversed(REPLICATED):
+                replica.execute(delete(table))
+            for table in REPLICATED:
+                rows = [row._asdict() for row in primary.execute(select(table))]
+                if rows:
+                    replica.execute(insert(table), rows)
+
+
+def row_count(app, bind, model):
+    with app.app_context():
+        with db.engines[bind].connect() as connection:
+            return connection.scalar(select(func.count()).select_from(model.__table__))
+
+
+@pytest.fixture
+def catalogue(make_replicated_app):
+    """(app, item id) with one item priced 1.0 on both databases."""
+    app = make_replicated_app()
+    client = app.test_client()
+    store_id = client.post('/stores', json={"name": "replicated"}).get_json()['id']
+    item_id = client.post('/items', json={"name": "lagging", "price": 1, "store_id": store_id}).get_json()['id']
+    replicate(app)
+    return app, item_id
+
+
+def test_writes_go_to_the_primary(catalogue):
+    app, _ = catalogue
+
+    app.test_client().post('/stores', json={"name": "unreplicated"})
+
+    assert row_count(app, None, StoreModel) == 2
+    assert row_count(app, REPLICA_BIND, StoreModel) == 1
+
+
+def test_reads_go_to_the_replica(catalogue):
+    app, item_id = catalogue
+    with app.app_context():
+        with db.engines[REPLICA_BIND].begin() as replica:
+            replica.execute(ItemModel.__table__.update().values(name='replica-only'))
+
+    body = app.test_client().get(f'/items/{item_id}').get_json()
+
+    assert body['name'] == 'replica-only'
+
+
+def test_writer_reads_its_own_writes(catalogue):
+    app, item_id = catalogue
+    writer, other = app.test_client(), app.test_client()
+
+    response = writer.put(f'/items/{item_id}', json={"price": 2})
+
+    until = float(response.headers[PRIMARY_UNTIL_HEADER])
+    assert time.time() < until <= time.time() + app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+    assert writer.get_cookie(PRIMARY_UNTIL_COOKIE).value == response.headers[PRIMARY_UNTIL_HEADER]
+    # The cookie pins the writer to the primary; everyone else reads the lagging replica
+    assert writer.get(f'/items/{item_id}').get_json()['price'] == 2
+    assert other.get(f'/items/{item_id}').get_json()['price'] == 1
+    # Clients without cookies send the header back instead
+    headers = {PRIMARY_UNTIL_HEADER: response.headers[PRIMARY_UNTIL_HEADER]}
+    assert other.get(f'/items/{item_id}', headers=headers).get_json()['price'] == 2
+    # Once the window is over the writer reads the replica again
+    writer.set_cookie(PRIMARY_UNTIL_COOKIE, f"{time.time() - 1:.3f}")
+    assert writer.get(f'/items/{item_id}').get_json()['price'] == 1
+
+
+def test_failed_write_opens_no_window(catalogue):
+    app, _ = catalogue
+    client = app.test_client()
+
+    response = client.put('/items/999', json={"price": 2})
+
+    assert response.status_code == 404
+    assert PRIMARY_UNTIL_HEADER not in response.headers
+    assert client.get_cookie(PRIMARY_UNTIL_COOKIE) is None
+
+
+def test_cache_is_never_filled_from_a_lagging_replica(make_replicated_app):
+    app = make_replicated_app(RESPONSE_CACHE_BACKEND='memory')
+    writer, other = app.test_client(), app.test_client()
+    store_id = writer.post('/stores', json={"name": "cached"}).get_json()['id']
+    item_id = writer.post('/items', json={"name": "cached", "price": 1, "store_id": store_id}).get_json()['id']
+    replicate(app)
+    writer.set_cookie(PRIMARY_UNTIL_COOKIE, '0')
+
+    writer.put(f'/items/{item_id}', json={"price": 2})
+    # Another client's miss renders from the primary, not the replica still at 1.0
+    assert other.get(f'/items/{item_id}').get_json()['price'] == 2
+    writer.set_cookie(PRIMARY_UNTIL_COOKIE, '0')
+
+    # After the window the writer is served the cached entry: their own write
+    assert writer.get(f'/items/{item_id}').get_json()['price'] == 2
+    assert writer.get(f'/stores/{store_id}?expand=items').get_json()['items'][0]['price'] == 2
+    assert other.get(f'/stores/{store_id}?expand=items').get_json()['items'][0]['price'] == 2
@@ -0,0 +1,148 @@
+import time
+
+import pytest
+from sqlalchemy import update
+
+from app import db, response_cache
+from app.models import ItemModel
+from app.utils.cache import MemoryBackend
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(RESPONSE_CACHE_BACKEND='memory')
+
+
+@pytest.fixture
+def catalogue(seed):
+    """Two stores of three items; returns (store id, item id) of the first store and item."""
+    store_id, _ = seed(2, 3)
+    return store_id, 1
+
+
+def cached_urls(store_id, item_id):
+    return [
+        '/items', f'/items/{item_id}', '/items?ids=1,2', '/stores', '/stores?expand=items',
+        f'/stores/{store_id}', f'/stores/{store_id}?expand=items', '/stores/stats',
+        f'/stores/{store_id}/stats',
+    ]
+
+
+def test_repeated_get_is_served_from_the_cache(client, catalogue, count_queries):
+    store_id, item_id = catalogue
+    for url in cached_urls(store_id, item_id):
+        first = client.get(url)
+
+        with count_queries() as statements:
+            second = client.get(url)
+
+        assert second.status_code == 200
+        assert second.data == first.data, url
+        assert statements == [], url
+
+
+def test_cached_entry_revalidates_without_the_view(client, catalogue, count_queries):
+    etag = client.get('/items/1').headers['ETag']
+
+    with count_queries() as statements:
+        response = client.get('/items/1', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert statements == []
+
+
+MUTATIONS = {
+    'create item': lambda c, s, i: c.post('/items', json={"name": "new", "price": 0.1, "store_id": s}),
+    'update item price': lambda c, s, i: c.put(f'/items/{i}', json={"price": 99}),
+    'rename item': lambda c, s, i: c.put(f'/items/{i}', json={"name": "renamed"}),
+    'delete item': lambda c, s, i: c.delete(f'/items/{i}'),
+    'bulk': lambda c, s, i: c.post('/items/bulk', json={"operations": [
+        {"op": "create", "name": "bulk", "price": 50, "store_id": s},
+        {"op": "update", "id": i, "price": 0.01},
+        {"op": "delete", "id": 2},
+    ]}),
+    'create store': lambda c, s, i: c.post('/stores', json={"name": "another"}),
+    'rename store': lambda c, s, i: c.put(f'/stores/{s}', json={"name": "renamed"}),
+    'delete store': lambda c, s, i: c.delete(f'/stores/{s}'),
+}
+
+
+@pytest.mark.parametrize('mutation', MUTATIONS)
+def test_writes_invalidate_every_dependent_response(client, catalogue, mutation):
+    store_id, item_id = catalogue
+    urls = cached_urls(store_id, item_id)
+    for url in urls:
+        client.get(url)
+
+    response = MUTATIONS[mutation](client, store_id, item_id)
+    assert response.status_code < 300
+
+    served = {url: (client.get(url).status_code, client.get(url).data) for url in urls}
+    response_cache.backend.clear()
+    for url in urls:
+        fresh = client.get(url)
+        assert served[url] == (fresh.status_code, fresh.data), f"{mutation}: stale {url}"
+
+
+def test_writer_reads_its_own_write(client, catalogue):
+    store_id, item_id = catalogue
+    assert client.get(f'/items/{item_id}').get_json()['price'] == 0.5
+    assert client.get(f'/stores/{store_id}/stats').get_json()['max_price'] == 2.5
+
+    client.put(f'/items/{item_id}', json={"price": 7})
+
+    assert client.get(f'/items/{item_id}').get_json()['price'] == 7
+    assert client.get(f'/stores/{store_id}/stats').get_json()['max_price'] == 7
+
+
+def test_entries_expire_after_ttl(make_app):
+    app = make_app(RESPONSE_CACHE_BACKEND='memory', RESPONSE_CACHE_TTL=1)
+    client = app.test_client()
+    store_id = client.post('/stores', json={"name": "ttl"}).get_json()['id']
+    item_id = client.post('/items', json={"name": "ttl", "price": 1, "store_id": store_id}).get_json()['id']
+    assert client.get(f'/items/{item_id}').get_json()['price'] == 1
+    # Behind the application's back, so nothing is invalidated
+    with app.app_context():
+        db.session.execute(update(ItemModel).values(price=2))
+        db.session.commit()
+
+    assert client.get(f'/items/{item_id}').get_json()['price'] == 1
+    time.sleep(1.1)
+    assert client.get(f'/items/{item_id}').get_json()['price'] == 2
+
+
+def test_errors_are_not_cached(client, catalogue):
+    assert client.get('/items/999').status_code == 404
+    client.post('/items', json={"name": "late", "price": 1, "store_id": catalogue[0]})
+    # Ids run on from the seeded six items
+    assert client.get('/items/7').status_code == 200
+
+
+def test_representations_are_cached_apart(client, catalogue):
+    plain = client.get('/items?limit=2')
+    columnar = client.get('/items?limit=2', headers={'Accept': 'application/json; layout=columnar'})
+
+    assert isinstance(plain.get_json()['data'], list)
+    assert isinstance(columnar.get_json()['data'], dict)
+    assert client.get('/items?limit=2').data == plain.data
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    backend.get('a')
+
+    backend.set('c', 3)
+
+    assert (backend.get('a'), backend.get('b'), backend.get('c')) == (1, None, 3)
+    assert len(backend) == 2
+
+
+def test_memory_backend_add_keeps_a_live_entry():
+    backend = MemoryBackend()
+
+    assert backend.add('key', 1, ttl=60)
+    assert not backend.add('key', 2, ttl=60)
+    assert backend.get('key') == 1
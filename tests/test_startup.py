@@ -0,0 +1,67 @@
+import json
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter: module-level LazyObjects are shared by every app of a process
+PROBE = textwrap.dedent("""
+    import json, sys
+    from app import create_app, db
+    from app.utils.lazy import _registry
+
+    app = create_app(serving=%(serving)s)
+    with app.app_context():
+        db.create_all()
+    state = {
+        "migrate": 'migrate' in app.extensions,
+        "marshmallow": 'marshmallow' in sys.modules,
+        "built": sum(lazy._target is not None for lazy in _registry),
+        "total": len(_registry),
+    }
+    response = app.test_client().post('/stores', json={"name": "first"})
+    state.update(status=response.status_code, built_after=sum(lazy._target is not None for lazy in _registry))
+    print(json.dumps(state))
+""")
+
+
+def probe(tmp_path, serving, lazy):
+    env = {
+        'PATH': '', 'PYTHONPATH': str(ROOT), 'DATABASE_URL': f"sqlite:///{tmp_path / 'startup.db'}",
+        'LAZY_STARTUP': str(lazy).lower(),
+    }
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE % {'serving': serving}],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_cli_app_builds_everything_eagerly(tmp_path):
+    state = probe(tmp_path, serving=False, lazy=False)
+
+    assert state['migrate']
+    assert state['built'] == state['total']
+    assert state['status'] == 201
+
+
+def test_serving_app_leaves_out_migrations(tmp_path):
+    state = probe(tmp_path, serving=True, lazy=False)
+
+    assert not state['migrate']
+    assert state['built'] == state['total']
+
+
+@pytest.mark.parametrize('serving', [True, False])
+def test_lazy_startup_defers_schemas_to_first_use(tmp_path, serving):
+    state = probe(tmp_path, serving=serving, lazy=True)
+
+    assert not state['marshmallow']
+    assert state['built'] == 0
+    assert state['status'] == 201
+    assert 0 < state['built_after'] < state['total']
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from app import db
+from app.models import ItemModel, StoreModel, StoreStatsModel
+
+
+def remaining(app, store_id):
+    """(store, items, summary rows) still in the database for ``store_id``."""
+    with app.app_context():
+        return (
+            db.session.get(StoreModel, store_id) is not None,
+            db.session.scalar(select(func.count()).where(ItemModel.store_id == store_id)),
+            db.session.scalar(select(func.count()).where(StoreStatsModel.store_id == store_id)),
+        )
+
+
+def wait_for_deletion(client, status_url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(status_url).get_json()
+        if status['status'] not in ('pending', 'running'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"deletion still {status['status']} after {timeout}s")
+
+
+def test_delete_cascades_to_items_and_summary(app, client, seed):
+    store_id, other_id = seed(2, 5)
+
+    response = client.delete(f'/stores/{store_id}')
+
+    assert response.status_code == 200
+    assert remaining(app, store_id) == (False, 0, 0)
+    assert remaining(app, other_id) == (True, 5, 1)
+    assert client.get(f'/stores/{store_id}').status_code == 404
+    assert client.delete(f'/stores/{store_id}').status_code == 404
+
+
+@pytest.mark.parametrize('query, config', [
+    ('?background=true', {}),
+    ('', {'STORE_DELETE_BACKGROUND_MIN_ITEMS': 10}),
+])
+def test_background_delete_runs_to_done(make_app, query, config):
+    app = make_app(STORE_DELETE_BATCH_SIZE=3, **config)
+    client = app.test_client()
+    store_id = client.post('/stores', json={"name": "doomed"}).get_json()['id']
+    for i in range(10):
+        client.post('/items', json={"name": f"doomed-{i}", "price": i, "store_id": store_id})
+    assert remaining(app, store_id) == (True, 10, 1)
+
+    response = client.delete(f'/stores/{store_id}{query}')
+
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+    assert response.headers['Location'] == status_url
+    status = wait_for_deletion(client, status_url)
+    assert status['status'] == 'done'
+    assert status['items_deleted'] == 10
+    assert status['error'] is None
+    assert remaining(app, store_id) == (False, 0, 0)
+
+
+def test_background_delete_of_missing_store_is_404(client):
+    assert client.delete('/stores/999?background=true').status_code == 404
@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.mark.parametrize('stores, items_per_store', [(1, 1), (5, 3), (40, 25)])
+def test_list_expand_items_runs_two_queries(client, seed, count_queries, stores, items_per_store):
+    seed(stores, items_per_store)
+
+    with count_queries() as statements:
+        response = client.get('/stores?expand=items&limit=100')
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert len(data) == stores
+    assert all(len(store['items']) == items_per_store for store in data)
+    # One page of stores, one selectinload of their items
+    assert len(statements) == 2
+
+
+@pytest.mark.parametrize('items_per_store', [0, 1, 50])
+def test_detail_expand_items_runs_two_queries(client, seed, count_queries, items_per_store):
+    store_id, _ = seed(2, items_per_store)
+
+    with count_queries() as statements:
+        response = client.get(f'/stores/{store_id}?expand=items')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['items']) == items_per_store
+    assert len(statements) == 2
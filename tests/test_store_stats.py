@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app import db
+from app.models import ItemModel, StoreModel, StoreStatsModel
+from app.services.store_stats import create_store_stats, record_item_changes
+from tests.conftest import requires_postgres
+
+
+def stats_table():
+    return {
+        row.store_id: (row.item_count, row.price_sum, row.min_price, row.max_price)
+        for row in db.session.execute(select(StoreStatsModel)).scalars()
+    }
+
+
+def rebuilt_stats():
+    """The summaries as a full GROUP BY over items would compute them."""
+    rows = db.session.execute(
+        select(
+            StoreModel.id,
+            func.count(ItemModel.id),
+            func.coalesce(func.sum(ItemModel.price), 0),
+            func.min(ItemModel.price),
+            func.max(ItemModel.price),
+        )
+        .select_from(StoreModel)
+        .outerjoin(ItemModel, ItemModel.store_id == StoreModel.id)
+        .group_by(StoreModel.id)
+    ).all()
+    return {store_id: (count, total, low, high) for store_id, count, total, low, high in rows}
+
+
+def assert_stats_match(app):
+    with app.app_context():
+        actual, expected = stats_table(), rebuilt_stats()
+    assert actual.keys() == expected.keys()
+    for store_id, (count, total, low, high) in expected.items():
+        assert actual[store_id][0] == count
+        assert actual[store_id][1] == pytest.approx(total)
+        assert actual[store_id][2:] == (low, high)
+
+
+def test_mixed_writes_keep_summaries_exact(app, client):
+    stores = [client.post('/stores', json={"name": f"store-{i}"}).get_json()['id'] for i in range(3)]
+    items = [
+        client.post('/items', json={"name": f"item-{i}", "price": price, "store_id": stores[i % 3]}).get_json()
+        for i, price in enumerate([5, 1, 9, 7, 3, 2, 8, 4, 6])
+    ]
+    assert_stats_match(app)
+
+    # Move extremes away, delete them, raise a new maximum
+    client.put(f"/items/{items[1]['id']}", json={"price": 10})
+    client.put(f"/items/{items[2]['id']}", json={"price": 0.5})
+    client.delete(f"/items/{items[6]['id']}")
+    client.put(f"/items/{items[4]['id']}", json={"name": "renamed"})
+    assert_stats_match(app)
+
+    response = client.post('/items/bulk', json={"operations": [
+        {"op": "create", "name": "bulk-a", "price": 0.25, "store_id": stores[0]},
+        {"op": "create", "name": "bulk-b", "price": 99, "store_id": stores[2]},
+        {"op": "update", "id": items[0]['id'], "price": 11},
+        {"op": "update", "id": items[3]['id'], "price": 5.5},
+        {"op": "delete", "id": items[8]['id']},
+        {"op": "delete", "id": items[5]['id']},
+    ]})
+    assert response.status_code == 200
+    assert_stats_match(app)
+
+    # Empty a store entirely: count 0, no bounds
+    for item in client.get(f'/stores/{stores[1]}?expand=items').get_json()['items']:
+        client.delete(f"/items/{item['id']}")
+    assert client.get(f'/stores/{stores[1]}/stats').get_json()['item_count'] == 0
+    assert_stats_match(app)
+
+
+@pytest.mark.parametrize('price', ['abc', None, True, 'nan'])
+def test_update_rejects_invalid_price(app, client, seed, price):
+    store_id, = seed(1, 2)
+
+    response = client.put('/items/1', json={"price": price})
+
+    assert response.status_code == 400
+    assert 'price' in response.get_json()['errors']
+    with app.app_context():
+        assert db.session.get(ItemModel, 1).price == 0.5
+    assert_stats_match(app)
+
+
+def _wait_for_lock_wait(app, timeout=5):
+    """Block until some session of the database is waiting on a lock."""
+    deadline = time.monotonic() + timeout
+    with app.app_context():
+        engine = db.engine
+    with engine.connect() as connection:
+        while time.monotonic() < deadline:
+            waiting = connection.execute(text(
+                "SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'"
+            )).scalar()
+            if waiting:
+                return
+            time.sleep(0.02)
+    raise AssertionError("second writer never waited on the summary row")
+
+
+@requires_postgres
+@pytest.mark.parametrize('first, second', [
+    # A new minimum commits while another writer adds a price
+    ((None, 1), (None, 100)),
+    # A new maximum commits while another writer deletes the old maximum
+    ((None, 75), (50, None)),
+])
+def test_concurrent_writers_see_each_others_extremes(pg_app, first, second):
+    """
+    The second writer blocks on the summary row while the first commits; its
+    bounds must include the first writer's item, which its own snapshot
+    started without.
+    """
+    with pg_app.app_context():
+        store = StoreModel(name=f"race-{first}-{second}")
+        db.session.add(store)
+        db.session.flush()
+        create_store_stats(store.id)
+        existing = ItemModel(name=f"race-{store.id}-50", price=50, store_id=store.id)
+        db.session.add(existing)
+        db.session.flush()
+        record_item_changes([(store.id, None, 50)])
+        db.session.commit()
+        store_id, existing_id = store.id, existing.id
+
+    def write(change, name):
+        old_price, new_price = change
+        if new_price is None:
+            db.session.delete(db.session.get(ItemModel, existing_id))
+        else:
+            db.session.add(ItemModel(name=name, price=new_price, store_id=store_id))
+        record_item_changes([(store_id, old_price, new_price)])
+
+    errors = []
+
+    def second_writer():
+        try:
+            with pg_app.app_context():
+                write(second, f"race-{store_id}-second")
+                db.session.commit()
+        except Exception as e:
+            errors.append(e)
+
+    with pg_app.app_context():
+        write(first, f"race-{store_id}-first")
+        thread = threading.Thread(target=second_writer)
+        thread.start()
+        _wait_for_lock_wait(pg_app)
+        db.session.commit()
+    thread.join(10)
+    assert not errors
+
+    with pg_app.app_context():
+        assert stats_table()[store_id] == rebuilt_stats()[store_id]